@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Startup, Watchlist, Investment, Document, UserProfile, Newsletter
+from .models import (
+	Startup, Watchlist, Investment, Document, DocumentBlob, DocumentText, UserProfile, Newsletter, PortfolioSummary,
+	OutboundEmail, DigestRun, Notification,
+)
 
 
 @admin.register(Startup)
@@ -10,22 +13,41 @@ class StartupAdmin(admin.ModelAdmin):
 @admin.register(Investment)
 class InvestmentAdmin(admin.ModelAdmin):
 	list_display = ('investor', 'startup', 'amount', 'date', 'stage')
+	list_select_related = ('investor', 'startup')
 
 
 @admin.register(Watchlist)
 class WatchlistAdmin(admin.ModelAdmin):
 	list_display = ('user', 'startup', 'created_at')
+	list_select_related = ('user', 'startup')
 
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
-	list_display = ('title', 'uploaded_by', 'uploaded_at')
+	list_display = ('title', 'filename', 'uploaded_by', 'uploaded_at')
+	list_select_related = ('uploaded_by',)
 	search_fields = ('title', 'description')
 
 
+@admin.register(DocumentBlob)
+class DocumentBlobAdmin(admin.ModelAdmin):
+	list_display = ('name', 'size', 'references', 'created_at')
+	search_fields = ('name',)
+	readonly_fields = ('name', 'size', 'references', 'created_at')
+
+
+@admin.register(DocumentText)
+class DocumentTextAdmin(admin.ModelAdmin):
+	list_display = ('document', 'status', 'source', 'extracted_at')
+	list_filter = ('status',)
+	list_select_related = ('document',)
+	readonly_fields = ('document', 'status', 'content', 'error', 'source', 'extracted_at')
+
+
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
 	list_display = ('user', 'email_investments', 'email_startups', 'push_watchlist', 'created_at')
+	list_select_related = ('user',)
 	list_filter = ('email_investments', 'email_startups', 'email_market', 'email_weekly')
 	search_fields = ('user__username', 'user__email')
 
@@ -36,3 +58,33 @@ class NewsletterAdmin(admin.ModelAdmin):
 	list_filter = ('is_active', 'subscribed_at')
 	search_fields = ('email',)
 	readonly_fields = ('subscribed_at',)
+
+
+@admin.register(PortfolioSummary)
+class PortfolioSummaryAdmin(admin.ModelAdmin):
+	list_display = ('investor', 'total_amount', 'investment_count', 'startup_count', 'updated_at')
+	list_select_related = ('investor',)
+	search_fields = ('investor__username',)
+	readonly_fields = ('updated_at',)
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+	list_display = ('subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+	list_filter = ('status',)
+	search_fields = ('subject', 'to')
+	readonly_fields = ('created_at', 'sent_at', 'last_error')
+
+
+@admin.register(DigestRun)
+class DigestRunAdmin(admin.ModelAdmin):
+	list_display = ('week_start', 'queued_count', 'last_user_id', 'started_at', 'finished_at')
+	readonly_fields = ('started_at',)
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+	list_display = ('recipient', 'kind', 'message', 'is_read', 'created_at')
+	list_select_related = ('recipient',)
+	list_filter = ('kind', 'is_read')
+	search_fields = ('recipient__username', 'message')
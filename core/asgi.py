@@ -0,0 +1,36 @@
+"""
+ASGI handler for long-lived streaming views.
+
+Django's ``ASGIHandler`` runs every request in its own thread-sensitive
+context: the request's sync work (sync middleware, session and user lookups,
+ORM calls) goes to a single-thread executor created for that request and
+kept until its response has been sent. For the ``/events/`` stream, which
+stays open as long as its client does, that is one idle thread per open
+stream, which caps the number of streams a worker can hold.
+
+``ASGIHandler`` serves the views named in ``shared_thread_views`` without
+that per-request context, so asgiref runs their sync work on its one shared
+thread instead, a short call at a time, and an open stream holds no thread.
+Every other request is handled exactly as by Django.
+"""
+from django.core.handlers.asgi import ASGIHandler as DjangoASGIHandler
+from django.urls import Resolver404, resolve
+
+
+class ASGIHandler(DjangoASGIHandler):
+    # URL names of views whose responses may stay open indefinitely.
+    shared_thread_views = ('event_stream',)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and self.shares_thread(scope):
+            await self.handle(scope, receive, send)
+        else:
+            await super().__call__(scope, receive, send)
+
+    def shares_thread(self, scope):
+        path = scope['path'].removeprefix(scope.get('root_path', '')) or '/'
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return False
+        return match.url_name in self.shared_thread_views
@@ -0,0 +1,180 @@
+"""
+Async variants of the read-heavy views, for ASGI deployments.
+
+``core.urls`` routes to these instead of the ``core.views`` classes when
+``ASYNC_VIEWS`` is on. Each one renders the same template with the same
+context as its sync counterpart, but loads its data through the async ORM
+and cache APIs, so a worker waiting on the database is free to serve other
+requests. Independent queries on one page are awaited together with
+``asyncio.gather``.
+
+Django still executes a request's queries one at a time on that request's
+database thread, so ``gather`` overlaps the waiting, not the SQL.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Sum
+from django.http import Http404
+from django.views.generic import TemplateView, View
+
+from . import views
+from .cache import aget_or_set
+from .models import Investment, Startup, Watchlist
+from .pagination import apaginate_keyset
+from .reports import asummarize_investments, asummarize_startups
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """``LoginRequiredMixin`` that loads the user without blocking the event loop."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Resolved once here; templates and context processors reuse it.
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await View.dispatch(self, request, *args, **kwargs)
+
+
+class StartupListView(TemplateView):
+    """Async ``views.StartupListView``."""
+    template_name = views.StartupListView.template_name
+    ordering = views.StartupListView.ordering
+    page_size = views.StartupListView.page_size
+
+    async def get(self, request, *args, **kwargs):
+        page = await aget_or_set(
+            'startup_list', [request.GET.urlencode()], ['startups'],
+            lambda: apaginate_keyset(request, Startup.objects.all(), self.ordering, per_page=self.page_size),
+        )
+        context = self.get_context_data(**kwargs)
+        context['startups'] = context['object_list'] = page.object_list
+        context['page'] = page
+        return self.render_to_response(context)
+
+
+class StartupDetailView(TemplateView):
+    """Async ``views.StartupDetailView``."""
+    template_name = views.StartupDetailView.template_name
+
+    async def get(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        lookups = [Startup.objects.aget(pk=kwargs['pk'])]
+        if request.user.is_authenticated:
+            lookups.append(Watchlist.objects.filter(user=request.user, startup_id=kwargs['pk']).aexists())
+        try:
+            startup, *in_watchlist = await asyncio.gather(*lookups)
+        except Startup.DoesNotExist:
+            raise Http404("No startup found matching the query")
+        context = self.get_context_data(**kwargs)
+        context['startup'] = context['object'] = startup
+        context['is_in_watchlist'] = bool(in_watchlist and in_watchlist[0])
+        return self.render_to_response(context)
+
+
+class WatchlistView(AsyncLoginRequiredMixin, TemplateView):
+    """Async ``views.WatchlistView``."""
+    template_name = views.WatchlistView.template_name
+
+    async def get(self, request, *args, **kwargs):
+        items = [item async for item in Watchlist.objects.filter(user=request.user).select_related('startup')]
+        context = self.get_context_data(**kwargs)
+        context['watchlist_items'] = context['object_list'] = items
+        return self.render_to_response(context)
+
+
+class DocumentsListView(views.DocumentsListView):
+    """Async ``views.DocumentsListView``."""
+
+    async def get(self, request, *args, **kwargs):
+        q = request.GET.get('q', '').strip()
+        # Searches count matches with a raw cursor, which has no async API;
+        # so do snippets.
+        qs, ordering, count = await sync_to_async(self.filter_queryset)(q)
+        page = await apaginate_keyset(
+            request, qs, ordering, per_page=self.page_size, unique='-search_pk' in ordering,
+        )
+        if count is None:
+            count = await qs.acount()
+        await sync_to_async(self.add_snippets)(page.object_list, q)
+        context = self.get_context_data(**kwargs)
+        context['documents'] = page.object_list
+        context['documents_count'] = count
+        context['page'] = page
+        context['q'] = q
+        return self.render_to_response(context)
+
+
+class ReportsOverviewView(views.ReportsOverviewView):
+    """Async ``views.ReportsOverviewView``."""
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        context.update(await aget_or_set('reports_overview', [], ['investments', 'startups'], self.aget_overview))
+        return self.render_to_response(context)
+
+    def get_context_data(self, **kwargs):
+        # Skip the sync overview lookup in the parent.
+        return TemplateView.get_context_data(self, **kwargs)
+
+    async def aget_overview(self):
+        totals, total_startups, recent = await asyncio.gather(
+            Investment.objects.aaggregate(Sum('amount')),
+            Startup.objects.acount(),
+            self.arecent_investments(),
+        )
+        return {
+            'total_investment': totals['amount__sum'] or 0,
+            'total_startups': total_startups,
+            'recent_investments': recent,
+        }
+
+    async def arecent_investments(self):
+        return [investment async for investment in self.recent_investments()]
+
+
+class InvestmentsReportView(AsyncLoginRequiredMixin, views.InvestmentsReportView):
+    """Async ``views.InvestmentsReportView``; CSV export streams as in the sync view."""
+
+    async def get(self, request, *args, **kwargs):
+        qs, filters = self.filter_queryset(request)
+        if request.GET.get('export') == 'csv':
+            return self.export(qs)
+
+        page, summary = await asyncio.gather(
+            apaginate_keyset(request, qs, [filters['order']], per_page=self.page_size),
+            aget_or_set(
+                'investments_report_summary', self.summary_key(filters), ['investments', 'startups'],
+                lambda: asummarize_investments(qs),
+            ),
+        )
+        context = self.get_context_data(**kwargs)
+        context['investments'] = page.object_list
+        context['page'] = page
+        context.update(summary)
+        context.update(filters)
+        return self.render_to_response(context)
+
+
+class StartupsReportView(AsyncLoginRequiredMixin, views.StartupsReportView):
+    """Async ``views.StartupsReportView``; CSV export streams as in the sync view."""
+
+    async def get(self, request, *args, **kwargs):
+        qs, ordering, filters = self.filter_queryset(request)
+        if request.GET.get('export') == 'csv':
+            return self.export(qs)
+
+        page, summary = await asyncio.gather(
+            apaginate_keyset(request, qs, ordering, per_page=self.page_size),
+            aget_or_set(
+                'startups_report_summary', [filters['q'], filters['industry']], ['startups'],
+                lambda: asummarize_startups(qs),
+            ),
+        )
+        context = self.get_context_data(**kwargs)
+        context['startups'] = page.object_list
+        context['page'] = page
+        context.update(filters)
+        context.update(summary)
+        return self.render_to_response(context)
@@ -0,0 +1,216 @@
+"""
+Synthetic data generation and view benchmarking.
+
+``seed()`` fills the database with deterministic, production-shaped data and
+``benchmark_views()`` drives every route in ``core.urls`` through the test
+client, reporting latency percentiles, query counts and peak memory per view.
+"""
+import datetime
+import random
+import statistics
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from . import cache
+from .dedupe import startup_dedupe_key
+from .models import Document, Investment, Newsletter, Startup, Watchlist
+from .portfolio import rebuild_portfolio_summaries
+from .search import create_search_tables
+
+BENCHMARK_PREFIX = 'bench_'
+BENCHMARK_PASSWORD = 'benchmark-pass'
+
+INDUSTRIES = ['AI', 'Fintech', 'Health', 'Climate', 'SaaS', 'Retail', 'Mobility', 'Security', 'Edtech', 'Agritech']
+WORDS = [
+    'platform', 'data', 'cloud', 'network', 'robotics', 'payments', 'energy', 'care', 'logistics',
+    'marketplace', 'analytics', 'security', 'learning', 'mobile', 'carbon', 'supply', 'insights',
+]
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def clear():
+    """Delete everything a previous ``seed()`` created."""
+    with transaction.atomic():
+        User.objects.filter(username__startswith=BENCHMARK_PREFIX).delete()
+        Startup.objects.filter(name__startswith='Bench ').delete()
+        Newsletter.objects.filter(email__startswith=BENCHMARK_PREFIX).delete()
+        Document.objects.filter(file__startswith=f'documents/{BENCHMARK_PREFIX}').delete()
+
+
+def seed(users=200, startups=1000, investments=20000, watchlists=5000, documents=2000,
+         newsletters=2000, seed_value=42, batch_size=5000):
+    """
+    Insert deterministic benchmark data and refresh the derived tables.
+
+    The same arguments always produce the same rows, so results can be
+    compared across commits. Returns a dict of row counts per model.
+    """
+    rng = random.Random(seed_value)
+    now = timezone.now()
+    stages = [value for value, _ in Investment.STAGE_CHOICES]
+
+    with transaction.atomic():
+        template = User(username='template')
+        template.set_password(BENCHMARK_PASSWORD)
+        user_rows = User.objects.bulk_create([
+            User(username=f'{BENCHMARK_PREFIX}{i}', email=f'{BENCHMARK_PREFIX}{i}@example.com',
+                 password=template.password)
+            for i in range(users)
+        ], batch_size=batch_size)
+
+        startup_rows = []
+        for i in range(startups):
+            name, website = f'Bench {rng.choice(WORDS).title()} {i}', f'https://bench{i}.example.com'
+            startup_rows.append(Startup(
+                name=name, description=_sentence(rng, 12),
+                industry=rng.choice(INDUSTRIES), founder=f'Founder {i}',
+                founded_date=datetime.date(2005 + rng.randrange(20), 1 + rng.randrange(12), 1),
+                website=website, dedupe_key=startup_dedupe_key(name, website),
+            ))
+        Startup.objects.bulk_create(startup_rows, batch_size=batch_size)
+        # auto_now_add ignores explicit values on insert; spread them afterwards.
+        for startup in startup_rows:
+            startup.created_at = now - datetime.timedelta(minutes=rng.randrange(2_000_000))
+        Startup.objects.bulk_update(startup_rows, ['created_at'], batch_size=batch_size)
+
+        start = datetime.date(2015, 1, 1)
+        Investment.objects.bulk_create((
+            Investment(
+                investor=rng.choice(user_rows), startup=rng.choice(startup_rows),
+                amount=Decimal(rng.randrange(1_000, 5_000_000)),
+                date=start + datetime.timedelta(days=rng.randrange(3650)),
+                stage=rng.choice(stages), equity_percentage=Decimal(rng.randrange(1, 5000)) / 100,
+            )
+            for _ in range(investments)
+        ), batch_size=batch_size)
+
+        pairs = set()
+        watch_target = min(watchlists, users * startups)
+        while len(pairs) < watch_target:
+            pairs.add((rng.randrange(users), rng.randrange(startups)))
+        Watchlist.objects.bulk_create(
+            [Watchlist(user=user_rows[u], startup=startup_rows[s]) for u, s in sorted(pairs)],
+            batch_size=batch_size,
+        )
+
+        document_rows = Document.objects.bulk_create([
+            Document(
+                title=f'{rng.choice(WORDS).title()} report {i}', file=f'documents/{BENCHMARK_PREFIX}{i}.pdf',
+                description=_sentence(rng, 8), uploaded_by=rng.choice(user_rows),
+            )
+            for i in range(documents)
+        ], batch_size=batch_size)
+        for document in document_rows:
+            document.uploaded_at = now - datetime.timedelta(minutes=rng.randrange(2_000_000))
+        Document.objects.bulk_update(document_rows, ['uploaded_at'], batch_size=batch_size)
+
+        Newsletter.objects.bulk_create([
+            Newsletter(email=f'{BENCHMARK_PREFIX}{i}@example.org', is_active=rng.random() < 0.8)
+            for i in range(newsletters)
+        ], batch_size=batch_size)
+
+    # bulk_create skips signals, so rebuild what they would have maintained.
+    rebuild_portfolio_summaries([user.pk for user in user_rows])
+    create_search_tables(connection, rebuild=True)
+    cache.bump(*cache.NAMESPACES)
+    return {
+        'users': users, 'startups': startups, 'investments': investments,
+        'watchlists': watch_target, 'documents': documents, 'newsletters': newsletters,
+    }
+
+
+# Routes that change state when requested; benchmarking them would skew the data.
+SKIPPED_ROUTES = {
+    'logout', 'toggle_watchlist', 'document_delete', 'newsletter_subscribe', 'startups_upsert_api', 'event_stream',
+    'document_upload_start', 'document_upload', 'document_upload_chunk', 'document_upload_finish',
+}
+
+
+def _sample_pk(name):
+    if name.startswith('document'):
+        return Document.objects.order_by('pk').values_list('pk', flat=True).first()
+    return Startup.objects.order_by('pk').values_list('pk', flat=True).first()
+
+
+def benchmark_targets(patterns=None):
+    """Yield (route name, url) for every benchmarkable route in core.urls."""
+    from . import urls
+
+    for pattern in patterns or urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name or pattern.name in SKIPPED_ROUTES:
+            continue
+        kwargs = {}
+        if 'pk' in pattern.pattern.converters:
+            pk = _sample_pk(pattern.name)
+            if pk is None:
+                continue
+            kwargs['pk'] = pk
+        yield pattern.name, reverse(pattern.name, kwargs=kwargs)
+
+
+def _consume(response):
+    if getattr(response, 'streaming', False):
+        for _chunk in response.streaming_content:
+            pass
+    return response
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def benchmark_views(username=None, iterations=20, warmup=2):
+    """
+    Request every route as ``username`` and return per-view statistics.
+
+    Defaults to the benchmark user holding the most investments.
+    """
+    if username is None:
+        user = User.objects.filter(username__startswith=BENCHMARK_PREFIX).order_by(
+            '-portfolio_summary__investment_count', 'pk').first()
+    else:
+        user = User.objects.get(username=username)
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+
+    results = {}
+    for name, url in benchmark_targets():
+        for _ in range(warmup):
+            client.get(url)
+        timings, queries = [], []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = _consume(client.get(url))
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+
+        # Memory is sampled in a separate request: tracing skews the timings.
+        tracemalloc.start()
+        _consume(client.get(url))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(_percentile(timings, 95), 3),
+            'queries': max(queries),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+    return results
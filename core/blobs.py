@@ -0,0 +1,153 @@
+"""
+Reference counting for deduplicated document files.
+
+Document files are stored by ``core.storage.ContentAddressedStorage`` under
+their SHA-256, so the same deck uploaded ten times is stored once and the
+name it was uploaded under is kept on ``Document.filename``.
+
+A blob may back several documents, so deleting a document must not delete
+its file. ``DocumentBlob`` counts the documents referring to each stored
+name; the ``Document`` signals call ``reserve_blob()`` (or
+``acquire_blob()``) and ``release_blob()``, and the file is deleted once the
+last reference is gone and the deletion has committed. Rows written with
+``bulk_create()`` or ``update()`` bypass the signals;
+``rebuild_blob_references()`` recounts.
+
+The storage skips writing a content it already has, so a new upload must
+hold its reference before the storage looks, and the last release must not
+delete the file between that look and the reference: ``reserve_blob()``
+counts the reference before the write, and the deletion removes the
+unreferenced row and the file under the lock that delete takes.
+
+``manage.py dedupe_documents`` moves documents stored before this into the
+content-addressed layout.
+"""
+import posixpath
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, F, Max
+
+from .downloads import file_sha256
+from .models import Document, DocumentBlob
+from .storage import ContentAddressedStorage, blob_name, is_blob_name
+
+
+def document_storage():
+    return Document._meta.get_field('file').storage
+
+
+def acquire_blob(name, size=None):
+    """Count one more document stored under ``name``."""
+    with transaction.atomic():
+        if DocumentBlob.objects.filter(name=name).update(references=F('references') + 1):
+            return
+        blob, created = DocumentBlob.objects.get_or_create(name=name, defaults={'size': size, 'references': 1})
+        if not created:
+            DocumentBlob.objects.filter(pk=blob.pk).update(references=F('references') + 1)
+
+
+def reserve_blob(file):
+    """
+    Count a reference to the blob the uncommitted ``file`` will be stored as.
+
+    Called before the storage writes it. The content is hashed here and the
+    digest handed on to the storage. Returns the blob name, or None when
+    the storage is not content-addressed.
+    """
+    if not isinstance(file.storage, ContentAddressedStorage):
+        return None
+    content = file.file
+    digest = getattr(content, 'sha256', None) or file_sha256(content)
+    content.sha256 = digest
+    folder = posixpath.dirname(file.field.generate_filename(file.instance, file.name))
+    name = blob_name(folder, digest)
+    acquire_blob(name, file.size)
+    return name
+
+
+def release_blob(name):
+    """Count one document fewer under ``name``; the file is deleted on commit when none is left."""
+    with transaction.atomic():
+        DocumentBlob.objects.filter(name=name).update(references=F('references') - 1)
+        unreferenced = DocumentBlob.objects.filter(name=name, references__lte=0).exists()
+    if unreferenced:
+        transaction.on_commit(lambda: _delete_unreferenced(name))
+
+
+def _delete_unreferenced(name):
+    # The row is deleted only if still unreferenced, and the file before the
+    # commit: a document saved meanwhile either referenced the blob first,
+    # or waits on the row's lock and finds the file gone, so writes it again.
+    with transaction.atomic():
+        deleted, _ = DocumentBlob.objects.filter(name=name, references__lte=0).delete()
+        if deleted:
+            document_storage().delete(name)
+
+
+def rebuild_blob_references():
+    """Recount ``DocumentBlob`` from the ``Document`` table. Returns the number of blobs."""
+    counts = (
+        Document.objects.exclude(file='').values('file')
+        .annotate(references=Count('pk'), size=Max('size')).order_by()
+    )
+    with transaction.atomic():
+        DocumentBlob.objects.all().delete()
+        blobs = DocumentBlob.objects.bulk_create([
+            DocumentBlob(name=row['file'], size=row['size'], references=row['references'])
+            for row in counts
+        ])
+    return len(blobs)
+
+
+def dedupe_documents(dry_run=False):
+    """
+    Move document files stored under their upload names into blobs.
+
+    Each file is hashed once; documents are pointed at its blob and the old
+    file is deleted, so identical uploads end up sharing one file. Files
+    that don't exist are left alone. Returns a dict with the number of
+    ``files`` moved, the number of ``blobs`` they went into, the names of
+    ``missing`` files and the bytes ``reclaimed``.
+    """
+    storage = document_storage()
+    if not isinstance(storage, ContentAddressedStorage):
+        raise ImproperlyConfigured("Document.file does not use a ContentAddressedStorage.")
+    stats = {'files': 0, 'blobs': 0, 'missing': [], 'reclaimed': 0}
+    blobs = set()
+    # A list, not an iterator: the rows are updated along the way.
+    names = list(
+        Document.objects.exclude(file='').values_list('file', flat=True)
+        .distinct().order_by('file')
+    )
+    for name in names:
+        if is_blob_name(name):
+            continue
+        try:
+            with storage.open(name, 'rb') as file:
+                digest = file_sha256(file)
+                size = file.size
+                target = blob_name(posixpath.dirname(name), digest)
+                new_blob = target not in blobs and not storage.exists(target)
+                if not dry_run:
+                    file.sha256 = digest
+                    storage.save(name, file)
+        except FileNotFoundError:
+            stats['missing'].append(name)
+            continue
+
+        blobs.add(target)
+        stats['files'] += 1
+        if not new_blob:
+            stats['reclaimed'] += size
+        if dry_run:
+            continue
+        with transaction.atomic():
+            documents = Document.objects.filter(file=name)
+            documents.filter(filename='').update(filename=posixpath.basename(name))
+            documents.update(file=target, sha256=digest, size=size)
+        storage.delete(name)
+    stats['blobs'] = len(blobs)
+    if not dry_run:
+        rebuild_blob_references()
+    return stats
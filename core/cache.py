@@ -0,0 +1,133 @@
+"""
+Versioned caching for rendered fragments and report aggregates.
+
+Cached entries are stored under keys that embed the current version of every
+data namespace they depend on. Writes to Startup, Investment and Document bump
+their namespace (see ``core.signals``), which moves readers to fresh keys, so
+nothing has to be deleted and nothing is served stale after a write. Old
+entries simply age out of the cache.
+
+The ``site`` namespace covers static pages; bump it on deploy with
+``manage.py bump_cache_version site``.
+
+Cached values are always computed from the primary database, even in a
+request whose reads go to a replica: a lagging replica would otherwise store
+pre-write data under the version the write just bumped to, where it would
+be served to everyone until it expires.
+
+``aget_or_set()`` is the same lookup for async views, on the cache's async API.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .routers import primary_reads
+
+NAMESPACES = ('site', 'startups', 'investments', 'documents')
+DEFAULT_TIMEOUT = 600
+
+_VERSION_KEY = 'cache-version:{}'
+
+
+def _initial_version():
+    # Time based so a version evicted from the cache never restarts at a
+    # number that old entries were stored under.
+    return time.time_ns() // 1000
+
+
+def get_versions(*namespaces):
+    """Return {namespace: version} for ``namespaces``, initialising missing ones."""
+    keys = {_VERSION_KEY.format(ns): ns for ns in namespaces}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, ns in keys.items():
+        if key not in found:
+            cache.add(key, _initial_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[ns] = found[key]
+    return versions
+
+
+async def aget_versions(*namespaces):
+    """Async ``get_versions()``."""
+    keys = {_VERSION_KEY.format(ns): ns for ns in namespaces}
+    found = await cache.aget_many(keys)
+    versions = {}
+    for key, ns in keys.items():
+        if key not in found:
+            await cache.aadd(key, _initial_version(), timeout=None)
+            found[key] = await cache.aget(key)
+        versions[ns] = found[key]
+    return versions
+
+
+def _tag(namespaces, versions):
+    return '-'.join(f'{ns}.{versions[ns]}' for ns in namespaces)
+
+
+def version_tag(*namespaces):
+    """Compact string identifying the current versions of ``namespaces``."""
+    return _tag(namespaces, get_versions(*namespaces))
+
+
+def _bump(namespaces):
+    for ns in namespaces:
+        key = _VERSION_KEY.format(ns)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
+
+
+def bump(*namespaces):
+    """
+    Invalidate everything cached under ``namespaces``.
+
+    Inside a transaction the bump is repeated on commit, so a reader that
+    cached pre-commit data in between is invalidated as well.
+    """
+    _bump(namespaces)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(namespaces))
+
+
+def make_key(name, *parts):
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'{name}:{digest}'
+
+
+def get_or_set(name, parts, namespaces, compute, timeout=DEFAULT_TIMEOUT):
+    """
+    Return the cached value for ``name``/``parts`` at the current versions of
+    ``namespaces``, calling ``compute()`` with reads on the primary and
+    storing its result on a miss.
+    """
+    key = f'{make_key(name, *parts)}:{version_tag(*namespaces)}'
+    value = cache.get(key)
+    if value is None:
+        with primary_reads():
+            value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+async def aget_or_set(name, parts, namespaces, compute, timeout=DEFAULT_TIMEOUT):
+    """Async ``get_or_set()``; ``compute()`` returns an awaitable."""
+    key = f'{make_key(name, *parts)}:{_tag(namespaces, await aget_versions(*namespaces))}'
+    value = await cache.aget(key)
+    if value is None:
+        with primary_reads():
+            value = await compute()
+        await cache.aset(key, value, timeout)
+    return value
+
+
+class CacheVersions:
+    """Lazy template accessor: ``{{ cache_versions.startups }}``."""
+
+    def __getattr__(self, namespace):
+        if namespace not in NAMESPACES:
+            raise AttributeError(namespace)
+        return get_versions(namespace)[namespace]
@@ -0,0 +1,46 @@
+"""
+Chart series for the investor dashboard.
+
+Series are read from the materialized portfolio tables (one indexed range
+read per chart) and cached per investor under a namespace that Investment
+writes for that investor bump.
+"""
+from .cache import get_or_set
+from .models import Investment, PortfolioPosition, PortfolioStageTotal
+
+STAGE_ORDER = [value for value, _ in Investment.STAGE_CHOICES]
+
+
+def portfolio_namespace(investor_id):
+    """Cache namespace covering one investor's portfolio."""
+    return f'portfolio.{investor_id}'
+
+
+def _series(pairs):
+    return {'labels': [label for label, _ in pairs], 'values': [float(value) for _, value in pairs]}
+
+
+def compute_portfolio_charts(investor_id, top=10):
+    """Per-startup (top N plus "Other") and per-stage allocation series."""
+    positions = list(
+        PortfolioPosition.objects.filter(investor_id=investor_id)
+        .order_by('-total_amount', 'startup_id')
+        .values_list('startup__name', 'total_amount')
+    )
+    if len(positions) > top:
+        other = sum(amount for _, amount in positions[top:])
+        positions = positions[:top] + [('Other', other)]
+
+    stages = dict(
+        PortfolioStageTotal.objects.filter(investor_id=investor_id).values_list('stage', 'total_amount')
+    )
+    ordered_stages = [(stage, stages[stage]) for stage in STAGE_ORDER if stage in stages]
+    return {'startups': _series(positions), 'stages': _series(ordered_stages)}
+
+
+def portfolio_charts(investor_id, top=10):
+    """Cached ``compute_portfolio_charts``; invalidated by the investor's writes and startup renames."""
+    return get_or_set(
+        'portfolio_charts', [investor_id, top], [portfolio_namespace(investor_id), 'startups'],
+        lambda: compute_portfolio_charts(investor_id, top),
+    )
@@ -0,0 +1,23 @@
+"""
+Template context processors for the core app.
+"""
+from django.utils.functional import SimpleLazyObject
+
+from . import notifications
+from .cache import CacheVersions
+
+
+def cache_versions(request):
+    """Expose data namespace versions for ``{% cache %}`` fragment keys."""
+    return {'cache_versions': CacheVersions()}
+
+
+def unread_notifications(request):
+    """Lazy cached unread notification count for the navbar badge."""
+    def count():
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return 0
+        return notifications.unread_count(user)
+
+    return {'unread_notifications': SimpleLazyObject(count)}
@@ -0,0 +1,41 @@
+"""
+Normalized identity keys used to detect duplicate startups.
+
+Two startups are the same company when their names match after case,
+accent, punctuation and legal-suffix folding and their websites point at
+the same host. The key is stored on ``Startup.dedupe_key`` under a unique
+index, so duplicate checks and upserts are a single indexed lookup.
+"""
+import hashlib
+import re
+import unicodedata
+from urllib.parse import urlsplit
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]', re.UNICODE)
+_SPACE_RE = re.compile(r'\s+')
+LEGAL_SUFFIXES = {'inc', 'incorporated', 'llc', 'ltd', 'limited', 'corp', 'corporation', 'co', 'gmbh', 'plc'}
+
+
+def normalize_name(name):
+    text = unicodedata.normalize('NFKD', name or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    words = _SPACE_RE.sub(' ', _PUNCTUATION_RE.sub(' ', text)).split()
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+def normalize_website(website):
+    website = (website or '').strip().lower()
+    if not website:
+        return ''
+    if '//' not in website:
+        website = f'//{website}'
+    host = urlsplit(website).hostname or ''
+    return host.removeprefix('www.')
+
+
+def startup_dedupe_key(name, website):
+    """Hex digest identifying a startup by normalized name and website host."""
+    identity = f'{normalize_name(name)}|{normalize_website(website)}'
+    return hashlib.sha256(identity.encode()).hexdigest()
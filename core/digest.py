@@ -0,0 +1,142 @@
+"""
+Weekly portfolio digest emails.
+
+``run_weekly_digest()`` walks the opted-in users in primary key order, one
+chunk at a time. Each chunk is summarized with a fixed number of grouped
+queries covering all of its users, rendered from the ``emails/weekly_digest``
+templates and queued with a single ``bulk_create`` into the outbound email
+queue (``core.outbox``). The highest processed user id is stored on the
+week's ``DigestRun`` in the same transaction as the queued email, so a run
+that dies part way resumes after the last committed chunk without
+duplicating mail.
+"""
+import datetime
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import RowNumber
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import DigestRun, Investment, OutboundEmail, PortfolioPosition, PortfolioSummary, Startup
+from .outbox import make_email
+
+DIGEST_CHUNK_SIZE = 1000
+TOP_POSITIONS = 3
+NEW_STARTUPS = 5
+
+
+def last_week(today=None):
+    """(Monday, Sunday) of the last complete week before ``today``."""
+    today = today or timezone.localdate()
+    start = today - datetime.timedelta(days=today.weekday() + 7)
+    return start, start + datetime.timedelta(days=6)
+
+
+def digest_recipients():
+    """Active users with an email address who have not turned the weekly digest off."""
+    # Profiles are created lazily; users without one have the default (opted in).
+    return User.objects.filter(is_active=True).exclude(email='').filter(
+        Q(profile__isnull=True) | Q(profile__email_weekly=True)
+    )
+
+
+def _chunk_data(user_ids, week_start, week_end):
+    """Portfolio totals, the week's activity and top positions for ``user_ids``, keyed by user id."""
+    summaries = {
+        row['investor_id']: row
+        for row in PortfolioSummary.objects.filter(investor_id__in=user_ids).values(
+            'investor_id', 'total_amount', 'investment_count', 'startup_count',
+        )
+    }
+    weekly = {
+        row['investor_id']: row
+        for row in Investment.objects.filter(
+            investor_id__in=user_ids, date__range=(week_start, week_end),
+        ).values('investor_id').annotate(total=Sum('amount'), count=Count('id')).order_by()
+    }
+    top_positions = defaultdict(list)
+    ranked = PortfolioPosition.objects.filter(investor_id__in=user_ids).annotate(
+        rank=Window(RowNumber(), partition_by=[F('investor_id')],
+                    order_by=[F('total_amount').desc(), F('startup_id').asc()]),
+    ).filter(rank__lte=TOP_POSITIONS).order_by('investor_id', 'rank')
+    for investor_id, name, amount in ranked.values_list('investor_id', 'startup__name', 'total_amount'):
+        top_positions[investor_id].append({'name': name, 'amount': amount})
+    return summaries, weekly, top_positions
+
+
+def build_digests(users, week_start, week_end, new_startups):
+    """
+    Render the digest emails for ``users`` (dicts from ``digest_recipients``).
+
+    Users with neither a portfolio nor any new startups to show are skipped.
+    """
+    summaries, weekly, top_positions = _chunk_data([user['pk'] for user in users], week_start, week_end)
+    text_template = get_template('emails/weekly_digest.txt')
+    html_template = get_template('emails/weekly_digest.html')
+    subject = f"Your InvestTrack portfolio: week of {week_start:%b} {week_start.day}"
+    # Identical for every user, so formatted once instead of in each render.
+    week_label = f"{week_start:%b} {week_start.day} - {week_end:%b} {week_end.day}, {week_end.year}"
+    emails = []
+    for user in users:
+        summary = summaries.get(user['pk'])
+        # No profile row means the model defaults, which opt in.
+        wants_startups = user['profile__email_investments'] is not False
+        startups = new_startups if wants_startups else []
+        if summary is None and not startups:
+            continue
+        context = {
+            'name': user['first_name'] or user['username'],
+            'week_label': week_label,
+            'summary': summary,
+            'week': weekly.get(user['pk']),
+            'top_positions': top_positions.get(user['pk'], []),
+            'new_startups': startups,
+        }
+        emails.append(make_email(
+            subject, text_template.render(context), user['email'], html_body=html_template.render(context),
+        ))
+    return emails
+
+
+def run_weekly_digest(week_start=None, chunk_size=DIGEST_CHUNK_SIZE, restart=False):
+    """
+    Queue the digest for the week starting ``week_start`` (default: last week).
+
+    Resumes from the week's checkpoint unless ``restart`` is set; a finished
+    week is not sent twice. Returns the ``DigestRun``.
+    """
+    if week_start is None:
+        week_start, week_end = last_week()
+    else:
+        week_end = week_start + datetime.timedelta(days=6)
+    run, _ = DigestRun.objects.get_or_create(week_start=week_start)
+    if restart:
+        run.last_user_id, run.queued_count, run.finished_at = 0, 0, None
+        run.save()
+    if run.finished_at is not None:
+        return run
+
+    new_startups = list(
+        Startup.objects.filter(created_at__date__range=(week_start, week_end))
+        .order_by('-created_at').values('name', 'industry')[:NEW_STARTUPS]
+    )
+    recipients = digest_recipients().order_by('pk').values(
+        'pk', 'username', 'first_name', 'email', 'profile__email_investments',
+    )
+    while True:
+        users = list(recipients.filter(pk__gt=run.last_user_id)[:chunk_size])
+        if not users:
+            break
+        emails = build_digests(users, week_start, week_end, new_startups)
+        with transaction.atomic():
+            OutboundEmail.objects.bulk_create(emails, batch_size=500)
+            run.last_user_id = users[-1]['pk']
+            run.queued_count += len(emails)
+            run.save(update_fields=['last_user_id', 'queued_count'])
+
+    run.finished_at = timezone.now()
+    run.save(update_fields=['finished_at'])
+    return run
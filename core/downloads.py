@@ -0,0 +1,198 @@
+"""
+Sending stored documents to the browser.
+
+``serve()`` answers conditional requests itself: the ETag is the document's
+stored SHA-256, so a repeat download with ``If-None-Match`` gets a 304
+without touching the file. Everything else is left to the backend named by
+``settings.DOWNLOAD_BACKEND``:
+
+``FileResponseBackend`` (default)
+    Streams the file from Django in ``CHUNK_SIZE`` blocks, with single
+    ``Range`` requests (and ``If-Range``) answered as 206. Under WSGI a full
+    download goes through the server's ``wsgi.file_wrapper``, i.e.
+    ``sendfile()`` where available.
+``XAccelRedirectBackend``
+    Hands the file to nginx, which must serve ``DOWNLOAD_ACCEL_PREFIX`` as an
+    ``internal`` location aliased to ``MEDIA_ROOT``.
+``XSendfileBackend``
+    Hands the absolute path to Apache mod_xsendfile or lighttpd.
+
+Either way a file is never read into memory as a whole.
+"""
+import hashlib
+import mimetypes
+import posixpath
+import re
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, quote_etag
+from django.utils.module_loading import import_string
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_sha256(file):
+    """Hex SHA-256 of a Django ``File``, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_range(header, size):
+    """
+    The (start, end) byte offsets, end inclusive, asked for by a ``Range`` header.
+
+    Returns None when the whole file should be sent: no header, a unit other
+    than bytes, or several ranges (which servers may answer in full). Raises
+    ValueError when the range lies outside the file.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first:
+        start, end = int(first), int(last) if last else size - 1
+        if last and start > end:
+            # Syntactically invalid: ignore the header.
+            return None
+    elif last:
+        # Suffix range: the final ``last`` bytes.
+        if int(last) == 0:
+            raise ValueError("Empty suffix range.")
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        return None
+    if start >= size:
+        raise ValueError("Range starts past the end of the file.")
+    return start, min(end, size - 1)
+
+
+def _read_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+class DownloadBackend:
+    """Turns a document that has passed the conditional checks into a response."""
+
+    def response(self, request, document):
+        raise NotImplementedError
+
+
+class FileResponseBackend(DownloadBackend):
+    def response(self, request, document):
+        size = document.size
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if_range = request.headers.get('If-Range')
+        if byte_range is not None and if_range is not None and if_range != quote_etag(document.sha256):
+            # The client's partial copy is of another version: send all of this one.
+            byte_range = None
+
+        file = document.file.open('rb')
+        if byte_range is None:
+            response = FileResponse(file, as_attachment=True, filename=download_name(document))
+            response.block_size = CHUNK_SIZE
+            return response
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(file, start, end - start + 1), status=206)
+        response['Content-Type'] = content_type(document)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = content_disposition_header(True, download_name(document))
+        return response
+
+
+class XAccelRedirectBackend(DownloadBackend):
+    def response(self, request, document):
+        response = offload_response(document)
+        prefix = getattr(settings, 'DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = posixpath.join(prefix, quote(document.file.name))
+        return response
+
+
+class XSendfileBackend(DownloadBackend):
+    def response(self, request, document):
+        response = offload_response(document)
+        response['X-Sendfile'] = document.file.path
+        return response
+
+
+def download_name(document):
+    # Stored names are content hashes; send the name the file was uploaded under.
+    return document.filename or posixpath.basename(document.file.name)
+
+
+def content_type(document):
+    return mimetypes.guess_type(download_name(document))[0] or 'application/octet-stream'
+
+
+def offload_response(document):
+    """Headers-only response for a proxy that sends the body, ranges included."""
+    response = HttpResponse(content_type=content_type(document))
+    response['Content-Disposition'] = content_disposition_header(True, download_name(document))
+    return response
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    """The backend named by ``settings.DOWNLOAD_BACKEND`` (default: ``FileResponseBackend``)."""
+    return import_string(getattr(settings, 'DOWNLOAD_BACKEND', 'core.downloads.FileResponseBackend'))()
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    if setting == 'DOWNLOAD_BACKEND':
+        get_backend.cache_clear()
+
+
+def ensure_hash(document):
+    """Fill in the stored hash and size of a document saved before they were recorded."""
+    if document.sha256 and document.size is not None:
+        return
+    try:
+        with document.file.open('rb'):
+            document.sha256 = file_sha256(document.file)
+        document.size = document.file.size
+    except FileNotFoundError:
+        raise Http404("The file of this document is missing.")
+    document.save(update_fields=['sha256', 'size'])
+
+
+def serve(request, document):
+    """Download response for ``document``, or 304/412 for a matching conditional request."""
+    ensure_hash(document)
+    etag = quote_etag(document.sha256)
+    last_modified = document.uploaded_at.timestamp()
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        try:
+            response = get_backend().response(request, document)
+        except FileNotFoundError:
+            raise Http404("The file of this document is missing.")
+        response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Downloads need a login: browsers may keep a copy but must revalidate it.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,167 @@
+"""
+Live per-user events for the server-sent events stream.
+
+Sync code (views, signal handlers) calls ``publish()`` once its transaction
+commits; every open ``/events/`` connection of the target user receives the
+event through ``get_hub()``. The default ``LocalHub`` delivers within the
+current process only, which is enough for a single ASGI worker. With several
+workers, point ``EVENT_HUB`` at a hub backed by a shared broker that exposes
+the same ``subscribe()``/``publish()`` interface.
+
+Each subscriber holds one bounded ``asyncio.Queue`` on its event loop; the
+stream's sync work runs on asgiref's shared thread (see ``core.asgi``), so no
+thread or database connection is kept per stream. A client that stops
+reading loses its oldest events rather than growing the queue, and catches
+up on notifications from the database when it reconnects with
+``Last-Event-ID``.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+EVENT_QUEUE_SIZE = 100
+# Seconds between keep-alive comments on an idle stream.
+HEARTBEAT_INTERVAL = 15
+# Milliseconds a client waits before reconnecting.
+RECONNECT_DELAY = 5000
+# Notifications replayed on reconnect, oldest first.
+REPLAY_LIMIT = 50
+
+
+def user_channel(user_id):
+    return f'user.{user_id}'
+
+
+class Subscription:
+    """One stream's queue of events; read with ``await get()``, release with ``close()``."""
+
+    def __init__(self, hub, channel, maxsize):
+        self.hub = hub
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, event):
+        # Runs on the subscriber's loop.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class LocalHub:
+    """In-process pub/sub; ``publish()`` is safe to call from any thread."""
+
+    def __init__(self, maxsize=EVENT_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._channels = defaultdict(set)
+
+    def subscribe(self, channel):
+        """Subscribe the running event loop to ``channel``."""
+        subscription = Subscription(self, channel, self.maxsize)
+        with self._lock:
+            self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel, event):
+        """Queue ``event`` for every subscriber of ``channel``; returns how many there were."""
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down; it is about to unsubscribe.
+                pass
+        return len(subscribers)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+
+@lru_cache(maxsize=None)
+def get_hub():
+    """The hub named by ``settings.EVENT_HUB`` (default: ``LocalHub``)."""
+    return import_string(getattr(settings, 'EVENT_HUB', 'core.events.LocalHub'))()
+
+
+@receiver(setting_changed)
+def reset_hub(setting, **kwargs):
+    if setting == 'EVENT_HUB':
+        get_hub.cache_clear()
+
+
+def event(name, data, event_id=None):
+    return {'event': name, 'id': event_id, 'data': data}
+
+
+def publish(user_ids, name, data, event_id=None):
+    """Send an event to ``user_ids`` once the current transaction commits."""
+    message = event(name, data, event_id)
+    user_ids = list(user_ids)
+
+    def send():
+        hub = get_hub()
+        for user_id in user_ids:
+            hub.publish(user_channel(user_id), message)
+
+    transaction.on_commit(send)
+
+
+def publish_notifications(rows):
+    """Push freshly created ``Notification`` rows to their recipients."""
+    messages = [(row.recipient_id, notification_event(row)) for row in rows]
+    if not messages:
+        return
+
+    def send():
+        hub = get_hub()
+        for user_id, message in messages:
+            hub.publish(user_channel(user_id), message)
+
+    transaction.on_commit(send)
+
+
+def notification_event(notification):
+    return event('notification', {
+        'id': notification.pk,
+        'kind': notification.kind,
+        'message': notification.message,
+        'startup_id': notification.startup_id,
+        'created_at': notification.created_at.isoformat(),
+    }, event_id=notification.pk)
+
+
+def encode(message):
+    """Serialize an event in the ``text/event-stream`` format."""
+    lines = []
+    if message.get('id') is not None:
+        lines.append(f"id: {message['id']}")
+    lines.append(f"event: {message['event']}")
+    lines.append(f"data: {json.dumps(message['data'], separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
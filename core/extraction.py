@@ -0,0 +1,126 @@
+"""
+Plain text extracted from document files for content search.
+
+``extract_text()`` turns the bytes of a file into text: plain text, CSV and
+Markdown are decoded directly (UTF-8, falling back to Windows-1252), PDFs go
+through pypdf, which is pure Python. It needs neither Django nor the
+database, so ``manage.py extract_document_text`` can run it in a process
+pool; the upload itself never waits for it.
+
+``store_text()`` records the outcome in ``DocumentText`` and refreshes the
+document's row in the search table, whose ``content`` column makes the text
+searchable. A ``DocumentText`` belongs to the file named in its ``source``;
+after a document's file changes it is extracted again.
+"""
+import csv
+import io
+import posixpath
+import re
+
+from django.db import transaction
+from pypdf import PdfReader
+
+from .models import Document, DocumentText
+from .search import index_objects
+
+# Larger files are skipped rather than read into the worker's memory.
+MAX_FILE_BYTES = 50 * 1024 * 1024
+# Text kept per document, about 150,000 words.
+MAX_TEXT_CHARS = 1_000_000
+
+_CONTROL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+_SPACE_RE = re.compile(r'[ \t\r\f\v]+')
+_MARKDOWN_LINK_RE = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+_MARKDOWN_TAG_RE = re.compile(r'<[^>\n]+>')
+_MARKDOWN_MARKUP_RE = re.compile(r'^\s{0,3}(#{1,6}|>+|[-*+]|\d+\.)\s+|\*\*|__|[*`~]', re.MULTILINE)
+
+
+def _decode(data):
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('cp1252', errors='replace')
+
+
+def _plain(data):
+    return _decode(data)
+
+
+def _csv(data):
+    text = _decode(data)
+    try:
+        rows = list(csv.reader(io.StringIO(text)))
+    except csv.Error:
+        return text
+    return '\n'.join(' '.join(cell.strip() for cell in row if cell.strip()) for row in rows)
+
+
+def _markdown(data):
+    text = _MARKDOWN_LINK_RE.sub(r'\1', _decode(data))
+    return _MARKDOWN_MARKUP_RE.sub('', _MARKDOWN_TAG_RE.sub(' ', text))
+
+
+def _pdf(data):
+    reader = PdfReader(io.BytesIO(data))
+    if reader.is_encrypted:
+        # Only PDFs with an empty user password can be read.
+        reader.decrypt('')
+    pages, length = [], 0
+    for page in reader.pages:
+        text = page.extract_text() or ''
+        pages.append(text)
+        length += len(text)
+        if length >= MAX_TEXT_CHARS:
+            break
+    return '\n'.join(pages)
+
+
+EXTRACTORS = {
+    '.txt': _plain,
+    '.text': _plain,
+    '.csv': _csv,
+    '.md': _markdown,
+    '.markdown': _markdown,
+    '.pdf': _pdf,
+}
+
+
+def extractor(filename):
+    return EXTRACTORS.get(posixpath.splitext(filename or '')[1].lower())
+
+
+def extract_text(data, filename):
+    """Text of a file named ``filename`` with contents ``data``, whitespace-normalized and truncated."""
+    text = extractor(filename)(data)
+    text = _SPACE_RE.sub(' ', _CONTROL_RE.sub(' ', text))
+    return '\n'.join(line.strip() for line in text.splitlines() if line.strip())[:MAX_TEXT_CHARS]
+
+
+def source_name(document):
+    # Stored file names are content hashes; the type is in the uploaded name.
+    return document.filename or document.file.name
+
+
+def read_document(document):
+    """The bytes to extract, or None when the file's type or size is not supported."""
+    if extractor(source_name(document)) is None or document.file.size > MAX_FILE_BYTES:
+        return None
+    with document.file.open('rb') as file:
+        return file.read()
+
+
+def store_text(document, status, content='', error=''):
+    """
+    Record the text extracted from ``document`` and reindex it.
+
+    Does nothing and returns False when the document was deleted or given
+    another file since it was read.
+    """
+    with transaction.atomic():
+        if not Document.objects.filter(pk=document.pk, file=document.file.name).exists():
+            return False
+        DocumentText.objects.update_or_create(document_id=document.pk, defaults={
+            'status': status, 'content': content, 'error': error[:1000], 'source': document.file.name,
+        })
+        index_objects(Document, [document.pk])
+    return True
@@ -2,6 +2,8 @@
 Forms for the Investment Management System.
 """
 from django import forms
+from django.template.defaultfilters import filesizeformat
+from .images import MAX_UPLOAD_BYTES, MAX_UPLOAD_PIXELS
 from .models import Startup, Investment
 from .models import Document
 from django.contrib.auth.models import User
@@ -40,7 +42,7 @@ class StartupForm(forms.ModelForm):
         }
         help_texts = {
             'description': 'Briefly describe what the startup does (2-4 sentences).',
-            'image': 'Upload a high-quality image (JPG, PNG). Max recommended size 2MB.',
+            'image': 'Upload a high-quality image (JPG, PNG, WebP), up to 5MB. Smaller copies for cards are made automatically.',
         }
         widgets = {
             'founded_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
@@ -61,6 +63,17 @@ class StartupForm(forms.ModelForm):
             }),
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # Only a new upload has .image, the Pillow object ImageField validated.
+        if image and hasattr(image, 'image'):
+            if image.size > MAX_UPLOAD_BYTES:
+                raise forms.ValidationError(f"Images can be at most {filesizeformat(MAX_UPLOAD_BYTES)}.")
+            width, height = image.image.size
+            if width * height > MAX_UPLOAD_PIXELS:
+                raise forms.ValidationError(f"This image is too large ({width}x{height} pixels).")
+        return image
+
 class InvestmentForm(forms.ModelForm):
     """
     Form for creating Investment instances.
@@ -86,3 +99,11 @@ class DocumentForm(forms.ModelForm):
             'file': forms.ClearableFileInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'placeholder': 'Short description (optional)'}),
         }
+
+
+class InvestmentImportForm(forms.Form):
+    file = forms.FileField(
+        label='CSV file',
+        help_text='Columns: startup, amount, date (YYYY-MM-DD), stage, equity_percentage.',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}),
+    )
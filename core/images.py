@@ -0,0 +1,153 @@
+"""
+Downscaled variants of uploaded startup images.
+
+``render_variants()`` turns the bytes of an upload into WebP and JPEG copies
+at each of ``VARIANT_WIDTHS`` no wider than the original. Orientation from
+EXIF is applied to the pixels, and the copies carry no EXIF, ICC or other
+metadata. It only needs Pillow, so the backfill in
+``manage.py process_startup_images`` can run it in a process pool.
+
+``process_startup_image()`` stores the variants next to the original under
+content-hashed names (``startups/logo-320w.1a2b3c4d5e6f.webp``), so they can
+be served with far-future cache headers, and records them in
+``Startup.image_variants`` for the ``responsive_image`` template tag. A
+variant set belongs to the image named in its ``source`` key; after a new
+upload the tag falls back to the original until the set is regenerated,
+either on commit of the upload (``IMAGE_PROCESSING = 'upload'``) or by the
+worker (``'worker'``). Code that replaces an image file in place, keeping
+its name, must ``mark_stale()`` the record.
+
+The record is written with ``update()``, so storing it neither reindexes the
+startup nor invalidates the cache; callers ``bump('startups')`` once they are
+done, since the startup pages render the variants.
+"""
+import hashlib
+import io
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+VARIANT_WIDTHS = (160, 320, 640, 1280)
+FORMATS = {
+    # format: (Pillow format, file extension, save options)
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+# Largest upload StartupForm accepts, in bytes and in pixels.
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+MAX_UPLOAD_PIXELS = 40_000_000
+
+
+def variant_widths(width):
+    """The variant widths for an original ``width`` pixels wide; never upscaled."""
+    widths = {w for w in VARIANT_WIDTHS if w < width}
+    widths.add(min(width, VARIANT_WIDTHS[-1]))
+    return sorted(widths)
+
+
+def _flatten(image):
+    """``image`` as RGB, with any transparency composited onto white."""
+    if image.mode == 'RGB':
+        return image
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def render_variants(data, stem):
+    """
+    Encode the image in ``data`` at each variant width and format.
+
+    Returns ``(width, height, variants)``, where ``width`` and ``height`` are
+    the oriented original's size and ``variants`` lists ``(format, width,
+    height, name, content)`` with ``name`` a file name derived from ``stem``
+    and a hash of ``content``.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+        image = ImageOps.exif_transpose(source)
+    if image.mode not in ('RGB', 'RGBA'):
+        # Palette and greyscale images keep their transparency, if any.
+        has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    width, height = image.size
+
+    variants = []
+    for target in variant_widths(width):
+        size = (target, max(1, round(height * target / width)))
+        scaled = image if size == image.size else image.resize(size, Image.LANCZOS)
+        for fmt, (pillow_format, extension, options) in FORMATS.items():
+            output = io.BytesIO()
+            # Saving a fresh image object leaves out EXIF, ICC and text chunks.
+            (_flatten(scaled) if pillow_format == 'JPEG' else scaled).save(output, pillow_format, **options)
+            content = output.getvalue()
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            variants.append((fmt, target, size[1], f'{stem}-{target}w.{digest}.{extension}', content))
+    return width, height, variants
+
+
+def variants_current(startup):
+    """Whether ``startup.image_variants`` were made from its current image."""
+    return bool(startup.image) and startup.image_variants.get('source') == startup.image.name
+
+
+def mark_stale(record):
+    """A copy of a variant ``record`` that is current for no image but still lists its files."""
+    return {**record, 'source': None} if record else {}
+
+
+def _stored_names(variants):
+    return {name for fmt in FORMATS for _width, _height, name in variants.get(fmt, [])}
+
+
+def save_variants(startup, rendered, storage=None):
+    """Store the output of ``render_variants()`` for ``startup`` and record it on the row."""
+    storage = storage or default_storage
+    width, height, variants = rendered
+    folder = posixpath.dirname(startup.image.name)
+    record = {'source': startup.image.name, 'width': width, 'height': height}
+    for fmt, target, target_height, name, content in variants:
+        path = posixpath.join(folder, name)
+        # Same name, same bytes: a rerun only writes what changed.
+        if not storage.exists(path):
+            path = storage.save(path, ContentFile(content))
+        record.setdefault(fmt, []).append([target, target_height, path])
+
+    stale = _stored_names(startup.image_variants) - _stored_names(record)
+    _record_variants(startup, record)
+    for path in stale:
+        storage.delete(path)
+    return record
+
+
+def clear_variants(startup, storage=None):
+    """Delete the stored variants of ``startup``, e.g. after its image was removed."""
+    storage = storage or default_storage
+    for path in _stored_names(startup.image_variants):
+        storage.delete(path)
+    _record_variants(startup, {})
+
+
+def _record_variants(startup, record):
+    # Through the instance's class: pool workers import this module without Django.
+    startup.image_variants = record
+    type(startup)._default_manager.filter(pk=startup.pk).update(image_variants=record)
+
+
+def read_image(startup):
+    with startup.image.open('rb') as image:
+        return image.read()
+
+
+def image_stem(startup):
+    return posixpath.splitext(posixpath.basename(startup.image.name))[0]
+
+
+def process_startup_image(startup, storage=None):
+    """Render and store the variants of ``startup.image`` in this process."""
+    if not startup.image:
+        return clear_variants(startup, storage) if startup.image_variants else None
+    return save_variants(startup, render_variants(read_image(startup), image_stem(startup)), storage)
@@ -0,0 +1,375 @@
+"""
+Bulk CSV import of investments and startups.
+
+Rows are read incrementally from any text stream, validated with the same
+field rules as the corresponding ModelForm and written with ``bulk_create``
+one transactional chunk at a time. Invalid rows are reported with their line
+number and skipped; they never abort the rest of the file. Open uploads with
+``errors='surrogateescape'``: a row with bytes that are not UTF-8 is then
+reported like any other invalid row.
+
+``bulk_create`` bypasses the model signals, so once the input has been
+consumed the derived data the signals would have maintained (portfolio
+tables, search index, cache versions, watcher notifications) is refreshed
+for the touched rows.
+"""
+import csv
+import io
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django import forms
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.db import DatabaseError, transaction
+from PIL import Image, ImageOps
+
+from . import cache
+from . import images
+from .charts import portfolio_namespace
+from .dedupe import startup_dedupe_key
+from .forms import InvestmentForm, StartupForm
+from .models import Investment, Startup
+from .notifications import notify_new_investments
+from .portfolio import rebuild_portfolio_summaries
+from .search import index_objects
+
+IMPORT_CHUNK_SIZE = 1000
+# Row errors kept in the result; the total is always counted.
+MAX_REPORTED_ERRORS = 500
+
+INVESTMENT_COLUMNS = ['startup', 'amount', 'date', 'stage', 'equity_percentage']
+
+# Startup fields written by an upsert; ``image`` is handled separately.
+STARTUP_FIELDS = [name for name in StartupForm._meta.fields if name != 'image']
+STARTUP_COLUMNS = ['name', 'description', 'industry', 'founder', 'founded_date']
+STARTUP_IMAGE_MAX_SIZE = (1200, 1200)
+IMAGE_WORKERS = 4
+
+
+class RowValidator:
+    """
+    Clean rows with a ModelForm's field rules.
+
+    The form fields are built once per import rather than deep-copied for
+    every row as a Form instance would.
+    """
+
+    def __init__(self, model, fields):
+        self.fields = forms.fields_for_model(model, fields=fields)
+
+    def clean(self, row):
+        """Return (cleaned data, None) or (None, error message)."""
+        data, errors = {}, {}
+        for name, form_field in self.fields.items():
+            try:
+                data[name] = form_field.clean(row.get(name))
+            except forms.ValidationError as exc:
+                errors[name] = ' '.join(exc.messages)
+        self.clean_extra(row, data, errors)
+        if errors:
+            return None, '; '.join(f"{name}: {message}" for name, message in errors.items())
+        return data, None
+
+    def clean_extra(self, row, data, errors):
+        pass
+
+
+class InvestmentRowValidator(RowValidator):
+    """
+    ``InvestmentForm`` rules, with ``startup`` (by name) and ``investor`` (by
+    username) resolved from preloaded maps instead of one query per row.
+    """
+
+    def __init__(self, startups, investors=None):
+        super().__init__(Investment, [name for name in InvestmentForm._meta.fields if name != 'startup'])
+        self.startups = startups
+        self.investors = investors
+
+    def clean_extra(self, row, data, errors):
+        name = (row.get('startup') or '').strip()
+        data['startup'] = self.startups.get(name.casefold())
+        if data['startup'] is None:
+            errors['startup'] = f"Unknown startup '{name}'." if name else "This field is required."
+
+        if self.investors is not None:
+            username = (row.get('investor') or '').strip()
+            data['investor'] = self.investors.get(username)
+            if data['investor'] is None:
+                errors['investor'] = f"Unknown investor '{username}'." if username else "This field is required."
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    images: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+# Undecodable bytes as decoded by errors='surrogateescape'.
+_ESCAPED_BYTES_RE = re.compile('[\udc80-\udcff]')
+
+
+def _csv_rows(stream, required, result):
+    """
+    Yield (line number, row dict) from the CSV ``stream``.
+
+    Missing ``required`` columns reject the whole file; malformed lines are
+    recorded on ``result`` and skipped. A stream decoding strictly stops at
+    the first bytes that are not valid text, with an error for that line.
+    """
+    reader = csv.DictReader(stream)
+    try:
+        fieldnames = reader.fieldnames or []
+    except UnicodeDecodeError:
+        result.add_error(1, "The file is not UTF-8 encoded text.")
+        return
+    missing = [name for name in required if name not in fieldnames]
+    if missing:
+        result.add_error(1, f"Missing columns: {', '.join(missing)}.")
+        return
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            result.rows += 1
+            result.add_error(reader.line_num, f"Malformed CSV: {exc}")
+            continue
+        except UnicodeDecodeError:
+            result.rows += 1
+            result.add_error(reader.line_num + 1, "Not UTF-8 encoded text; the rest of the file was skipped.")
+            return
+        if any(_ESCAPED_BYTES_RE.search(value) for value in row.values() if isinstance(value, str)):
+            result.rows += 1
+            result.add_error(reader.line_num, "Not UTF-8 encoded text.")
+            continue
+        yield reader.line_num, row
+
+
+def _startup_map():
+    # Startup names are not unique; the oldest row wins.
+    lookup = {}
+    for pk, name in Startup.objects.order_by('-pk').values_list('pk', 'name').iterator():
+        lookup[name.casefold()] = pk
+    return lookup
+
+
+def import_investments(stream, investor=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Import investments from the CSV text ``stream``.
+
+    The header must contain the ``InvestmentForm`` columns, with ``startup``
+    holding the startup name. When ``investor`` is None every row also needs
+    an ``investor`` column with a username; otherwise all rows are recorded
+    for ``investor`` and that column is ignored. Returns an ``ImportResult``.
+    """
+    started = time.perf_counter()
+    result = ImportResult()
+    required = INVESTMENT_COLUMNS + (['investor'] if investor is None else [])
+    rows = _csv_rows(stream, required, result)
+
+    startups = _startup_map()
+    investors = None
+    if investor is None:
+        investors = dict(User.objects.values_list('username', 'pk').iterator())
+    validator = InvestmentRowValidator(startups, investors)
+    touched = set()
+    per_startup = Counter()
+    chunk = []
+
+    def flush():
+        try:
+            with transaction.atomic():
+                Investment.objects.bulk_create([obj for _, obj in chunk])
+        except DatabaseError as exc:
+            for line, _ in chunk:
+                result.add_error(line, f"Not saved: {exc}")
+        else:
+            result.created += len(chunk)
+            touched.update(obj.investor_id for _, obj in chunk)
+            per_startup.update(obj.startup_id for _, obj in chunk)
+        chunk.clear()
+
+    # Committed chunks stay committed if the import fails part way, so their
+    # derived data is refreshed either way.
+    try:
+        for line, row in rows:
+            result.rows += 1
+            data, error = validator.clean(row)
+            if error:
+                result.add_error(line, error)
+                continue
+            chunk.append((line, Investment(
+                investor_id=data.get('investor') or investor.pk, startup_id=data['startup'],
+                amount=data['amount'], date=data['date'], stage=data['stage'],
+                equity_percentage=data['equity_percentage'],
+            )))
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    finally:
+        if touched:
+            rebuild_portfolio_summaries(touched)
+            cache.bump('investments', *(portfolio_namespace(pk) for pk in touched))
+            names = dict(Startup.objects.filter(pk__in=per_startup).values_list('pk', 'name'))
+            notify_new_investments(
+                {pk: (names[pk], count) for pk, count in per_startup.items()},
+                actor_id=investor.pk if investor is not None else None,
+            )
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def prepare_image(path):
+    """
+    Load, orient and downscale the image at ``path``.
+
+    Runs in the image worker pool, so it must not touch the database.
+    Returns (bytes, file extension).
+    """
+    with Image.open(path) as image:
+        image_format = image.format or 'PNG'
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(STARTUP_IMAGE_MAX_SIZE)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, optimize=True)
+    return buffer.getvalue(), f'.{image_format.lower()}'
+
+
+def _resolve_image(image_root, value):
+    path = (image_root / value).resolve()
+    if not path.is_relative_to(image_root):
+        raise ValueError("Image path is outside the image directory.")
+    if not path.is_file():
+        raise ValueError(f"Image file '{value}' not found.")
+    return path
+
+
+def _store_images(jobs, result, workers):
+    """Prepare ``jobs`` [(line, startup pk, dedupe key, path)] in a worker pool and attach them."""
+    if not jobs:
+        return
+    image_field = Startup._meta.get_field('image')
+    variants = dict(Startup.objects.filter(pk__in=[job[1] for job in jobs]).values_list('pk', 'image_variants'))
+    updated = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(job, pool.submit(prepare_image, job[3])) for job in jobs]
+        for (line, pk, key, _path), future in futures:
+            try:
+                content, extension = future.result()
+            except Exception as exc:  # Pillow raises a variety of errors for bad files.
+                result.add_error(line, f"image: {exc}")
+                continue
+            # One file per startup, replaced in place, so re-imports don't pile up copies.
+            name = image_field.generate_filename(None, f'import_{key[:16]}{extension}')
+            if image_field.storage.exists(name):
+                image_field.storage.delete(name)
+            updated.append(Startup(
+                pk=pk, image=image_field.storage.save(name, ContentFile(content)),
+                # Same file name, new content: the old variants no longer match.
+                image_variants=images.mark_stale(variants[pk]),
+            ))
+    Startup.objects.bulk_update(updated, ['image', 'image_variants'], batch_size=IMPORT_CHUNK_SIZE)
+    result.images += len(updated)
+    if settings.IMAGE_PROCESSING == 'upload':
+        for startup in Startup.objects.filter(pk__in=[startup.pk for startup in updated]):
+            images.process_startup_image(startup)
+
+
+def upsert_startups(rows, image_root=None, workers=IMAGE_WORKERS, chunk_size=IMPORT_CHUNK_SIZE, result=None):
+    """
+    Insert or update startups from ``rows`` of (line number, row dict).
+
+    Rows are matched on ``Startup.dedupe_key`` (normalized name + website
+    host), so repeating an import updates the same rows instead of creating
+    duplicates; within one chunk the last row for a key wins. When
+    ``image_root`` is given, an ``image`` column holding a path below it is
+    processed in a pool of ``workers`` threads. Returns an ``ImportResult``.
+    """
+    started = time.perf_counter()
+    result = result or ImportResult()
+    validator = RowValidator(Startup, STARTUP_FIELDS)
+    if image_root is not None:
+        image_root = Path(image_root).resolve()
+    touched = set()
+    image_jobs = []
+    chunk = {}
+
+    def flush():
+        keys = list(chunk)
+        existing = set(Startup.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', flat=True))
+        try:
+            with transaction.atomic():
+                Startup.objects.bulk_create(
+                    [obj for _, obj, _ in chunk.values()], update_conflicts=True,
+                    unique_fields=['dedupe_key'], update_fields=STARTUP_FIELDS,
+                )
+        except DatabaseError as exc:
+            for line, _, _ in chunk.values():
+                result.add_error(line, f"Not saved: {exc}")
+        else:
+            result.created += len(keys) - len(existing)
+            result.updated += len(existing)
+            pks = dict(Startup.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', 'pk'))
+            touched.update(pks.values())
+            image_jobs.extend(
+                (line, pks[key], key, path) for key, (line, _, path) in chunk.items() if path is not None
+            )
+        chunk.clear()
+
+    try:
+        for line, row in rows:
+            result.rows += 1
+            data, error = validator.clean(row)
+            image_path = None
+            if not error and image_root is not None and (row.get('image') or '').strip():
+                try:
+                    image_path = _resolve_image(image_root, row['image'].strip())
+                except ValueError as exc:
+                    error = f"image: {exc}"
+            if error:
+                result.add_error(line, error)
+                continue
+            key = startup_dedupe_key(data['name'], data['website'])
+            chunk[key] = (line, Startup(dedupe_key=key, **data), image_path)
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+        _store_images(image_jobs, result, workers)
+    finally:
+        if touched:
+            index_objects(Startup, touched)
+            cache.bump('startups')
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def import_startups(stream, image_root=None, workers=IMAGE_WORKERS, chunk_size=IMPORT_CHUNK_SIZE):
+    """Upsert startups from the CSV text ``stream``; see ``upsert_startups``."""
+    result = ImportResult()
+    rows = _csv_rows(stream, STARTUP_COLUMNS, result)
+    return upsert_startups(rows, image_root, workers, chunk_size, result=result)
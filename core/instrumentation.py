@@ -0,0 +1,132 @@
+"""
+In-process request instrumentation: per-request SQL recording and rolling
+per-URL statistics.
+
+``QueryRecorder`` is installed with ``connection.execute_wrapper`` by
+``core.middleware.QueryInstrumentationMiddleware``; finished requests are
+folded into the module-level ``registry`` which the query stats page reads.
+"""
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open.
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalize ``sql`` so that queries differing only in values compare equal."""
+    sql = _LITERAL_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """execute_wrapper callable that times every query of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.fingerprint_time = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            key = fingerprint(sql)
+            self.count += 1
+            self.duration += elapsed
+            self.fingerprints[key] += 1
+            self.fingerprint_time[key] += elapsed
+
+    @property
+    def duplicates(self):
+        """Fingerprints executed more than once in the request (likely N+1)."""
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+
+@dataclass
+class RequestSample:
+    total_ms: float
+    sql_ms: float
+    queries: int
+    template_ms: float
+    duplicates: dict = field(default_factory=dict)
+
+
+class ViewStats:
+    """Rolling window of samples for one URL name."""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.requests = 0
+        # Worst duplicate count ever seen per fingerprint.
+        self.duplicate_patterns = Counter()
+
+    def add(self, sample):
+        self.requests += 1
+        self.samples.append(sample)
+        for sql, count in sample.duplicates.items():
+            if count > self.duplicate_patterns[sql]:
+                self.duplicate_patterns[sql] = count
+
+    def summary(self, top_patterns=5):
+        samples = list(self.samples)
+        totals = sorted(s.total_ms for s in samples)
+
+        def pct(p):
+            return round(totals[min(len(totals) - 1, int(p / 100 * len(totals)))], 2) if totals else 0
+
+        histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        for value in totals:
+            histogram[next((i for i, bound in enumerate(LATENCY_BUCKETS) if value <= bound),
+                           len(LATENCY_BUCKETS))] += 1
+        count = len(samples) or 1
+        return {
+            'requests': self.requests,
+            'window': len(samples),
+            'p50_ms': pct(50),
+            'p95_ms': pct(95),
+            'max_ms': round(totals[-1], 2) if totals else 0,
+            'avg_queries': round(sum(s.queries for s in samples) / count, 1),
+            'max_queries': max((s.queries for s in samples), default=0),
+            'avg_sql_ms': round(sum(s.sql_ms for s in samples) / count, 2),
+            'avg_template_ms': round(sum(s.template_ms for s in samples) / count, 2),
+            'histogram': dict(zip([f'<={b}ms' for b in LATENCY_BUCKETS] + [f'>{LATENCY_BUCKETS[-1]}ms'], histogram)),
+            'worst_patterns': self.duplicate_patterns.most_common(top_patterns),
+        }
+
+
+class StatsRegistry:
+    """Thread-safe map of URL name to ViewStats."""
+
+    def __init__(self, window=500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._views = defaultdict(lambda: ViewStats(self.window))
+
+    def record(self, name, sample):
+        with self._lock:
+            self._views[name].add(sample)
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def slowest(self, limit=20, key='p95_ms'):
+        with self._lock:
+            summaries = {name: stats.summary() for name, stats in self._views.items()}
+        ranked = sorted(summaries.items(), key=lambda item: item[1][key], reverse=True)
+        return ranked[:limit]
+
+
+registry = StatsRegistry()
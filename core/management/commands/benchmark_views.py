@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.benchmark import benchmark_views
+
+
+class Command(BaseCommand):
+    help = "Request every core URL and report p50/p95 latency, query counts and peak memory as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--user', help="Username to log in as (defaults to the busiest benchmark user).")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--compare', help="Previous JSON report to print deltas against.")
+
+    def handle(self, *args, **options):
+        results = benchmark_views(
+            username=options['user'], iterations=options['iterations'], warmup=options['warmup'],
+        )
+        report = json.dumps(results, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as fh:
+                previous = json.load(fh)
+            for name, current in sorted(results.items()):
+                if name not in previous:
+                    continue
+                before = previous[name]
+                self.stderr.write(
+                    f"{name:24} p50 {before['p50_ms']:>9.2f} -> {current['p50_ms']:>9.2f} ms  "
+                    f"queries {before['queries']:>3} -> {current['queries']:>3}"
+                )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cache import NAMESPACES, bump
+
+
+class Command(BaseCommand):
+    help = "Invalidate cached pages and aggregates by bumping cache namespace versions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('namespaces', nargs='*', help=f"Namespaces to bump (default: all of {', '.join(NAMESPACES)}).")
+
+    def handle(self, *args, **options):
+        namespaces = options['namespaces'] or list(NAMESPACES)
+        unknown = set(namespaces) - set(NAMESPACES)
+        if unknown:
+            raise CommandError(f"Unknown namespace(s): {', '.join(sorted(unknown))}")
+        bump(*namespaces)
+        self.stdout.write(self.style.SUCCESS(f"Bumped {', '.join(namespaces)}."))
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+
+
+class Command(BaseCommand):
+    help = "Check that the primary and every read replica answer, and report replica lag on PostgreSQL."
+
+    def handle(self, *args, **options):
+        failed = []
+        for alias in connections:
+            conn = connections[alias]
+            started = time.perf_counter()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    lag = None
+                    if alias in settings.DATABASE_REPLICAS and conn.vendor == 'postgresql':
+                        cursor.execute('SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())')
+                        lag = cursor.fetchone()[0]
+            except DatabaseError as exc:
+                failed.append(alias)
+                self.stderr.write(f"{alias}: FAILED ({exc})")
+                continue
+            finally:
+                conn.close()
+            elapsed = (time.perf_counter() - started) * 1000
+            detail = f", replica lag {lag:.1f}s" if lag is not None else ''
+            self.stdout.write(f"{alias}: ok ({conn.vendor}, {elapsed:.1f} ms{detail})")
+        if failed:
+            raise CommandError(f"Unreachable: {', '.join(failed)}")
@@ -0,0 +1,19 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from core.uploads import STALE_AFTER, clean_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete resumable document uploads that have not received a chunk for a while, with their partial files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=float, default=STALE_AFTER.total_seconds() / 3600,
+            help="Age, since the last chunk, at which an upload is abandoned.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = clean_stale_uploads(datetime.timedelta(hours=options['hours']))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} stale upload(s)."))
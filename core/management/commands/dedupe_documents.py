@@ -0,0 +1,28 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.template.defaultfilters import filesizeformat
+
+from core.blobs import dedupe_documents
+
+
+class Command(BaseCommand):
+    help = (
+        "Move document files stored under their upload names into content-addressed blobs, "
+        "storing identical files once, and report the space reclaimed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be reclaimed.")
+
+    def handle(self, *args, **options):
+        try:
+            stats = dedupe_documents(dry_run=options['dry_run'])
+        except ImproperlyConfigured as exc:
+            raise CommandError(exc)
+        for name in stats['missing']:
+            self.stderr.write(f"{name}: missing, skipped")
+        verb = "Would move" if options['dry_run'] else "Moved"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['files']} file(s) into {stats['blobs']} blob(s), "
+            f"reclaiming {stats['reclaimed']} bytes ({filesizeformat(stats['reclaimed'])})."
+        ))
@@ -0,0 +1,98 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from core import extraction
+from core.models import Document, DocumentText
+
+
+def pending_documents(everything=False):
+    """Documents whose text has not been extracted from their current file (all of them if ``everything``)."""
+    qs = Document.objects.exclude(file='')
+    if not everything:
+        qs = qs.filter(Q(text__isnull=True) | ~Q(text__source=F('file')))
+    return qs.order_by('pk')
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract the text of uploaded documents for content search in a process pool: once as a "
+        "backfill, or with --watch as the background worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count(), help="Worker processes.")
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--all', action='store_true', help="Extract documents that are already current again.")
+        parser.add_argument('--watch', action='store_true', help="Keep polling for new uploads.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls with --watch.")
+
+    def handle(self, *args, **options):
+        everything = options['all']
+        # With --all: the last document extracted in this pass, in pk order.
+        last_pk = 0
+        counts = {status: 0 for status, _label in DocumentText.STATUS_CHOICES}
+        with ProcessPoolExecutor(max_workers=options['processes']) as pool:
+            try:
+                while True:
+                    candidates = pending_documents(everything)
+                    if everything:
+                        candidates = candidates.filter(pk__gt=last_pk)
+                    batch = list(islice(candidates.iterator(), options['batch_size']))
+                    if not batch:
+                        if not options['watch']:
+                            break
+                        everything = False
+                        time.sleep(options['interval'])
+                        continue
+                    for _document, status in self.process(pool, batch, window=options['processes'] * 2):
+                        counts[status] += 1
+                    last_pk = batch[-1].pk
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write(self.style.SUCCESS(
+            f"Extracted {counts['done']} document(s), skipped {counts['skipped']}, {counts['failed']} failed."
+        ))
+
+    def process(self, pool, batch, window):
+        """
+        Extract ``batch`` in the pool and store the results from this process.
+
+        Yields (document, status). Files are read here, at most ``window``
+        ahead of the results, so the pool workers don't need Django and
+        only a few files are held in memory at once.
+        """
+        pending = deque()
+        for document in batch:
+            try:
+                data = extraction.read_document(document)
+            except OSError as exc:
+                yield document, self.store(document, DocumentText.STATUS_FAILED, error=str(exc))
+                continue
+            if data is None:
+                yield document, self.store(document, DocumentText.STATUS_SKIPPED)
+                continue
+            pending.append((document, pool.submit(extraction.extract_text, data, extraction.source_name(document))))
+            while len(pending) >= window:
+                yield self.collect(*pending.popleft())
+        while pending:
+            yield self.collect(*pending.popleft())
+
+    def collect(self, document, future):
+        try:
+            content = future.result()
+        except Exception as exc:  # pypdf raises many error types for damaged files.
+            return document, self.store(document, DocumentText.STATUS_FAILED, error=f"{type(exc).__name__}: {exc}")
+        self.stdout.write(f"{document.pk} {extraction.source_name(document)}: {len(content)} characters")
+        return document, self.store(document, DocumentText.STATUS_DONE, content=content)
+
+    def store(self, document, status, content='', error=''):
+        if error:
+            self.stderr.write(f"{document.pk} {extraction.source_name(document)}: {error}")
+        extraction.store_text(document, status, content, error)
+        return status
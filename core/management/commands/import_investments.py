@@ -0,0 +1,45 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importers import IMPORT_CHUNK_SIZE, import_investments
+
+
+class Command(BaseCommand):
+    help = "Import investments from a CSV file (startup,amount,date,stage,equity_percentage[,investor])."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file to import, or - for stdin.")
+        parser.add_argument(
+            '--investor', help="Username to record every row for; otherwise read the investor column.",
+        )
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        investor = None
+        if options['investor']:
+            try:
+                investor = User.objects.get(username=options['investor'])
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown investor '{options['investor']}'.")
+
+        if options['path'] == '-':
+            result = import_investments(sys.stdin, investor, options['chunk_size'])
+        else:
+            try:
+                stream = open(options['path'], newline='', encoding='utf-8-sig', errors='surrogateescape')
+            except OSError as exc:
+                raise CommandError(exc)
+            with stream:
+                result = import_investments(stream, investor, options['chunk_size'])
+
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"... {result.error_count - len(result.errors)} more errors")
+        style = self.style.SUCCESS if not result.error_count else self.style.WARNING
+        self.stdout.write(style(
+            f"Imported {result.created} of {result.rows} rows ({result.error_count} errors) "
+            f"in {result.elapsed:.2f}s, {result.rows_per_second:.0f} rows/sec."
+        ))
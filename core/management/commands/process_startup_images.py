@@ -0,0 +1,101 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from core import images
+from core.cache import bump
+from core.models import Startup
+
+
+def pending_startups(everything=False):
+    """Startups whose image has no current variants (all with an image if ``everything``)."""
+    qs = Startup.objects.exclude(image='').exclude(image__isnull=True)
+    if not everything:
+        qs = qs.filter(Q(image_variants__source__isnull=True) | ~Q(image_variants__source=F('image')))
+    return qs.order_by('pk')
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the downscaled WebP/JPEG variants of startup images in a process pool: once as a "
+        "backfill, or with --watch as the worker for IMAGE_PROCESSING = 'worker'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count(), help="Worker processes.")
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--all', action='store_true', help="Regenerate variants that are already current.")
+        parser.add_argument('--watch', action='store_true', help="Keep polling for new uploads.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls with --watch.")
+
+    def handle(self, *args, **options):
+        everything = options['all']
+        # With --all: the last startup regenerated in this pass, in pk order.
+        last_pk = 0
+        # Failures are skipped until their image changes.
+        broken = {}
+        processed = failed = 0
+        # Variants stored since the cache was last invalidated; they are
+        # stored without Startup signals, and the startup pages render them.
+        unpublished = False
+        with ProcessPoolExecutor(max_workers=options['processes']) as pool:
+            try:
+                while True:
+                    candidates = pending_startups(everything)
+                    if everything:
+                        candidates = candidates.filter(pk__gt=last_pk)
+                    batch = list(islice(
+                        (startup for startup in candidates.iterator() if broken.get(startup.pk) != startup.image.name),
+                        options['batch_size'],
+                    ))
+                    if not batch:
+                        if unpublished:
+                            bump('startups')
+                            unpublished = False
+                        if not options['watch']:
+                            break
+                        everything = False
+                        time.sleep(options['interval'])
+                        continue
+                    for startup, ok in self.process(pool, batch):
+                        if ok:
+                            processed += 1
+                            unpublished = True
+                        else:
+                            failed += 1
+                            broken[startup.pk] = startup.image.name
+                    last_pk = batch[-1].pk
+            except KeyboardInterrupt:
+                if unpublished:
+                    bump('startups')
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} image(s), {failed} failed."))
+
+    def process(self, pool, batch):
+        """
+        Render ``batch`` in the pool and store the results from this process.
+
+        Yields (startup, succeeded). Files are read and written here, so the
+        pool workers only need Pillow, not Django or the storage backend.
+        """
+        futures = []
+        for startup in batch:
+            try:
+                data = images.read_image(startup)
+            except OSError as exc:
+                self.stderr.write(f"{startup.image.name}: {exc}")
+                yield startup, False
+                continue
+            futures.append((startup, pool.submit(images.render_variants, data, images.image_stem(startup))))
+        for startup, future in futures:
+            try:
+                record = images.save_variants(startup, future.result())
+            except Exception as exc:  # Pillow raises many error types for unreadable images.
+                self.stderr.write(f"{startup.image.name}: {exc}")
+                yield startup, False
+                continue
+            self.stdout.write(f"{startup.image.name}: {len(record['webp']) + len(record['jpeg'])} variants")
+            yield startup, True
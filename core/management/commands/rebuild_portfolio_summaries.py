@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.portfolio import rebuild_portfolio_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized portfolio summary tables from Investment."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--investor', type=int, action='append', dest='investors',
+            help="Only rebuild this investor id (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_portfolio_summaries(options['investors'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} portfolio summaries."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.search import create_search_tables
+
+
+class Command(BaseCommand):
+    help = "Drop and rebuild the full-text search tables for startups and documents."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        count = create_search_tables(connections[options['database']], rebuild=True)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} rows."))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = "Generate deterministic benchmark users, startups, investments, watchlists and documents."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--startups', type=int, default=1000)
+        parser.add_argument('--investments', type=int, default=20000)
+        parser.add_argument('--watchlists', type=int, default=5000)
+        parser.add_argument('--documents', type=int, default=2000)
+        parser.add_argument('--newsletters', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42, help="Random seed; same seed, same data.")
+        parser.add_argument('--clear', action='store_true', help="Remove previously seeded data first.")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            benchmark.clear()
+        started = time.perf_counter()
+        counts = benchmark.seed(
+            users=options['users'], startups=options['startups'], investments=options['investments'],
+            watchlists=options['watchlists'], documents=options['documents'],
+            newsletters=options['newsletters'], seed_value=options['seed'],
+        )
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary} in {elapsed:.1f}s."))
+        self.stdout.write(f"Log in as {benchmark.BENCHMARK_PREFIX}0 / {benchmark.BENCHMARK_PASSWORD}")
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import BATCH_SIZE, send_queued
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbound email over a reused connection, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--rate', type=float, default=None, help="Maximum messages per second.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Exit once no email is due instead of polling.")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                sent, failed = send_queued(options['batch_size'], options['rate'])
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent}, failed {failed}.")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Outbound email queue drained." if options['once'] else "Stopped."))
@@ -0,0 +1,33 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.digest import DIGEST_CHUNK_SIZE, run_weekly_digest
+
+
+class Command(BaseCommand):
+    help = "Queue the weekly portfolio digest for opted-in users, resuming from the last checkpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--week', help="Monday of the week to summarize (YYYY-MM-DD); defaults to last week.")
+        parser.add_argument('--chunk-size', type=int, default=DIGEST_CHUNK_SIZE)
+        parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and start from the first user.")
+
+    def handle(self, *args, **options):
+        week_start = None
+        if options['week']:
+            try:
+                week_start = datetime.date.fromisoformat(options['week'])
+            except ValueError:
+                raise CommandError("--week must be a date in YYYY-MM-DD format.")
+            if week_start.weekday() != 0:
+                raise CommandError("--week must be a Monday.")
+
+        started = time.perf_counter()
+        run = run_weekly_digest(week_start, options['chunk_size'], options['restart'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Digest for week of {run.week_start}: {run.queued_count} emails queued in total, "
+            f"this run took {elapsed:.1f}s."
+        ))
@@ -0,0 +1,46 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importers import IMAGE_WORKERS, IMPORT_CHUNK_SIZE, import_startups
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert or update startups from a CSV file, matching on normalized name and website "
+        "(name,description,industry,founder,founded_date[,contact_email,website,image])."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file to import, or - for stdin.")
+        parser.add_argument(
+            '--image-root', help="Directory the image column paths are relative to; images are skipped without it.",
+        )
+        parser.add_argument('--workers', type=int, default=IMAGE_WORKERS, help="Image processing threads.")
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        kwargs = {
+            'image_root': options['image_root'], 'workers': options['workers'],
+            'chunk_size': options['chunk_size'],
+        }
+        if options['path'] == '-':
+            result = import_startups(sys.stdin, **kwargs)
+        else:
+            try:
+                stream = open(options['path'], newline='', encoding='utf-8-sig', errors='surrogateescape')
+            except OSError as exc:
+                raise CommandError(exc)
+            with stream:
+                result = import_startups(stream, **kwargs)
+
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"... {result.error_count - len(result.errors)} more errors")
+        style = self.style.SUCCESS if not result.error_count else self.style.WARNING
+        self.stdout.write(style(
+            f"Created {result.created}, updated {result.updated} and attached {result.images} images "
+            f"from {result.rows} rows ({result.error_count} errors) "
+            f"in {result.elapsed:.2f}s, {result.rows_per_second:.0f} rows/sec."
+        ))
@@ -0,0 +1,135 @@
+"""
+Middleware for the Investment Management System.
+"""
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+from .instrumentation import QueryRecorder, RequestSample, registry
+from .routers import use_primary, use_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+PRIMARY_PIN_COOKIE = 'primary_pin'
+# Registry name for requests that matched no URL pattern; recording them by
+# path would add a bucket for every URL a scanner tries.
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record query count, SQL time, duplicate queries and template render time
+    for every request.
+
+    Results are reported in a ``Server-Timing`` header and aggregated per URL
+    name in ``core.instrumentation.registry``, with every request that matched
+    no URL pattern under ``UNRESOLVED_VIEW``. Queries run while a streaming
+    response is being consumed happen after the middleware returns and are
+    not counted. Disable with ``QUERY_INSTRUMENTATION = False``.
+
+    Under ASGI the middleware runs natively async, so async views (such as
+    the event stream) are not pushed onto a thread per request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        request._template_timing = [0.0, 0.0]
+        started = time.perf_counter()
+        with self._wrap_connections(recorder):
+            response = self.get_response(request)
+        return self._finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        request._template_timing = [0.0, 0.0]
+        started = time.perf_counter()
+        # Database access from async code runs in the request's thread-sensitive
+        # executor thread, whose connections are not the event loop thread's;
+        # install and remove the wrappers there.
+        stack = await sync_to_async(self._wrap_connections)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._finish(request, response, recorder, started)
+
+    def _wrap_connections(self, recorder):
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(recorder))
+        return stack
+
+    def _finish(self, request, response, recorder, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        template_started, template_ended = request._template_timing
+        template_ms = max(template_ended - template_started, 0) * 1000
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={recorder.duration:.2f};desc="{recorder.count} queries"',
+            f'tpl;dur={template_ms:.2f}',
+            f'total;dur={total_ms:.2f}',
+        ])
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match else UNRESOLVED_VIEW
+        registry.record(name, RequestSample(
+            total_ms=total_ms, sql_ms=recorder.duration, queries=recorder.count,
+            template_ms=template_ms, duplicates=recorder.duplicates,
+        ))
+        return response
+
+    def process_template_response(self, request, response):
+        # Called just before the response is rendered; the callback fires after.
+        timing = request._template_timing
+        timing[0] = time.perf_counter()
+
+        def rendered(response):
+            timing[1] = time.perf_counter()
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Serve the reads of the views named in ``REPLICA_ROUTES`` from a replica.
+
+    A client that just sent an unsafe request is pinned to the primary for
+    ``REPLICA_PIN_SECONDS`` by a cookie, so replication lag can't hide its
+    own change on the page it is redirected to. Not used without
+    ``DATABASE_REPLICAS``.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'DATABASE_REPLICAS', None):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_request(self, request):
+        use_primary()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method in SAFE_METHODS and PRIMARY_PIN_COOKIE not in request.COOKIES
+                and request.resolver_match.url_name in settings.REPLICA_ROUTES):
+            use_replica()
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
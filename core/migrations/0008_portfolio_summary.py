@@ -0,0 +1,88 @@
+# Generated by Django 5.0.2 on 2026-10-18 14:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_portfolio_summaries(apps, schema_editor):
+    Investment = apps.get_model('core', 'Investment')
+    PortfolioSummary = apps.get_model('core', 'PortfolioSummary')
+    PortfolioPosition = apps.get_model('core', 'PortfolioPosition')
+    PortfolioStageTotal = apps.get_model('core', 'PortfolioStageTotal')
+
+    summaries = {}
+    positions = []
+    for row in Investment.objects.values('investor_id', 'startup_id').annotate(total=Sum('amount'), count=Count('id')).order_by():
+        positions.append(PortfolioPosition(
+            investor_id=row['investor_id'], startup_id=row['startup_id'],
+            total_amount=row['total'], investment_count=row['count'],
+        ))
+        summary = summaries.setdefault(row['investor_id'], PortfolioSummary(investor_id=row['investor_id']))
+        summary.total_amount += row['total']
+        summary.investment_count += row['count']
+        summary.startup_count += 1
+    stages = [
+        PortfolioStageTotal(
+            investor_id=row['investor_id'], stage=row['stage'],
+            total_amount=row['total'], investment_count=row['count'],
+        )
+        for row in Investment.objects.values('investor_id', 'stage').annotate(total=Sum('amount'), count=Count('id')).order_by()
+    ]
+    PortfolioPosition.objects.bulk_create(positions, batch_size=1000)
+    PortfolioStageTotal.objects.bulk_create(stages, batch_size=1000)
+    PortfolioSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_newsletter_alter_userprofile_currency_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('investment_count', models.IntegerField(default=0)),
+                ('startup_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('investor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='portfolio_summary', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Portfolio Summary',
+                'verbose_name_plural': 'Portfolio Summaries',
+            },
+        ),
+        migrations.CreateModel(
+            name='PortfolioPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('investment_count', models.IntegerField(default=0)),
+                ('investor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='portfolio_positions', to=settings.AUTH_USER_MODEL)),
+                ('startup', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='portfolio_positions', to='core.startup')),
+            ],
+            options={
+                'unique_together': {('investor', 'startup')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PortfolioStageTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(choices=[('Seed', 'Seed'), ('Series A', 'Series A'), ('Series B', 'Series B'), ('Series C', 'Series C'), ('IPO', 'IPO')], max_length=20)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('investment_count', models.IntegerField(default=0)),
+                ('investor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='portfolio_stages', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('investor', 'stage')},
+            },
+        ),
+        migrations.RunPython(backfill_portfolio_summaries, migrations.RunPython.noop),
+    ]
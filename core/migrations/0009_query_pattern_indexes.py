@@ -0,0 +1,60 @@
+# Generated by Django 5.0.2 on 2026-10-18 14:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_portfolio_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='newsletter',
+            name='is_active',
+            field=models.BooleanField(db_index=True, default=True, help_text='Subscription status'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['uploaded_at', 'id'], name='doc_uploaded_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['uploaded_by', '-uploaded_at'], name='doc_uploader_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investment',
+            index=models.Index(fields=['investor', '-date'], name='inv_investor_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investment',
+            index=models.Index(fields=['date', 'id'], name='inv_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investment',
+            index=models.Index(fields=['amount', 'id'], name='inv_amount_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investment',
+            index=models.Index(fields=['stage', 'date'], name='inv_stage_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investment',
+            index=models.Index(fields=['startup', 'amount'], name='inv_startup_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='startup',
+            index=models.Index(fields=['created_at', 'id'], name='startup_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='startup',
+            index=models.Index(fields=['name', 'id'], name='startup_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='startup',
+            index=models.Index(fields=['industry'], name='startup_industry_idx'),
+        ),
+    ]
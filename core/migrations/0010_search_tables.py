@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def create_search_tables(apps, schema_editor):
+    from core.search import create_search_tables
+    create_search_tables(schema_editor.connection, get_model=apps.get_model)
+
+
+def drop_search_tables(apps, schema_editor):
+    from core.search import drop_search_tables
+    drop_search_tables(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-18 14:33
+
+from django.db import migrations, models
+
+from core.dedupe import startup_dedupe_key
+
+
+def backfill_dedupe_keys(apps, schema_editor):
+    # Existing duplicates keep a NULL key; the oldest row of each group owns it.
+    Startup = apps.get_model('core', 'Startup')
+    seen = set()
+    batch = []
+    for startup in Startup.objects.order_by('pk').only('pk', 'name', 'website').iterator(chunk_size=2000):
+        key = startup_dedupe_key(startup.name, startup.website)
+        if key in seen:
+            continue
+        seen.add(key)
+        startup.dedupe_key = key
+        batch.append(startup)
+        if len(batch) >= 2000:
+            Startup.objects.bulk_update(batch, ['dedupe_key'])
+            batch = []
+    Startup.objects.bulk_update(batch, ['dedupe_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_search_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='startup',
+            name='dedupe_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_dedupe_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='startup',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+from core.downloads import file_sha256
+
+
+def backfill_hashes(apps, schema_editor):
+    # Files that are missing are left blank; the download view retries them.
+    Document = apps.get_model('core', 'Document')
+    for document in Document.objects.filter(sha256='').only('pk', 'file').iterator(chunk_size=500):
+        try:
+            with document.file.open('rb'):
+                document.sha256 = file_sha256(document.file)
+            document.size = document.file.size
+        except (FileNotFoundError, ValueError):
+            continue
+        document.save(update_fields=['sha256', 'size'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_startup_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='size',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.2 on 2026-10-18 15:29
+
+import posixpath
+
+import core.models
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_filenames_and_blobs(apps, schema_editor):
+    # Existing files stay where they are, each counted as a blob of its own
+    # name, until `manage.py dedupe_documents` moves them.
+    Document = apps.get_model('core', 'Document')
+    DocumentBlob = apps.get_model('core', 'DocumentBlob')
+    for pk, name in list(Document.objects.exclude(file='').values_list('pk', 'file')):
+        Document.objects.filter(pk=pk).update(filename=posixpath.basename(name))
+    counts = (
+        Document.objects.exclude(file='').values('file')
+        .annotate(references=Count('pk'), size=Max('size')).order_by()
+    )
+    DocumentBlob.objects.bulk_create([
+        DocumentBlob(name=row['file'], size=row['size'], references=row['references']) for row in counts
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_upload_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField(blank=True, null=True)),
+                ('references', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='filename',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='file',
+            field=models.FileField(storage=core.models.document_file_storage, upload_to='documents/'),
+        ),
+        migrations.RunPython(backfill_filenames_and_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-18 15:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def rebuild_search_tables(apps, schema_editor):
+    # The document table gains the extracted text column.
+    from core.search import create_search_tables
+    create_search_tables(schema_editor.connection, get_model=apps.get_model, rebuild=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_document_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentText',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='text', serialize=False, to='core.document')),
+                ('status', models.CharField(choices=[('done', 'Done'), ('skipped', 'Skipped'), ('failed', 'Failed')], max_length=10)),
+                ('content', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('source', models.CharField(max_length=255)),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(rebuild_search_tables, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,23 @@
 """
 Database models for the Investment Management System.
 """
+import posixpath
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.core.files.storage import storages
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
+from .dedupe import startup_dedupe_key
+from .downloads import file_sha256
+
 class Startup(models.Model):
     name = models.CharField(max_length=255)
     image = models.ImageField(upload_to='startups/', blank=True, null=True)
+    # Downscaled copies of image; see core.images.
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField()
     industry = models.CharField(max_length=100)
     founder = models.CharField(max_length=255)
@@ -15,10 +26,53 @@ class Startup(models.Model):
 
     contact_email = models.EmailField(blank=True, null=True)
     website = models.URLField(blank=True, null=True)
+    # Normalized name + website host; see core.dedupe.
+    dedupe_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # StartupListView / StartupsReportView keyset ordering.
+            models.Index(fields=['created_at', 'id'], name='startup_created_id_idx'),
+            models.Index(fields=['name', 'id'], name='startup_name_id_idx'),
+            # StartupsReportView industry filter and grouping.
+            models.Index(fields=['industry'], name='startup_industry_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def is_legacy_duplicate(self):
+        """
+        A saved row without a key: a duplicate from before dedupe keys, left
+        keyless by migration 0011 so the oldest row of its group keeps the key.
+        """
+        return self.pk is not None and self.dedupe_key is None
+
+    def find_duplicate(self):
+        """The other startup with this one's normalized name and website, if any."""
+        key = startup_dedupe_key(self.name, self.website)
+        return Startup.objects.filter(dedupe_key=key).exclude(pk=self.pk).first()
+
+    def validate_unique(self, exclude=None):
+        # Runs in every ModelForm (StartupForm and the admin), which would
+        # otherwise reach the dedupe_key unique constraint as an IntegrityError.
+        super().validate_unique(exclude)
+        if exclude and {'name', 'website'} & set(exclude) or self.is_legacy_duplicate():
+            return
+        duplicate = self.find_duplicate()
+        if duplicate is not None:
+            raise ValidationError(f"{duplicate.name} is already listed with this name and website.")
+
+    def save(self, *args, **kwargs):
+        key = startup_dedupe_key(self.name, self.website)
+        if self.is_legacy_duplicate() and Startup.objects.filter(dedupe_key=key).exclude(pk=self.pk).exists():
+            key = None
+        self.dedupe_key = key
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'name', 'website'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'dedupe_key'}
+        super().save(*args, **kwargs)
+
 class Watchlist(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='watchlist')
     startup = models.ForeignKey(Startup, on_delete=models.CASCADE, related_name='watchlisted_by')
@@ -46,24 +100,97 @@ class Investment(models.Model):
     stage = models.CharField(max_length=20, choices=STAGE_CHOICES)
     equity_percentage = models.DecimalField(max_digits=5, decimal_places=2, help_text="Equity percentage owned")
 
+    class Meta:
+        indexes = [
+            # DashboardView recent investments: investor filter, newest first.
+            models.Index(fields=['investor', '-date'], name='inv_investor_date_idx'),
+            # InvestmentsReportView keyset ordering and date range filters.
+            models.Index(fields=['date', 'id'], name='inv_date_id_idx'),
+            models.Index(fields=['amount', 'id'], name='inv_amount_id_idx'),
+            # InvestmentsReportView stage filter combined with date range/order.
+            models.Index(fields=['stage', 'date'], name='inv_stage_date_idx'),
+            # Report summaries group by startup and sum amount.
+            models.Index(fields=['startup', 'amount'], name='inv_startup_amount_idx'),
+        ]
+
     def __str__(self):
         return f"{self.investor.username} - {self.startup.name} ({self.amount})"
 
 
+def document_file_storage():
+    # settings.STORAGES['documents']: content-addressed, see core.blobs.
+    return storages['documents']
+
+
 class Document(models.Model):
     """Simple Document model for uploads and downloads."""
     title = models.CharField(max_length=255)
-    file = models.FileField(upload_to='documents/')
+    file = models.FileField(upload_to='documents/', storage=document_file_storage)
+    # Name the file was uploaded under; file.name is its content hash.
+    filename = models.CharField(max_length=255, blank=True, editable=False)
     description = models.TextField(blank=True, null=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='documents')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # Hex SHA-256 and byte size of file, recorded on upload; the download ETag.
+    sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    size = models.BigIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            # DocumentsListView keyset ordering.
+            models.Index(fields=['uploaded_at', 'id'], name='doc_uploaded_id_idx'),
+            # MyDocumentsView: uploader filter, newest first.
+            models.Index(fields=['uploaded_by', '-uploaded_at'], name='doc_uploader_uploaded_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            # A new upload, still in memory or a temporary file.
+            self.sha256 = file_sha256(self.file)
+            self.size = self.file.size
+            self.filename = posixpath.basename(self.file.name)
+            # Spares the storage hashing the file again.
+            self.file.file.sha256 = self.sha256
+        super().save(*args, **kwargs)
+
+
+class DocumentBlob(models.Model):
+    """A stored document file and how many documents use it, maintained by Document signals."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(null=True, blank=True)
+    references = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.references})"
+
+
+class DocumentText(models.Model):
+    """Plain text extracted from a document's file for search, by ``extract_document_text``."""
+    STATUS_DONE = 'done'
+    STATUS_SKIPPED = 'skipped'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_DONE, 'Done'),
+        (STATUS_SKIPPED, 'Skipped'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, primary_key=True, related_name='text')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    content = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    # Document.file the text came from; another file needs extracting again.
+    source = models.CharField(max_length=255)
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.document_id}: {self.status}"
+
 
 class UserProfile(models.Model):
     """User profile model to store user preferences and settings."""
@@ -109,7 +236,7 @@ class Newsletter(models.Model):
     """Newsletter subscription model."""
     email = models.EmailField(unique=True, help_text="Subscriber email address")
     subscribed_at = models.DateTimeField(auto_now_add=True)
-    is_active = models.BooleanField(default=True, help_text="Subscription status")
+    is_active = models.BooleanField(default=True, help_text="Subscription status", db_index=True)
     
     def __str__(self):
         return self.email
@@ -119,3 +246,152 @@ class Newsletter(models.Model):
         verbose_name_plural = "Newsletter Subscriptions"
         ordering = ['-subscribed_at']
 
+
+
+class PortfolioSummary(models.Model):
+    """Materialized per-investor portfolio totals, maintained by Investment signals."""
+    investor = models.OneToOneField(User, on_delete=models.CASCADE, related_name='portfolio_summary')
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    investment_count = models.IntegerField(default=0)
+    startup_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.investor.username}'s Portfolio Summary"
+
+    class Meta:
+        verbose_name = "Portfolio Summary"
+        verbose_name_plural = "Portfolio Summaries"
+
+
+class PortfolioPosition(models.Model):
+    """Per-investor, per-startup slice of a PortfolioSummary."""
+    investor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='portfolio_positions')
+    startup = models.ForeignKey(Startup, on_delete=models.CASCADE, related_name='portfolio_positions')
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    investment_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('investor', 'startup')
+
+    def __str__(self):
+        return f"{self.investor_id} - {self.startup_id} ({self.total_amount})"
+
+
+class PortfolioStageTotal(models.Model):
+    """Per-investor, per-stage slice of a PortfolioSummary."""
+    investor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='portfolio_stages')
+    stage = models.CharField(max_length=20, choices=Investment.STAGE_CHOICES)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    investment_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('investor', 'stage')
+
+    def __str__(self):
+        return f"{self.investor_id} - {self.stage} ({self.total_amount})"
+
+
+class OutboundEmail(models.Model):
+    """Queued outgoing email, delivered by the ``send_queued_email`` worker."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    to = models.TextField(help_text="Comma-separated recipient addresses")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest next delivery attempt; for rows being sent, when the claim expires.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker claim query: due rows by status, oldest first.
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
+
+    @property
+    def recipients(self):
+        return [address.strip() for address in self.to.split(',') if address.strip()]
+
+
+class DigestRun(models.Model):
+    """Checkpoint of one weekly digest batch run, so a crashed run can resume."""
+    week_start = models.DateField(unique=True)
+    last_user_id = models.IntegerField(default=0, help_text="Highest user id already processed")
+    queued_count = models.IntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Digest for week of {self.week_start}"
+
+
+class Notification(models.Model):
+    """Feed entry for one user, fanned out to watchers by ``core.notifications``."""
+    KIND_STARTUP_UPDATED = 'startup_updated'
+    KIND_INVESTMENT = 'investment'
+    KIND_CHOICES = [
+        (KIND_STARTUP_UPDATED, 'Startup updated'),
+        (KIND_INVESTMENT, 'New investment'),
+    ]
+
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    startup = models.ForeignKey(Startup, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications')
+    message = models.CharField(max_length=255)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # NotificationsView keyset feed, newest first.
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notif_feed_idx'),
+            # Unread counter.
+            models.Index(fields=['recipient', 'is_read'], name='notif_unread_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient_id}: {self.message}"
+
+
+class UploadSession(models.Model):
+    """A resumable chunked document upload in progress; see ``core.uploads``."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    # Bytes stored so far: the offset the next chunk must start at.
+    received = models.BigIntegerField(default=0)
+    # Checksum the client announced, verified on finish; optional.
+    expected_sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # clean_stale_uploads.
+            models.Index(fields=['updated_at'], name='upload_session_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
@@ -0,0 +1,107 @@
+"""
+Watchlist notification fan-out and unread counters.
+
+Events on a startup are written once per watching user at the time they
+happen (fan-out on write), with one ``bulk_create`` per event, so reading a
+feed is a single indexed range scan. Users who turned off
+``UserProfile.push_watchlist`` and the user who caused the event are left
+out.
+
+Unread counts are cached per user and dropped whenever that user's
+notifications change, so the count is only recomputed after a change
+rather than on every page. New notifications are also pushed to the
+recipients' open event streams (``core.events``).
+"""
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+
+from . import events
+from .models import Notification, Watchlist
+
+FANOUT_BATCH_SIZE = 1000
+UNREAD_TIMEOUT = 60 * 60 * 24
+
+_UNREAD_KEY = 'notifications:unread:{}'
+
+
+def _watchers(startup_ids, exclude_user_id=None):
+    """(user id, startup id) pairs of opted-in watchers of ``startup_ids``."""
+    watchers = Watchlist.objects.filter(startup_id__in=startup_ids).filter(
+        # Profiles are created lazily; no profile means the default (on).
+        Q(user__profile__isnull=True) | Q(user__profile__push_watchlist=True)
+    )
+    if exclude_user_id is not None:
+        watchers = watchers.exclude(user_id=exclude_user_id)
+    return watchers.values_list('user_id', 'startup_id')
+
+
+def _invalidate_unread(user_ids):
+    keys = [_UNREAD_KEY.format(user_id) for user_id in user_ids]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    if connection.in_atomic_block:
+        # A reader may cache the pre-commit count in between; drop it again.
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def fan_out(kind, messages, exclude_user_id=None):
+    """
+    Notify the watchers of each startup in ``messages`` ({startup id: text}).
+
+    Returns the number of notifications written.
+    """
+    rows = [
+        Notification(recipient_id=user_id, startup_id=startup_id, kind=kind, message=messages[startup_id])
+        for user_id, startup_id in _watchers(list(messages), exclude_user_id).iterator(chunk_size=FANOUT_BATCH_SIZE)
+    ]
+    Notification.objects.bulk_create(rows, batch_size=FANOUT_BATCH_SIZE)
+    _invalidate_unread({row.recipient_id for row in rows})
+    events.publish_notifications(rows)
+    return len(rows)
+
+
+def notify_startup_updated(startup, actor=None):
+    return fan_out(
+        Notification.KIND_STARTUP_UPDATED, {startup.pk: f"{startup.name} updated its profile."},
+        exclude_user_id=getattr(actor, 'pk', None),
+    )
+
+
+def notify_new_investments(counts, actor_id=None):
+    """Notify watchers of new investments; ``counts`` maps startup id to (name, number of investments)."""
+    messages = {}
+    for startup_id, (name, count) in counts.items():
+        if count == 1:
+            messages[startup_id] = f"New investment in {name}."
+        else:
+            messages[startup_id] = f"{count} new investments in {name}."
+    return fan_out(Notification.KIND_INVESTMENT, messages, exclude_user_id=actor_id)
+
+
+def unread_count(user):
+    """Cached number of unread notifications for ``user``."""
+    key = _UNREAD_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient=user, is_read=False).count()
+        cache.set(key, count, UNREAD_TIMEOUT)
+    return count
+
+
+def mark_read(user, ids=None):
+    """Mark ``user``'s notifications in ``ids`` (default: all) as read."""
+    notifications = Notification.objects.filter(recipient=user, is_read=False)
+    if ids is not None:
+        notifications = notifications.filter(pk__in=ids)
+    updated = notifications.update(is_read=True)
+    _invalidate_unread([user.pk])
+    return updated
+
+
+def clear(user):
+    """Delete all of ``user``'s notifications."""
+    deleted, _ = Notification.objects.filter(recipient=user).delete()
+    _invalidate_unread([user.pk])
+    return deleted
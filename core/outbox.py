@@ -0,0 +1,147 @@
+"""
+Database-backed outbound email queue.
+
+Requests call ``queue_email()`` instead of ``send_mail()``, which only
+inserts an ``OutboundEmail`` row, so SMTP latency never reaches the response.
+``manage.py send_queued_email`` drains the queue with ``send_queued()``:
+it claims a batch of due rows, delivers them over one reused backend
+connection at a bounded rate and reschedules failures with exponential
+backoff until ``MAX_ATTEMPTS`` is reached.
+"""
+import datetime
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = datetime.timedelta(seconds=30)
+BACKOFF_MAX = datetime.timedelta(hours=1)
+# A claimed batch not finished within this window is picked up again.
+CLAIM_TIMEOUT = datetime.timedelta(minutes=10)
+
+
+def make_email(subject, body, to, from_email=None, html_body=''):
+    """Unsaved ``OutboundEmail`` to the ``to`` address (or list of addresses), for bulk queueing."""
+    if isinstance(to, str):
+        to = [to]
+    return OutboundEmail(
+        subject=subject, body=body, html_body=html_body or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL, to=', '.join(to),
+    )
+
+
+def queue_email(subject, body, to, from_email=None, html_body=''):
+    """Queue one message to the ``to`` address (or list of addresses)."""
+    email = make_email(subject, body, to, from_email, html_body)
+    email.save()
+    return email
+
+
+def backoff(attempts):
+    """Delay before retry number ``attempts`` (1-based)."""
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+def claim_batch(limit=BATCH_SIZE):
+    """
+    Mark up to ``limit`` due rows as sending and return them.
+
+    Rows locked by another worker are skipped on databases that support
+    ``SKIP LOCKED``; rows of a worker that died mid-batch become due again
+    once their claim expires.
+    """
+    now = timezone.now()
+    due = Q(status=OutboundEmail.STATUS_PENDING) | Q(status=OutboundEmail.STATUS_SENDING)
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(due, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')[:limit]
+        )
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            status=OutboundEmail.STATUS_SENDING, next_attempt_at=now + CLAIM_TIMEOUT,
+        )
+    return batch
+
+
+def _message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject, email.body, email.from_email, email.recipients, connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _failed(email, error):
+    email.attempts += 1
+    email.last_error = str(error)[:2000]
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = OutboundEmail.STATUS_FAILED
+    else:
+        email.status = OutboundEmail.STATUS_PENDING
+        email.next_attempt_at = timezone.now() + backoff(email.attempts)
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def _reconnect(connection):
+    # An SMTP error can leave the session unusable; start a fresh one so the
+    # rest of the batch still shares a single connection.
+    connection.close()
+    try:
+        connection.open()
+    except Exception:
+        pass
+
+
+def send_queued(batch_size=BATCH_SIZE, rate=None, connection=None):
+    """
+    Deliver one batch of due email and return (sent, failed) counts.
+
+    All messages go out over a single backend connection, opened once for
+    the batch. Each message is handed to ``send_messages`` on its own so a
+    rejected recipient only reschedules that message. ``rate`` caps
+    deliveries per second.
+    """
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:  # Backend errors are not a common exception type (smtplib, socket, ...).
+        for email in batch:
+            _failed(email, exc)
+        return 0, len(batch)
+
+    sent = failed = 0
+    started = time.monotonic()
+    try:
+        for index, email in enumerate(batch):
+            if rate:
+                delay = started + index / rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            try:
+                connection.send_messages([_message(email, connection)])
+            except Exception as exc:
+                _failed(email, exc)
+                failed += 1
+                _reconnect(connection)
+                continue
+            email.status = OutboundEmail.STATUS_SENT
+            email.attempts += 1
+            email.sent_at = timezone.now()
+            email.last_error = ''
+            email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+            sent += 1
+    finally:
+        connection.close()
+    return sent, failed
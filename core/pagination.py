@@ -0,0 +1,190 @@
+"""
+Keyset (cursor) pagination for list and report views.
+
+Pages are addressed by an opaque token holding the ordering key of the row at
+the edge of the previous page, so fetching any page is a single indexed range
+scan of ``per_page + 1`` rows rather than an OFFSET that grows with the page
+number.
+"""
+import base64
+import binascii
+import json
+import datetime
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+CURSOR_PARAM = 'cursor'
+
+
+@dataclass
+class KeysetPage:
+    """One page of results plus the tokens/URLs for its neighbours."""
+    object_list: list
+    has_next: bool = False
+    has_previous: bool = False
+    next_token: str = ''
+    previous_token: str = ''
+    next_url: str = ''
+    previous_url: str = ''
+    per_page: int = 25
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def _serialize(value):
+    # Full-precision isoformat: DjangoJSONEncoder would drop microseconds.
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _encode_token(values, direction):
+    raw = json.dumps({'k': [_serialize(v) for v in values], 'd': direction})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_token(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return data['k'], data['d']
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None, None
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` over ``ordering`` (e.g. ``['-date']``).
+
+    The primary key is appended to the ordering so the key is unique and the
+    order stable; pass ``unique=True`` when the ordering is already unique,
+    e.g. an annotation holding the primary key. Ordering fields must be
+    non-null concrete fields of the queryset's model or numeric annotations.
+    """
+
+    def __init__(self, queryset, ordering, per_page=25, unique=False):
+        self.model = queryset.model
+        pk_name = self.model._meta.pk.name
+        ordering = list(ordering)
+        if not unique and not any(o.lstrip('-') in (pk_name, 'pk') for o in ordering):
+            ordering.append(('-' if ordering and ordering[0].startswith('-') else '') + pk_name)
+        self.ordering = ordering
+        self.fields = [o.lstrip('-') for o in ordering]
+        self.descending = [o.startswith('-') for o in ordering]
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = per_page
+
+    def _key(self, obj):
+        return [getattr(obj, name) for name in self.fields]
+
+    def _parse_key(self, values):
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            return None
+        key = []
+        for name, value in zip(self.fields, values):
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Annotation such as search_rank; JSON already restored it.
+                key.append(value)
+                continue
+            try:
+                key.append(field.to_python(value))
+            except ValidationError:
+                return None
+        return key
+
+    def _after(self, key, reverse=False):
+        """Q matching rows strictly after ``key`` in the (optionally reversed) ordering."""
+        condition = Q()
+        for i in range(len(self.fields) - 1, -1, -1):
+            descending = self.descending[i] != reverse
+            lookup = 'lt' if descending else 'gt'
+            step = Q(**{f'{self.fields[i]}__{lookup}': key[i]})
+            if i < len(self.fields) - 1:
+                step |= Q(**{self.fields[i]: key[i]}) & condition
+            condition = step
+        return condition
+
+    def _plan(self, token):
+        """(queryset slice to fetch, key, direction) for ``token``."""
+        values, direction = _decode_token(token) if token else (None, None)
+        key = self._parse_key(values) if values is not None else None
+        if key is not None and direction == 'p':
+            reversed_ordering = [o[1:] if o.startswith('-') else '-' + o for o in self.ordering]
+            qs = self.queryset.filter(self._after(key, reverse=True)).order_by(*reversed_ordering)
+            return qs[:self.per_page + 1], key, direction
+        qs = self.queryset
+        if key is not None:
+            qs = qs.filter(self._after(key))
+        return qs[:self.per_page + 1], key, direction
+
+    def _build(self, rows, key, direction):
+        if key is not None and direction == 'p':
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = key is not None
+
+        page = KeysetPage(object_list=rows, per_page=self.per_page)
+        if rows:
+            page.has_next = has_next
+            page.has_previous = has_previous
+            if has_next:
+                page.next_token = _encode_token(self._key(rows[-1]), 'n')
+            if has_previous:
+                page.previous_token = _encode_token(self._key(rows[0]), 'p')
+        return page
+
+    def page(self, token=None):
+        """Return the KeysetPage addressed by ``token`` (first page when empty/invalid)."""
+        qs, key, direction = self._plan(token)
+        return self._build(list(qs), key, direction)
+
+    async def apage(self, token=None):
+        """Async ``page()``."""
+        qs, key, direction = self._plan(token)
+        return self._build([obj async for obj in qs], key, direction)
+
+
+def _add_urls(request, page):
+    for attr in ('next', 'previous'):
+        token = getattr(page, f'{attr}_token')
+        if token:
+            params = request.GET.copy()
+            params.pop('export', None)
+            params[CURSOR_PARAM] = token
+            setattr(page, f'{attr}_url', f'?{params.urlencode()}')
+    return page
+
+
+def paginate_keyset(request, queryset, ordering, per_page=25, unique=False):
+    """
+    Paginate ``queryset`` using the ``cursor`` query parameter of ``request``.
+
+    The returned page carries next/previous URLs that keep every other query
+    parameter (filters, ordering) intact.
+    """
+    paginator = KeysetPaginator(queryset, ordering, per_page=per_page, unique=unique)
+    return _add_urls(request, paginator.page(request.GET.get(CURSOR_PARAM, '')))
+
+
+async def apaginate_keyset(request, queryset, ordering, per_page=25, unique=False):
+    """Async ``paginate_keyset()``."""
+    paginator = KeysetPaginator(queryset, ordering, per_page=per_page, unique=unique)
+    return _add_urls(request, await paginator.apage(request.GET.get(CURSOR_PARAM, '')))
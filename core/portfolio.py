@@ -0,0 +1,111 @@
+"""
+Incremental maintenance of the materialized portfolio tables.
+
+Every Investment write is turned into a signed delta that is applied to the
+investor's PortfolioSummary, PortfolioPosition and PortfolioStageTotal rows
+with F() expressions, so readers can fetch totals without scanning Investment.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import Investment, PortfolioPosition, PortfolioStageTotal, PortfolioSummary
+
+
+def apply_investment_delta(investor_id, startup_id, stage, amount, sign):
+    """Add (sign=1) or remove (sign=-1) one investment from the aggregates."""
+    amount = Decimal(amount) * sign
+    with transaction.atomic():
+        if sign > 0:
+            PortfolioSummary.objects.get_or_create(investor_id=investor_id)
+            PortfolioPosition.objects.get_or_create(investor_id=investor_id, startup_id=startup_id)
+            PortfolioStageTotal.objects.get_or_create(investor_id=investor_id, stage=stage)
+
+        PortfolioPosition.objects.filter(investor_id=investor_id, startup_id=startup_id).update(
+            total_amount=F('total_amount') + amount,
+            investment_count=F('investment_count') + sign,
+        )
+        PortfolioStageTotal.objects.filter(investor_id=investor_id, stage=stage).update(
+            total_amount=F('total_amount') + amount,
+            investment_count=F('investment_count') + sign,
+        )
+
+        # Drop slices that no longer hold any investment.
+        PortfolioPosition.objects.filter(
+            investor_id=investor_id, startup_id=startup_id, investment_count__lte=0
+        ).delete()
+        PortfolioStageTotal.objects.filter(
+            investor_id=investor_id, stage=stage, investment_count__lte=0
+        ).delete()
+
+        PortfolioSummary.objects.filter(investor_id=investor_id).update(
+            total_amount=F('total_amount') + amount,
+            investment_count=F('investment_count') + sign,
+            # Positions may also vanish through a Startup cascade, so count them.
+            startup_count=PortfolioPosition.objects.filter(investor_id=investor_id).count(),
+        )
+
+
+def get_portfolio_summary(user):
+    """Return the user's PortfolioSummary, or an unsaved empty one."""
+    try:
+        return PortfolioSummary.objects.get(investor=user)
+    except PortfolioSummary.DoesNotExist:
+        return PortfolioSummary(investor=user)
+
+
+def rebuild_portfolio_summaries(investor_ids=None):
+    """
+    Recompute the portfolio tables from Investment with grouped queries.
+
+    Rebuilds every investor when ``investor_ids`` is None, otherwise only the
+    given investors. Returns the number of summaries written.
+    """
+    investments = Investment.objects.all()
+    summaries = PortfolioSummary.objects.all()
+    positions = PortfolioPosition.objects.all()
+    stages = PortfolioStageTotal.objects.all()
+    if investor_ids is not None:
+        investor_ids = list(investor_ids)
+        investments = investments.filter(investor_id__in=investor_ids)
+        summaries = summaries.filter(investor_id__in=investor_ids)
+        positions = positions.filter(investor_id__in=investor_ids)
+        stages = stages.filter(investor_id__in=investor_ids)
+
+    with transaction.atomic():
+        summaries.delete()
+        positions.delete()
+        stages.delete()
+
+        position_rows = investments.values('investor_id', 'startup_id').annotate(
+            total=Sum('amount'), count=Count('id')
+        ).order_by()
+        stage_rows = investments.values('investor_id', 'stage').annotate(
+            total=Sum('amount'), count=Count('id')
+        ).order_by()
+
+        new_positions = []
+        totals = {}
+        for row in position_rows.iterator():
+            new_positions.append(PortfolioPosition(
+                investor_id=row['investor_id'], startup_id=row['startup_id'],
+                total_amount=row['total'], investment_count=row['count'],
+            ))
+            summary = totals.setdefault(row['investor_id'], PortfolioSummary(investor_id=row['investor_id']))
+            summary.total_amount += row['total']
+            summary.investment_count += row['count']
+            summary.startup_count += 1
+
+        new_stages = [
+            PortfolioStageTotal(
+                investor_id=row['investor_id'], stage=row['stage'],
+                total_amount=row['total'], investment_count=row['count'],
+            )
+            for row in stage_rows.iterator()
+        ]
+
+        PortfolioPosition.objects.bulk_create(new_positions, batch_size=1000)
+        PortfolioStageTotal.objects.bulk_create(new_stages, batch_size=1000)
+        PortfolioSummary.objects.bulk_create(totals.values(), batch_size=1000)
+    return len(totals)
@@ -0,0 +1,55 @@
+"""
+Single-pass summary statistics for the report views.
+
+Each summary issues one grouped query and folds the groups in Python, instead
+of separate count()/distinct()/aggregate() round trips over the same filters.
+The ``a``-prefixed variants run the same query through the async ORM.
+"""
+import heapq
+from decimal import Decimal
+from operator import itemgetter
+
+from django.db.models import Count, Sum
+
+
+def _investment_groups(qs):
+    return qs.order_by().values('startup_id', 'startup__name').annotate(total=Sum('amount'), count=Count('id'))
+
+
+def _investment_stats(rows, top):
+    return {
+        'total_investment': sum((row['total'] or 0 for row in rows), Decimal('0')),
+        'investments_count': sum(row['count'] for row in rows),
+        'distinct_startups': len(rows),
+        'top_startups': heapq.nlargest(top, rows, key=itemgetter('total')),
+    }
+
+
+def summarize_investments(qs, top=5):
+    """Return the investments report stats for an Investment queryset."""
+    return _investment_stats(list(_investment_groups(qs)), top)
+
+
+async def asummarize_investments(qs, top=5):
+    return _investment_stats([row async for row in _investment_groups(qs)], top)
+
+
+def _industry_groups(qs):
+    return qs.order_by().values('industry').annotate(count=Count('id'))
+
+
+def _startup_stats(groups, top):
+    return {
+        'total_startups': sum(row['count'] for row in groups),
+        'distinct_industries': len(groups),
+        'top_industries': heapq.nlargest(top, groups, key=itemgetter('count')),
+    }
+
+
+def summarize_startups(qs, top=6):
+    """Return the startups report stats for a Startup queryset."""
+    return _startup_stats(list(_industry_groups(qs)), top)
+
+
+async def asummarize_startups(qs, top=6):
+    return _startup_stats([row async for row in _industry_groups(qs)], top)
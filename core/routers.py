@@ -0,0 +1,80 @@
+"""
+Primary/replica database routing.
+
+Writes always go to the primary (``default``). Reads go to a replica only
+while replica reads are switched on for the current request or block (see
+``ReplicaRoutingMiddleware`` and ``replica_reads()``), and only until that
+request writes something or opens a transaction on the primary, so a request
+never reads older data than it has just written. One replica is picked per
+request, so all of its reads see the same snapshot.
+
+State lives in context variables, which follow a request through async views
+and ``sync_to_async`` calls.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+
+_replica = contextvars.ContextVar('replica', default=None)
+
+
+def use_replica():
+    """Route this context's reads to a randomly picked replica; returns its alias."""
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    alias = random.choice(replicas) if replicas else None
+    _replica.set(alias)
+    return alias
+
+
+def use_primary():
+    """Route this context's reads to the primary."""
+    _replica.set(None)
+
+
+@contextmanager
+def replica_reads():
+    """Read from a replica inside the block, e.g. in a management command."""
+    token = _replica.set(_replica.get())
+    use_replica()
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, then go back to the context's routing."""
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Read your own writes for the rest of the request.
+        use_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *getattr(settings, 'DATABASE_REPLICAS', [])}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema from the primary.
+        return db == PRIMARY
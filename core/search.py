@@ -0,0 +1,420 @@
+"""
+Full-text search over startups and documents.
+
+Each searchable model gets a side table keyed by the object's primary key:
+an FTS5 virtual table on SQLite, or a ``tsvector`` table with a GIN index on
+PostgreSQL. Signal handlers keep the side tables in sync, and ``search()``
+turns the search box text into a prefix query against them, optionally
+annotating each row with ``search_rank`` (lower is a better match);
+``count_matches()`` tells callers when there are too many rows to rank, and
+``newest_first()`` orders those cheaply instead.
+``snippets()`` returns highlighted excerpts of a field around the matches,
+for the rows of one results page. Other database vendors fall back to
+``icontains`` filters and no snippets.
+
+An indexed field may follow a relation (``text__content``); its column in
+the side table is named after the last part.
+"""
+import re
+from dataclasses import dataclass
+
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import connection, connections, router
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Document, Startup
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# FTS5 bm25() column weights mirroring the PostgreSQL setweight() labels.
+BM25_WEIGHTS = {'A': 10.0, 'B': 5.0, 'C': 2.0, 'D': 1.0}
+# Words per snippet, and the control characters that mark matches in raw
+# snippets until they are escaped and turned into <mark> tags.
+SNIPPET_WORDS = 24
+MARK_START, MARK_END = '\x02', '\x03'
+# Ranking costs a few microseconds per match, so a word found in most of a
+# large corpus takes hundreds of milliseconds to rank. Past this many
+# matches, lists skip ranking and show the newest matches first.
+RANK_LIMIT = 10000
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    """Fields of a model indexed for search, with their PostgreSQL weights."""
+    table: str
+    fields: tuple  # ((field_name, weight), ...) with weight in 'ABCD'
+
+    @property
+    def field_names(self):
+        return [name for name, _ in self.fields]
+
+    @property
+    def columns(self):
+        return [name.rsplit('__', 1)[-1] for name in self.field_names]
+
+    def column(self, field_name):
+        return self.columns[self.field_names.index(field_name)]
+
+
+SEARCH_INDEXES = {
+    Startup: SearchIndex('core_startup_search', (
+        ('name', 'A'), ('founder', 'B'), ('industry', 'B'), ('description', 'D'),
+    )),
+    Document: SearchIndex('core_document_search', (
+        ('title', 'A'), ('description', 'D'), ('text__content', 'D'),
+    )),
+}
+
+
+def _tokens(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SQLiteBackend:
+    """FTS5 virtual table whose rowid is the indexed object's primary key."""
+
+    def create(self, cursor, index):
+        # Two- and three-letter prefixes expand to thousands of words, whose
+        # position lists FTS5 would otherwise merge on every query.
+        columns = ', '.join(index.columns)
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {index.table} USING fts5("
+            f"{columns}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+
+    def drop(self, cursor, index):
+        cursor.execute(f'DROP TABLE IF EXISTS {index.table}')
+
+    def upsert(self, cursor, index, pk, values):
+        cursor.execute(f'DELETE FROM {index.table} WHERE rowid = %s', [pk])
+        placeholders = ', '.join(['%s'] * (len(values) + 1))
+        cursor.execute(
+            f"INSERT INTO {index.table} (rowid, {', '.join(index.columns)}) VALUES ({placeholders})",
+            [pk, *values],
+        )
+
+    def delete(self, cursor, index, pk):
+        cursor.execute(f'DELETE FROM {index.table} WHERE rowid = %s', [pk])
+
+    def build_query(self, index, tokens, fields):
+        query = ' '.join(f'"{token}"*' for token in tokens)
+        if fields:
+            query = f"{{{' '.join(index.column(name) for name in fields)}}} : ({query})"
+        return query
+
+    def match_sql(self, index):
+        return f'SELECT rowid FROM {index.table} WHERE {index.table} MATCH %s'
+
+    def matching(self, queryset, index, query, outer_pk):
+        # Joined rather than filtered by a subquery: SQLite would first
+        # collect every matching rowid, and bm25() only works in the query
+        # running the MATCH. A second search() on the same queryset falls
+        # back to the subquery, as the table can only be joined once.
+        if index.table in queryset.query.extra_tables:
+            return queryset.filter(pk__in=RawSQL(self.match_sql(index), [query]))
+        return queryset.extra(
+            tables=[index.table],
+            where=[f'{index.table}.rowid = {outer_pk}', f'{index.table} MATCH %s'],
+            params=[query],
+        )
+
+    def ranked(self, queryset, index, query, outer_pk):
+        weights = ', '.join(str(BM25_WEIGHTS[weight]) for _, weight in index.fields)
+        return self.matching(queryset, index, query, outer_pk).annotate(
+            search_rank=RawSQL(f'bm25({index.table}, {weights})', [], output_field=FloatField())
+        )
+
+    def newest_key(self, queryset, index):
+        # FTS5 returns matches in rowid order and applies rowid ranges itself,
+        # so ordering by the joined table's rowid reads only the page's rows.
+        if index.table not in queryset.query.extra_tables:
+            return F('pk')
+        return RawSQL(f'{index.table}.rowid', [])
+
+    def snippets(self, conn, model, index, query, field, pks):
+        column = index.field_names.index(field)
+        placeholders = ', '.join(['%s'] * len(pks))
+        # One pass over the matches between the smallest and largest pk:
+        # "rowid IN" would run the MATCH again for each pk, merging the
+        # terms of each prefix every time.
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({index.table}, {column}, %s, %s, '…', {SNIPPET_WORDS}) "
+                f"FROM {index.table} WHERE {index.table} MATCH %s AND rowid BETWEEN %s AND %s "
+                f"AND +rowid IN ({placeholders})",
+                [MARK_START, MARK_END, query, min(pks), max(pks), *pks],
+            )
+            return dict(cursor.fetchall())
+
+
+class PostgresBackend:
+    """tsvector side table with a GIN index, weighted per field."""
+
+    def create(self, cursor, index):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {index.table} '
+            f'(object_id bigint PRIMARY KEY, document tsvector NOT NULL)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index.table}_gin ON {index.table} USING GIN (document)'
+        )
+
+    def drop(self, cursor, index):
+        cursor.execute(f'DROP TABLE IF EXISTS {index.table}')
+
+    def upsert(self, cursor, index, pk, values):
+        vector = ' || '.join(
+            f"setweight(to_tsvector('simple', coalesce(%s, '')), '{weight}')" for _, weight in index.fields
+        )
+        cursor.execute(
+            f'INSERT INTO {index.table} (object_id, document) VALUES (%s, {vector}) '
+            f'ON CONFLICT (object_id) DO UPDATE SET document = EXCLUDED.document',
+            [pk, *values],
+        )
+
+    def delete(self, cursor, index, pk):
+        cursor.execute(f'DELETE FROM {index.table} WHERE object_id = %s', [pk])
+
+    def build_query(self, index, tokens, fields):
+        weights = ''
+        if fields:
+            weights = ''.join(sorted({weight for name, weight in index.fields if name in fields}))
+        return ' & '.join(f'{token}:*{weights}' for token in tokens)
+
+    def match_sql(self, index):
+        return f"SELECT object_id FROM {index.table} WHERE document @@ to_tsquery('simple', %s)"
+
+    def matching(self, queryset, index, query, outer_pk):
+        return queryset.filter(pk__in=RawSQL(self.match_sql(index), [query]))
+
+    def ranked(self, queryset, index, query, outer_pk):
+        rank_sql = (
+            f"SELECT -ts_rank(document, to_tsquery('simple', %s)) FROM {index.table} "
+            f'WHERE object_id = {outer_pk}'
+        )
+        return self.matching(queryset, index, query, outer_pk).annotate(
+            search_rank=RawSQL(rank_sql, [query], output_field=FloatField())
+        )
+
+    def newest_key(self, queryset, index):
+        return F('pk')
+
+    def snippets(self, conn, model, index, query, field, pks):
+        from django.contrib.postgres.search import SearchHeadline, SearchQuery
+
+        headline = SearchHeadline(
+            field, SearchQuery(query, search_type='raw', config='simple'), config='simple',
+            start_sel=MARK_START, stop_sel=MARK_END, max_words=SNIPPET_WORDS, min_words=SNIPPET_WORDS // 2,
+        )
+        rows = model._default_manager.using(conn.alias).filter(pk__in=pks).annotate(snippet=headline)
+        return dict(rows.values_list('pk', 'snippet'))
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend(),
+    'postgresql': PostgresBackend(),
+}
+
+
+def get_backend(conn=None):
+    """Return the search backend for ``conn`` (default connection), or None."""
+    return BACKENDS.get((conn or connection).vendor)
+
+
+def _value(instance, name):
+    for part in name.split('__'):
+        try:
+            instance = getattr(instance, part)
+        except ObjectDoesNotExist:
+            return ''
+        if instance is None:
+            return ''
+    return instance
+
+
+def _values(instance, index):
+    return [_value(instance, name) or '' for name in index.field_names]
+
+
+def _lookups(model, index):
+    """``values_list()`` arguments for the indexed fields; fields a historical model lacks index as ''."""
+    lookups = []
+    for name in index.field_names:
+        try:
+            model._meta.get_field(name.split('__')[0])
+        except FieldDoesNotExist:
+            lookups.append(Value(''))
+        else:
+            lookups.append(name)
+    return lookups
+
+
+def index_object(instance):
+    """Add or refresh ``instance`` in its model's search table."""
+    backend = get_backend()
+    index = SEARCH_INDEXES.get(type(instance))
+    if backend is None or index is None:
+        return
+    with connection.cursor() as cursor:
+        backend.upsert(cursor, index, instance.pk, _values(instance, index))
+
+
+def index_objects(model, pks):
+    """Add or refresh the ``model`` rows in ``pks``, e.g. after a bulk write."""
+    backend = get_backend()
+    index = SEARCH_INDEXES.get(model)
+    if backend is None or index is None:
+        return
+    rows = model._default_manager.filter(pk__in=list(pks)).values_list('pk', *index.field_names)
+    with connection.cursor() as cursor:
+        for pk, *values in rows.iterator(chunk_size=2000):
+            backend.upsert(cursor, index, pk, [value or '' for value in values])
+
+
+def unindex_object(instance):
+    """Remove ``instance`` from its model's search table."""
+    backend = get_backend()
+    index = SEARCH_INDEXES.get(type(instance))
+    if backend is None or index is None:
+        return
+    with connection.cursor() as cursor:
+        backend.delete(cursor, index, instance.pk)
+
+
+def create_search_tables(conn, get_model=None, rebuild=False):
+    """
+    Create the search tables on ``conn`` and index the existing rows.
+
+    Migrations pass ``apps.get_model`` so historical models are read instead
+    of the registered classes. Returns the number of rows indexed.
+    """
+    backend = get_backend(conn)
+    if backend is None:
+        return 0
+    indexed = 0
+    for registered, index in SEARCH_INDEXES.items():
+        source = registered
+        if get_model is not None:
+            source = get_model(registered._meta.app_label, registered.__name__)
+        with conn.cursor() as cursor:
+            if rebuild:
+                backend.drop(cursor, index)
+            backend.create(cursor, index)
+            rows = source._default_manager.using(conn.alias).values_list('pk', *_lookups(source, index))
+            for pk, *values in rows.iterator(chunk_size=2000):
+                backend.upsert(cursor, index, pk, [value or '' for value in values])
+                indexed += 1
+    return indexed
+
+
+def drop_search_tables(conn):
+    backend = get_backend(conn)
+    if backend is None:
+        return
+    with conn.cursor() as cursor:
+        for index in SEARCH_INDEXES.values():
+            backend.drop(cursor, index)
+
+
+def search(queryset, text, fields=None, rank=False):
+    """
+    Filter ``queryset`` to rows matching the search box ``text``.
+
+    Every word must match as a prefix. ``fields`` restricts the match to
+    some of the indexed fields. With ``rank=True`` rows are annotated with
+    ``search_rank`` so callers can ``order_by('search_rank')``.
+    """
+    index = SEARCH_INDEXES[queryset.model]
+    tokens = _tokens(text)
+    if not tokens:
+        queryset = queryset.none()
+        if rank:
+            queryset = queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+        return queryset
+    fields = list(fields or [])
+    conn = connections[queryset.db]
+    backend = get_backend(conn)
+
+    if backend is None:
+        condition = Q()
+        for token in tokens:
+            token_match = Q()
+            for name in fields or index.field_names:
+                token_match |= Q(**{f'{name}__icontains': token})
+            condition &= token_match
+        queryset = queryset.filter(condition)
+        if rank:
+            queryset = queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+        return queryset
+
+    query = backend.build_query(index, tokens, fields)
+    meta = queryset.model._meta
+    outer_pk = f'{conn.ops.quote_name(meta.db_table)}.{conn.ops.quote_name(meta.pk.column)}'
+    if rank:
+        return backend.ranked(queryset, index, query, outer_pk)
+    return backend.matching(queryset, index, query, outer_pk)
+
+
+def newest_first(queryset):
+    """
+    Annotate ``search()`` results with ``search_pk``, a copy of the primary key.
+
+    Order by ``-search_pk`` (a unique key) for the newest rows first without
+    ranking. On SQLite it is read from the search table, which then yields
+    the first page without collecting and sorting every match.
+    """
+    backend = get_backend(connections[queryset.db])
+    if backend is None:
+        return queryset.annotate(search_pk=F('pk'))
+    return queryset.annotate(search_pk=backend.newest_key(queryset, SEARCH_INDEXES[queryset.model]))
+
+
+def count_matches(model, text, fields=None, using=None):
+    """
+    The number of ``model`` rows matching ``text``, as ``search()`` finds them.
+
+    Counted in the search table alone, which is cheaper than counting the
+    filtered queryset when a word is in most rows. None without a search
+    backend.
+    """
+    index = SEARCH_INDEXES[model]
+    tokens = _tokens(text)
+    conn = connections[using or router.db_for_read(model)]
+    backend = get_backend(conn)
+    if backend is None:
+        return None
+    if not tokens:
+        return 0
+    query = backend.build_query(index, tokens, list(fields or []))
+    with conn.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM ({backend.match_sql(index)}) matches', [query])
+        return cursor.fetchone()[0]
+
+
+def _highlight(raw):
+    text = escape(' '.join(raw.split()))
+    return mark_safe(text.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+def snippets(model, pks, text, field, fields=None, using=None):
+    """
+    Highlighted excerpts of ``field`` for the ``model`` rows in ``pks``.
+
+    Pass the ``text`` and ``fields`` given to ``search()``. Returns
+    ``{pk: safe HTML}`` with the matching words in ``<mark>`` tags; rows
+    whose field is empty are left out. Meant for one page of results: the
+    excerpts are cut from the stored text, not from the index.
+    """
+    index = SEARCH_INDEXES[model]
+    tokens = _tokens(text)
+    conn = connections[using or router.db_for_read(model)]
+    backend = get_backend(conn)
+    pks = list(pks)
+    if backend is None or not tokens or not pks:
+        return {}
+    query = backend.build_query(index, tokens, list(fields or []))
+    raw = backend.snippets(conn, model, index, query, field, pks)
+    return {pk: _highlight(snippet) for pk, snippet in raw.items() if snippet and snippet.strip()}
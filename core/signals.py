@@ -0,0 +1,160 @@
+"""
+Model signal handlers for the core app.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import blobs
+from . import events
+from . import images
+from .cache import bump
+from .charts import portfolio_namespace
+from .models import Document, Investment, Startup, Watchlist
+from .notifications import notify_new_investments
+from .portfolio import apply_investment_delta
+from .search import index_object, unindex_object
+
+
+@receiver(pre_save, sender=Investment)
+def remember_previous_investment(sender, instance, raw=False, **kwargs):
+    """Keep the stored values of an edited investment so the delta can be reversed."""
+    instance._portfolio_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._portfolio_previous = Investment.objects.filter(pk=instance.pk).values_list(
+        'investor_id', 'startup_id', 'stage', 'amount'
+    ).first()
+
+
+@receiver(post_save, sender=Investment)
+def add_investment_to_portfolio(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_portfolio_previous', None)
+    if previous is not None:
+        apply_investment_delta(*previous, sign=-1)
+    apply_investment_delta(instance.investor_id, instance.startup_id, instance.stage, instance.amount, sign=1)
+
+
+@receiver(post_delete, sender=Investment)
+def remove_investment_from_portfolio(sender, instance, **kwargs):
+    apply_investment_delta(instance.investor_id, instance.startup_id, instance.stage, instance.amount, sign=-1)
+
+
+@receiver(pre_save, sender=Document)
+def remember_previous_file(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Keep the stored file name of an edited document so its blob reference
+    can be moved, and reserve the blob of a new file before it is stored.
+    """
+    instance._blob_previous = instance._blob_reserved = None
+    if raw:
+        return
+    if update_fields is not None and 'file' not in update_fields:
+        instance._blob_previous = instance.file.name
+        return
+    if instance.file and not instance.file._committed:
+        instance._blob_reserved = blobs.reserve_blob(instance.file)
+    if instance.pk is None:
+        return
+    instance._blob_previous = Document.objects.filter(pk=instance.pk).values_list('file', flat=True).first()
+
+
+@receiver(post_save, sender=Document)
+def reference_blob(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_blob_previous', None)
+    reserved = getattr(instance, '_blob_reserved', None)
+    if reserved is not None and reserved != instance.file.name:
+        # Stored under another name than expected; count that one instead.
+        blobs.release_blob(reserved)
+        reserved = None
+    if reserved is None:
+        if instance.file.name == previous:
+            return
+        if instance.file:
+            blobs.acquire_blob(instance.file.name, instance.size)
+    if previous:
+        blobs.release_blob(previous)
+
+
+@receiver(post_delete, sender=Document)
+def release_document_blob(sender, instance, **kwargs):
+    if instance.file:
+        blobs.release_blob(instance.file.name)
+
+
+@receiver(post_save, sender=Startup)
+@receiver(post_save, sender=Document)
+def index_for_search(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_object(instance)
+
+
+@receiver(post_delete, sender=Startup)
+@receiver(post_delete, sender=Document)
+def unindex_for_search(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+@receiver(post_save, sender=Startup)
+@receiver(post_delete, sender=Startup)
+def invalidate_startup_caches(sender, **kwargs):
+    bump('startups')
+
+
+@receiver(post_save, sender=Startup)
+def process_uploaded_image(sender, instance, raw=False, **kwargs):
+    if raw or settings.IMAGE_PROCESSING != 'upload':
+        return
+    if images.variants_current(instance) or not (instance.image or instance.image_variants):
+        return
+    pk = instance.pk
+
+    def process():
+        startup = Startup.objects.filter(pk=pk).first()
+        if startup is not None and not images.variants_current(startup):
+            images.process_startup_image(startup)
+            bump('startups')
+
+    transaction.on_commit(process)
+
+
+@receiver(post_save, sender=Investment)
+@receiver(post_delete, sender=Investment)
+def invalidate_investment_caches(sender, instance, **kwargs):
+    namespaces = {'investments', portfolio_namespace(instance.investor_id)}
+    previous = getattr(instance, '_portfolio_previous', None)
+    if previous is not None:
+        namespaces.add(portfolio_namespace(previous[0]))
+    bump(*namespaces)
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def invalidate_document_caches(sender, **kwargs):
+    bump('documents')
+
+
+@receiver(post_save, sender=Investment)
+def notify_watchers_of_investment(sender, instance, created=False, raw=False, **kwargs):
+    if raw or not created:
+        return
+    notify_new_investments({instance.startup_id: (instance.startup.name, 1)}, actor_id=instance.investor_id)
+
+
+@receiver(post_save, sender=Watchlist)
+@receiver(post_delete, sender=Watchlist)
+def push_watchlist_change(sender, instance, created=False, raw=False, signal=None, **kwargs):
+    if raw or (signal is post_save and not created):
+        return
+    events.publish([instance.user_id], 'watchlist', {
+        'action': 'added' if signal is post_save else 'removed',
+        'startup_id': instance.startup_id,
+        # Only use the name when it is already loaded; a cascade delete may not have it.
+        'name': instance.startup.name if Watchlist.startup.is_cached(instance) else '',
+    })
@@ -0,0 +1,65 @@
+"""
+Content-addressed file storage.
+
+``ContentAddressedStorage`` files everything saved to it under the SHA-256 of
+its content (``documents/sha256/1a/2b/1a2b...``) rather than the name it was
+uploaded under, and writes a content only once: saving the same bytes again
+returns the existing name. A caller that has already hashed the content can
+set a ``sha256`` attribute on the file it saves to spare a second pass.
+
+Because a stored file may be shared, deleting it is up to the caller; see
+``core.blobs`` for the reference counts kept for documents.
+"""
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+from .downloads import file_sha256
+
+BLOB_DIR = 'sha256'
+BLOB_NAME_RE = re.compile(rf'(^|/){BLOB_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/[0-9a-f]{{64}}$')
+
+
+def blob_name(folder, digest):
+    return posixpath.join(folder, BLOB_DIR, digest[:2], digest[2:4], digest)
+
+
+def is_blob_name(name):
+    return bool(BLOB_NAME_RE.search(name or ''))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """A ``FileSystemStorage`` that names files by their SHA-256 and stores each content once."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = getattr(content, 'sha256', None) or file_sha256(content)
+        name = blob_name(posixpath.dirname(name), digest)
+        if not self.exists(name):
+            self._save(name, content)
+        return name
+
+    def _save(self, name, content):
+        # Written to a temporary file and renamed, so a blob name never refers
+        # to a partial file. Racing writers of a blob write the same bytes.
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if hasattr(content, 'temporary_file_path'):
+            file_move_safe(content.temporary_file_path(), full_path, allow_overwrite=True)
+        else:
+            with tempfile.NamedTemporaryFile(dir=directory, prefix='.', delete=False) as temporary:
+                for chunk in content.chunks():
+                    temporary.write(chunk)
+            os.replace(temporary.name, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
@@ -0,0 +1,41 @@
+"""
+``{% responsive_image %}``: a startup image as a ``<picture>`` with ``srcset``.
+"""
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from ..images import variants_current
+
+register = template.Library()
+
+
+def _srcset(variants):
+    return ', '.join(f'{default_storage.url(path)} {width}w' for width, _height, path in variants)
+
+
+@register.simple_tag
+def responsive_image(startup, sizes='100vw', **attrs):
+    """
+    Render ``startup.image`` with its downscaled variants.
+
+    The browser picks the smallest WebP (or, without WebP support, JPEG)
+    variant that covers ``sizes`` at the screen's pixel density. Other
+    keyword arguments become ``<img>`` attributes, e.g.
+    ``{% responsive_image startup sizes="(min-width: 992px) 33vw, 100vw" class="card-img-top" alt=startup.name %}``.
+    Images without current variants are rendered as they are.
+    """
+    attrs = {'loading': 'lazy', 'decoding': 'async', **attrs}
+    if not variants_current(startup):
+        return format_html('<img src="{}"{}>', startup.image.url, flatatt(attrs))
+
+    variants = startup.image_variants
+    fallback = variants['jpeg'][-1]
+    attrs.update({'width': fallback[0], 'height': fallback[1]})
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        _srcset(variants['webp']), sizes,
+        default_storage.url(fallback[2]), _srcset(variants['jpeg']), sizes, flatatt(attrs),
+    )
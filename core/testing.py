@@ -0,0 +1,54 @@
+"""
+Test helpers for the core app.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .instrumentation import fingerprint
+
+
+class CacheResetMixin:
+    """
+    Start every test with an empty cache. Test transactions are rolled back,
+    so cached entries would otherwise outlive the rows they were built from.
+    """
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+
+class NPlusOneDetectorMixin:
+    """
+    TestCase mixin that fails when a view's query count grows with the
+    number of rows it renders.
+    """
+
+    def _capture(self, url, data=None):
+        # Compare cold-cache renders so cached fragments and counters can't hide queries.
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, data or {})
+        self.assertEqual(response.status_code, 200, f"GET {url} returned {response.status_code}")
+        return [query['sql'] for query in captured.captured_queries]
+
+    def assertQueriesDoNotScale(self, url, add_rows, data=None, small=1, large=6):
+        """
+        Render ``url`` after ``add_rows(small)`` and again after growing the
+        data to ``large`` rows with ``add_rows(large - small)``; the query
+        counts must match.
+        """
+        add_rows(small)
+        before = self._capture(url, data)
+        add_rows(large - small)
+        after = self._capture(url, data)
+        if len(after) != len(before):
+            grown = Counter(map(fingerprint, after)) - Counter(map(fingerprint, before))
+            details = '\n'.join(f'  +{count}  {sql}' for sql, count in grown.most_common(5))
+            self.fail(
+                f"GET {url}: {len(before)} queries with {small} row(s) but {len(after)} with "
+                f"{large}; queries that scaled:\n{details}"
+            )
@@ -0,0 +1,223 @@
+"""
+Resumable chunked document uploads.
+
+A client opens an upload with ``start_upload()`` (title, file name, total
+size), sends the file as consecutive chunks with ``write_chunk()``, each
+tagged with the byte offset it starts at, and turns the complete file into a
+``Document`` with ``finish_upload()``. Chunks are copied from the request
+stream straight into a partial file under ``settings.CHUNKED_UPLOAD_DIR``, so
+neither a chunk nor the file is ever held in memory or spooled twice. On
+finish the partial file is moved into storage, which is a rename when
+``CHUNKED_UPLOAD_DIR`` and ``MEDIA_ROOT`` share a filesystem, or dropped
+when storage already holds the same content.
+
+After a dropped connection the client reads the upload's ``received`` offset
+and carries on from there; a chunk that was cut off is simply written again.
+``manage.py clean_stale_uploads`` deletes uploads untouched for
+``STALE_AFTER``.
+
+The SHA-256 is computed as chunks arrive by a hasher kept in the process for
+each upload. Hash state can't be stored in the database, so if a chunk lands
+on a worker that did not see the previous one, that upload is hashed once on
+finish instead.
+"""
+import datetime
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .downloads import CHUNK_SIZE as COPY_SIZE
+from .downloads import file_sha256
+from .models import Document, UploadSession
+
+# Chunk size clients are told to use, and the largest one accepted.
+CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+MAX_UPLOAD_SIZE = 20 * 1024 ** 3
+STALE_AFTER = datetime.timedelta(hours=24)
+# In-process hashers kept at once; the least recently used are dropped.
+MAX_HASHERS = 256
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadError(ValueError):
+    """A request the upload can't accept."""
+
+
+class OffsetMismatch(UploadError):
+    """A chunk that doesn't start where the stored data ends."""
+
+    def __init__(self, received):
+        super().__init__(f"Expected the chunk at offset {received}.")
+        self.received = received
+
+
+class PartialFile(File):
+    """A finished partial file; storages that can move a file use ``temporary_file_path()``."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+def _take_hasher(upload_pk, offset):
+    """A copy of the hasher that has seen exactly ``offset`` bytes of the upload, or None."""
+    with _hashers_lock:
+        entry = _hashers.get(upload_pk)
+    if offset == 0:
+        return hashlib.sha256()
+    if entry is None or entry[0] != offset:
+        return None
+    return entry[1].copy()
+
+
+def _keep_hasher(upload_pk, offset, hasher):
+    with _hashers_lock:
+        if hasher is None:
+            _hashers.pop(upload_pk, None)
+            return
+        _hashers[upload_pk] = (offset, hasher)
+        _hashers.move_to_end(upload_pk)
+        while len(_hashers) > MAX_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def partial_path(upload):
+    return Path(settings.CHUNKED_UPLOAD_DIR) / f'{upload.pk}.part'
+
+
+def start_upload(user, title, filename, size, description='', sha256=''):
+    """Open an upload of ``size`` bytes and create its empty partial file."""
+    title = (title or '').strip()
+    filename = get_valid_filename(os.path.basename(filename or '')) if filename else ''
+    sha256 = (sha256 or '').lower()
+    if not title or len(title) > UploadSession._meta.get_field('title').max_length:
+        raise UploadError("A title of at most 255 characters is required.")
+    if not filename:
+        raise UploadError("A file name is required.")
+    if not isinstance(size, int) or not 0 < size <= MAX_UPLOAD_SIZE:
+        raise UploadError(f"The size must be between 1 and {MAX_UPLOAD_SIZE} bytes.")
+    if sha256 and not SHA256_RE.match(sha256):
+        raise UploadError("sha256 must be 64 hexadecimal digits.")
+
+    upload = UploadSession.objects.create(
+        user=user, title=title, description=description or '', filename=filename, size=size,
+        expected_sha256=sha256,
+    )
+    path = partial_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Store ``length`` bytes read from ``stream`` at ``offset``.
+
+    ``offset`` must be the upload's ``received`` count; anything past it from
+    an earlier, interrupted attempt is overwritten. Raises ``OffsetMismatch``
+    when it isn't, and ``UploadError`` for a chunk that is too large or ends
+    early. Returns the new ``received``.
+    """
+    if offset != upload.received:
+        raise OffsetMismatch(upload.received)
+    if not 0 < length <= MAX_CHUNK_SIZE:
+        raise UploadError(f"Chunks must be between 1 and {MAX_CHUNK_SIZE} bytes.")
+    if offset + length > upload.size:
+        raise UploadError("The chunk runs past the announced size.")
+
+    hasher = _take_hasher(upload.pk, offset)
+    with open(partial_path(upload), 'r+b') as partial:
+        partial.seek(offset)
+        partial.truncate()
+        remaining = length
+        while remaining:
+            data = stream.read(min(COPY_SIZE, remaining))
+            if not data:
+                raise UploadError("The chunk ended before Content-Length bytes arrived.")
+            partial.write(data)
+            if hasher is not None:
+                hasher.update(data)
+            remaining -= len(data)
+
+    received = offset + length
+    # Only one of two requests racing for the same offset gets to advance it.
+    advanced = UploadSession.objects.filter(pk=upload.pk, received=offset).update(
+        received=received, updated_at=timezone.now(),
+    )
+    if not advanced:
+        upload.refresh_from_db(fields=['received'])
+        _keep_hasher(upload.pk, None, None)
+        raise OffsetMismatch(upload.received)
+    _keep_hasher(upload.pk, received, hasher)
+    upload.received = received
+    return received
+
+
+def finish_upload(upload):
+    """Turn a complete upload into a ``Document`` and return it."""
+    if upload.received != upload.size:
+        raise UploadError(f"Only {upload.received} of {upload.size} bytes have been received.")
+    path = partial_path(upload)
+    hasher = _take_hasher(upload.pk, upload.size)
+    with PartialFile(open(path, 'rb')) as partial:
+        digest = hasher.hexdigest() if hasher is not None else file_sha256(partial)
+        if upload.expected_sha256 and digest != upload.expected_sha256:
+            # The stored bytes are not the client's file; it has to start over.
+            abort_upload(upload)
+            raise UploadError("The uploaded data does not match the announced sha256.")
+        document = Document(
+            title=upload.title, description=upload.description, uploaded_by=upload.user,
+            filename=upload.filename, sha256=digest, size=upload.size,
+        )
+        partial.sha256 = digest
+        partial.name = upload.filename
+        # Stored by save(), after the pre_save signal has reserved its blob.
+        document.file = partial
+        with transaction.atomic():
+            document.save()
+            upload.delete()
+    _keep_hasher(upload.pk, None, None)
+    if path.exists():
+        # Storages that copied the file rather than moving it, or already had it.
+        path.unlink()
+    return document
+
+
+def abort_upload(upload):
+    """Delete an upload and its partial file."""
+    _keep_hasher(upload.pk, None, None)
+    partial_path(upload).unlink(missing_ok=True)
+    upload.delete()
+
+
+def clean_stale_uploads(older_than=STALE_AFTER):
+    """
+    Delete uploads untouched for ``older_than``, and partial files without an upload.
+
+    Returns the number of uploads deleted.
+    """
+    cutoff = timezone.now() - older_than
+    stale = list(UploadSession.objects.filter(updated_at__lt=cutoff))
+    for upload in stale:
+        abort_upload(upload)
+
+    directory = Path(settings.CHUNKED_UPLOAD_DIR)
+    if directory.is_dir():
+        live = {str(pk) for pk in UploadSession.objects.values_list('pk', flat=True)}
+        for path in directory.glob('*.part'):
+            if path.stem not in live and path.stat().st_mtime < cutoff.timestamp():
+                path.unlink(missing_ok=True)
+    return len(stale)
@@ -1,34 +1,43 @@
+from django.conf import settings
 from django.urls import path, include
 from django.shortcuts import redirect
 from core.views import (
     HomeView, DashboardView, StartupCreateView, StartupUpdateView,
-    InvestmentCreateView, PortfolioView, MarketsView, StartupListView,
-    StartupDetailView, WatchlistView, register_view, login_view, logout_view, toggle_watchlist,
-    ReportsOverviewView, InvestmentsReportView, StartupsReportView,
+    InvestmentCreateView, PortfolioView, MarketsView,
+    register_view, login_view, logout_view, toggle_watchlist,
     ProfileUpdateView, ProfileView, SettingsView, NotificationsView,
     AboutView, CareersView, BlogView, ContactView, PrivacyView,
     newsletter_subscribe,
 )
-from . import views
+from . import async_views, views
+
+# Under ASGI the read-heavy pages can use their async ORM variants.
+read_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('', HomeView.as_view(), name='home'),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('dashboard/charts/', views.dashboard_charts, name='dashboard_charts'),
     path('register/', register_view, name='register'),
     path('login/', login_view, name='login'),
     path('logout/', logout_view, name='logout'),
     path('add-startup/', StartupCreateView.as_view(), name='add_startup'),
     path('add-investment/', InvestmentCreateView.as_view(), name='add_investment'),
+    path('investments/import/', views.InvestmentImportView.as_view(), name='import_investments'),
     path('portfolio/', PortfolioView.as_view(), name='portfolio'),
     path('markets/', MarketsView.as_view(), name='markets'),
-    path('startups/', StartupListView.as_view(), name='startup_list'),
-    path('startups/<int:pk>/', StartupDetailView.as_view(), name='startup_detail'),
+    path('startups/', read_views.StartupListView.as_view(), name='startup_list'),
+    path('startups/<int:pk>/', read_views.StartupDetailView.as_view(), name='startup_detail'),
     path('startups/<int:pk>/edit/', StartupUpdateView.as_view(), name='edit_startup'),
     path('startups/<int:pk>/watchlist/', toggle_watchlist, name='toggle_watchlist'),
-    path('watchlist/', WatchlistView.as_view(), name='watchlist'),
+    path('watchlist/', read_views.WatchlistView.as_view(), name='watchlist'),
     # Documents
-    path('documents/', views.DocumentsListView.as_view(), name='documents_list'),
+    path('documents/', read_views.DocumentsListView.as_view(), name='documents_list'),
     path('documents/upload/', views.DocumentUploadView.as_view(), name='documents_upload'),
+    path('documents/uploads/', views.document_upload_start, name='document_upload_start'),
+    path('documents/uploads/<uuid:pk>/', views.document_upload, name='document_upload'),
+    path('documents/uploads/<uuid:pk>/chunk/', views.document_upload_chunk, name='document_upload_chunk'),
+    path('documents/uploads/<uuid:pk>/finish/', views.document_upload_finish, name='document_upload_finish'),
     path('documents/<int:pk>/', views.DocumentDetailView.as_view(), name='document_detail'),
     path('documents/<int:pk>/download/', views.document_download, name='document_download'),
     path('documents/my/', views.MyDocumentsView.as_view(), name='documents_my'),
@@ -37,12 +46,13 @@ urlpatterns = [
     path('account/profile/', ProfileView.as_view(), name='profile'),
     path('account/settings/', SettingsView.as_view(), name='settings'),
     path('account/notifications/', NotificationsView.as_view(), name='notifications'),
+    path('events/', views.event_stream, name='event_stream'),
     # Reports
     # imported views for reports are available in core.views
     # Reports
-    path('reports/', ReportsOverviewView.as_view(), name='reports_overview'),
-    path('reports/investments/', InvestmentsReportView.as_view(), name='investments_report'),
-    path('reports/startups/', StartupsReportView.as_view(), name='startups_report'),
+    path('reports/', read_views.ReportsOverviewView.as_view(), name='reports_overview'),
+    path('reports/investments/', read_views.InvestmentsReportView.as_view(), name='investments_report'),
+    path('reports/startups/', read_views.StartupsReportView.as_view(), name='startups_report'),
     # Company Pages
     path('about/', AboutView.as_view(), name='about'),
     path('careers/', CareersView.as_view(), name='careers'),
@@ -51,4 +61,7 @@ urlpatterns = [
     path('privacy/', PrivacyView.as_view(), name='privacy'),
     # Newsletter
     path('newsletter/subscribe/', newsletter_subscribe, name='newsletter_subscribe'),
+    # Operations
+    path('ops/query-stats/', views.query_stats, name='query_stats'),
+    path('api/startups/upsert/', views.startups_upsert_api, name='startups_upsert_api'),
 ]
@@ -2,21 +2,36 @@
 Core views for the Investment Management System.
 # pylint: disable=too-many-ancestors
 """
+import asyncio
+import io
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView, CreateView, ListView, DetailView, UpdateView
 from django.urls import reverse_lazy, reverse
 from django.db.models import Sum, Q
 from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
-from django.http import HttpResponseRedirect, HttpResponse
-import csv
-import io
-from .models import Startup, Investment, Watchlist
-from .forms import StartupForm, InvestmentForm, UserProfileForm, DocumentForm
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseRedirect, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
+from .models import Startup, Investment, Watchlist, Notification, UploadSession
+from . import downloads, events, notifications, uploads
+from .cache import get_or_set as cache_get_or_set
+from .charts import portfolio_charts
+from .exports import EXPORT_CHUNK_SIZE, stream_csv
+from .importers import import_investments, upsert_startups
+from .instrumentation import registry
+from .pagination import paginate_keyset
+from .portfolio import get_portfolio_summary
+from .reports import summarize_investments, summarize_startups
+from .search import RANK_LIMIT, count_matches, newest_first, search, snippets
+from .forms import StartupForm, InvestmentForm, InvestmentImportForm, UserProfileForm, DocumentForm
 from .models import Document
 from django.contrib.auth.models import User
 from django.views.generic.edit import UpdateView
@@ -41,12 +56,21 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         user = self.request.user
         investments = Investment.objects.filter(investor=user)
-        context['total_investment'] = investments.aggregate(Sum('amount'))['amount__sum'] or 0
-        context['total_startups'] = investments.values('startup').distinct().count()
-        context['recent_investments'] = investments.order_by('-date')[:5]
+        summary = get_portfolio_summary(user)
+        context['portfolio_summary'] = summary
+        context['total_investment'] = summary.total_amount
+        context['total_startups'] = summary.startup_count
+        context['recent_investments'] = investments.select_related('startup').order_by('-date')[:5]
         context['investments'] = investments
         return context
 
+@login_required
+def dashboard_charts(request):
+    """
+    JSON chart series for the dashboard, loaded after the page renders.
+    """
+    return JsonResponse(portfolio_charts(request.user.pk))
+
 class StartupCreateView(LoginRequiredMixin, CreateView):
     """
     View for creating a new startup.
@@ -75,6 +99,12 @@ class StartupUpdateView(LoginRequiredMixin, SuccessMessageMixin, UpdateView):
     def get_success_url(self):
         return reverse('startup_detail', args=[self.object.pk])
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if form.has_changed():
+            notifications.notify_startup_updated(self.object, actor=self.request.user)
+        return response
+
 class InvestmentCreateView(LoginRequiredMixin, CreateView):
     """
     View for creating a new investment.
@@ -118,12 +148,20 @@ class PortfolioView(LoginRequiredMixin, ListView):
     model = Startup
     template_name = 'portfolio.html'
     context_object_name = 'startups'
+    page_size = 24
 
     def get_queryset(self):
         # In a real app, we'd filter by investments. 
         # For now, let's just return all startups to populate the view.
         return Startup.objects.all()
 
+    def get_context_data(self, **kwargs):
+        page = paginate_keyset(self.request, self.object_list, ['-created_at'], per_page=self.page_size)
+        kwargs['object_list'] = page.object_list
+        context = super().get_context_data(**kwargs)
+        context['page'] = page
+        return context
+
 class MarketsView(TemplateView):
     """
     View for the markets page.
@@ -138,6 +176,17 @@ class StartupListView(ListView):
     template_name = 'startup_list.html'
     context_object_name = 'startups'
     ordering = ['-created_at']
+    page_size = 24
+
+    def get_context_data(self, **kwargs):
+        page = cache_get_or_set(
+            'startup_list', [self.request.GET.urlencode()], ['startups'],
+            lambda: paginate_keyset(self.request, self.object_list, self.ordering, per_page=self.page_size),
+        )
+        kwargs['object_list'] = page.object_list
+        context = super().get_context_data(**kwargs)
+        context['page'] = page
+        return context
 
 def register_view(request):
     """
@@ -253,7 +302,7 @@ class ProfileView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         user = self.request.user
         context['user_obj'] = user
-        context['investments_count'] = Investment.objects.filter(investor=user).count()
+        context['investments_count'] = get_portfolio_summary(user).investment_count
         context['watchlist_count'] = Watchlist.objects.filter(user=user).count()
         return context
 
@@ -264,17 +313,33 @@ class ReportsOverviewView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['total_investment'] = Investment.objects.aggregate(Sum('amount'))['amount__sum'] or 0
-        context['total_startups'] = Startup.objects.count()
-        context['recent_investments'] = Investment.objects.order_by('-date')[:10]
+        context.update(cache_get_or_set('reports_overview', [], ['investments', 'startups'], self.get_overview))
         return context
 
+    def recent_investments(self):
+        return Investment.objects.select_related('startup', 'investor').only(
+            'date', 'amount', 'stage', 'startup__name', 'investor__username',
+        ).order_by('-date')[:10]
+
+    def get_overview(self):
+        return {
+            'total_investment': Investment.objects.aggregate(Sum('amount'))['amount__sum'] or 0,
+            'total_startups': Startup.objects.count(),
+            'recent_investments': list(self.recent_investments()),
+        }
+
 
 class InvestmentsReportView(LoginRequiredMixin, TemplateView):
     """Investments report table."""
     template_name = 'reports/investments.html'
-    def get(self, request, *args, **kwargs):
-        qs = Investment.objects.select_related('startup', 'investor').all()
+    orderings = ('-date', 'date', '-amount', 'amount')
+    page_size = 50
+
+    def filter_queryset(self, request):
+        """The filtered, ordered queryset and the filter values echoed back to the template."""
+        qs = Investment.objects.select_related('startup', 'investor').only(
+            'date', 'stage', 'amount', 'equity_percentage', 'startup__name', 'investor__username',
+        )
 
         # Filters
         q = request.GET.get('q', '').strip()
@@ -284,112 +349,172 @@ class InvestmentsReportView(LoginRequiredMixin, TemplateView):
         order = request.GET.get('order', '-date')
 
         if q:
-            qs = qs.filter(Q(startup__name__icontains=q) | Q(investor__username__icontains=q))
+            startups = search(Startup.objects.all(), q, fields=['name'])
+            qs = qs.filter(Q(startup__in=startups) | Q(investor__username__icontains=q))
         if stage:
-            qs = qs.filter(stage__iexact=stage)
+            # Match the stored choice exactly so the (stage, date) index applies.
+            stages = {value.lower(): value for value, _ in Investment.STAGE_CHOICES}
+            qs = qs.filter(stage=stages.get(stage.lower(), stage))
         if start_date:
             qs = qs.filter(date__gte=start_date)
         if end_date:
             qs = qs.filter(date__lte=end_date)
 
         # Ordering
-        try:
-            qs = qs.order_by(order)
-        except Exception:
-            qs = qs.order_by('-date')
+        if order not in self.orderings:
+            order = '-date'
+        qs = qs.order_by(order)
+        filters = {'q': q, 'stage': stage, 'start_date': start_date, 'end_date': end_date, 'order': order}
+        return qs, filters
+
+    def export(self, qs):
+        rows = qs.values_list(
+            'date', 'investor__username', 'startup__name', 'stage', 'amount', 'equity_percentage'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return stream_csv(
+            'investments_report.csv',
+            ['Date', 'Investor', 'Startup', 'Stage', 'Amount', 'Equity %'],
+            rows,
+        )
+
+    def summary_key(self, filters):
+        return [filters['q'], filters['stage'], filters['start_date'], filters['end_date']]
 
-        # Export CSV
+    def get(self, request, *args, **kwargs):
+        qs, filters = self.filter_queryset(request)
         if request.GET.get('export') == 'csv':
-            buf = io.StringIO()
-            writer = csv.writer(buf)
-            writer.writerow(['Date', 'Investor', 'Startup', 'Stage', 'Amount', 'Equity %'])
-            for inv in qs:
-                writer.writerow([inv.date, inv.investor.username, inv.startup.name, inv.stage, str(inv.amount), str(inv.equity_percentage)])
-            resp = HttpResponse(buf.getvalue(), content_type='text/csv')
-            resp['Content-Disposition'] = 'attachment; filename="investments_report.csv"'
-            return resp
-
-        # Compute summary stats for display
-        investments_count = qs.count()
-        distinct_startups = qs.values('startup').distinct().count()
-        top_startups = qs.values('startup__name').annotate(total=Sum('amount')).order_by('-total')[:5]
+            return self.export(qs)
 
         # Context for template
+        page = paginate_keyset(request, qs, [filters['order']], per_page=self.page_size)
         context = self.get_context_data(**kwargs)
-        context['investments'] = qs
-        context['total_investment'] = qs.aggregate(Sum('amount'))['amount__sum'] or 0
-        context['investments_count'] = investments_count
-        context['distinct_startups'] = distinct_startups
-        context['top_startups'] = top_startups
-        context['q'] = q
-        context['stage'] = stage
-        context['start_date'] = start_date
-        context['end_date'] = end_date
-        context['order'] = order
+        context['investments'] = page.object_list
+        context['page'] = page
+        context.update(cache_get_or_set(
+            'investments_report_summary', self.summary_key(filters), ['investments', 'startups'],
+            lambda: summarize_investments(qs),
+        ))
+        context.update(filters)
         return self.render_to_response(context)
 
 
 class StartupsReportView(LoginRequiredMixin, TemplateView):
     """Startups report table."""
     template_name = 'reports/startups.html'
-    def get(self, request, *args, **kwargs):
+    orderings = ('-created_at', 'created_at', 'name')
+    page_size = 50
+
+    def filter_queryset(self, request):
+        """The filtered queryset, its ordering and the filter values echoed back to the template."""
         qs = Startup.objects.all()
 
         q = request.GET.get('q', '').strip()
         industry = request.GET.get('industry', '').strip()
-        order = request.GET.get('order', '-created_at')
+        order = request.GET.get('order') or ('relevance' if q else '-created_at')
 
         if q:
-            qs = qs.filter(Q(name__icontains=q) | Q(founder__icontains=q) | Q(industry__icontains=q))
+            qs = search(qs, q, rank=True)
         if industry:
             qs = qs.filter(industry__icontains=industry)
 
-        try:
-            qs = qs.order_by(order)
-        except Exception:
-            qs = qs.order_by('-created_at')
+        if order == 'relevance' and q:
+            ordering = ['search_rank']
+        elif order in self.orderings:
+            ordering = [order]
+        else:
+            order = '-created_at'
+            ordering = [order]
+        return qs.order_by(*ordering), ordering, {'q': q, 'industry': industry, 'order': order}
+
+    def export(self, qs):
+        rows = qs.values_list(
+            'name', 'founder', 'industry', 'founded_date', 'contact_email', 'website'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return stream_csv(
+            'startups_report.csv',
+            ['Name', 'Founder', 'Industry', 'Founded Date', 'Contact Email', 'Website'],
+            rows,
+        )
 
+    def get(self, request, *args, **kwargs):
+        qs, ordering, filters = self.filter_queryset(request)
         if request.GET.get('export') == 'csv':
-            buf = io.StringIO()
-            writer = csv.writer(buf)
-            writer.writerow(['Name', 'Founder', 'Industry', 'Founded Date', 'Contact Email', 'Website'])
-            for s in qs:
-                writer.writerow([s.name, s.founder, s.industry, str(s.founded_date), s.contact_email or '', s.website or ''])
-            resp = HttpResponse(buf.getvalue(), content_type='text/csv')
-            resp['Content-Disposition'] = 'attachment; filename="startups_report.csv"'
-            return resp
-
-        # compute summary stats
-        total_startups = qs.count()
-        distinct_industries = qs.values('industry').distinct().count()
-        top_industries = qs.values('industry').annotate(count=Count('id')).order_by('-count')[:6]
+            return self.export(qs)
 
+        page = paginate_keyset(request, qs, ordering, per_page=self.page_size)
         context = self.get_context_data(**kwargs)
-        context['startups'] = qs
-        context['q'] = q
-        context['industry'] = industry
-        context['order'] = order
-        context['total_startups'] = total_startups
-        context['distinct_industries'] = distinct_industries
-        context['top_industries'] = top_industries
+        context['startups'] = page.object_list
+        context['page'] = page
+        context.update(filters)
+        context.update(cache_get_or_set(
+            'startups_report_summary', [filters['q'], filters['industry']], ['startups'],
+            lambda: summarize_startups(qs),
+        ))
         return self.render_to_response(context)
 
 
 class DocumentsListView(TemplateView):
     """Public list of documents with search."""
     template_name = 'documents/list.html'
+    page_size = 30
+
+    def filter_queryset(self, q):
+        """
+        The documents matching ``q``, their ordering and, when searching, their number.
+
+        Matches are ordered by relevance unless there are too many to rank.
+        """
+        qs = Document.objects.select_related('uploaded_by')
+        if not q:
+            return qs, ['-uploaded_at'], None
+        count = count_matches(Document, q)
+        if count is not None and count > RANK_LIMIT:
+            return newest_first(search(qs, q)), ['-search_pk'], count
+        return search(qs, q, rank=True), ['search_rank'], count
+
+    def add_snippets(self, documents, q):
+        """Set ``snippet`` on each of ``documents``: where its text matches ``q``, highlighted."""
+        found = snippets(Document, [doc.pk for doc in documents], q, 'text__content') if q else {}
+        for doc in documents:
+            doc.snippet = found.get(doc.pk)
 
     def get(self, request, *args, **kwargs):
         q = request.GET.get('q', '').strip()
-        qs = Document.objects.all()
-        if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
+        qs, ordering, count = self.filter_queryset(q)
+        page = paginate_keyset(request, qs, ordering, per_page=self.page_size, unique='-search_pk' in ordering)
+        self.add_snippets(page.object_list, q)
         context = self.get_context_data(**kwargs)
-        context['documents'] = qs
+        context['documents'] = page.object_list
+        context['documents_count'] = qs.count() if count is None else count
+        context['page'] = page
         context['q'] = q
         return self.render_to_response(context)
 
 
+class InvestmentImportView(LoginRequiredMixin, TemplateView):
+    """
+    Import the user's investments from an uploaded CSV file.
+    """
+    template_name = 'import_investments.html'
+
+    def get(self, request, *args, **kwargs):
+        return self.render_to_response({'form': InvestmentImportForm()})
+
+    def post(self, request, *args, **kwargs):
+        form = InvestmentImportForm(request.POST, request.FILES)
+        if not form.is_valid():
+            return self.render_to_response({'form': form})
+        stream = io.TextIOWrapper(
+            form.cleaned_data['file'].file, encoding='utf-8-sig', errors='surrogateescape', newline='',
+        )
+        result = import_investments(stream, investor=request.user)
+        if result.created:
+            messages.success(
+                request, f'Imported {result.created} of {result.rows} rows in {result.elapsed:.1f}s.'
+            )
+        return self.render_to_response({'form': InvestmentImportForm(), 'result': result})
+
+
 class DocumentUploadView(LoginRequiredMixin, TemplateView):
     template_name = 'documents/upload.html'
 
@@ -412,7 +537,7 @@ class DocumentDetailView(TemplateView):
     template_name = 'documents/detail.html'
 
     def get(self, request, pk, *args, **kwargs):
-        doc = get_object_or_404(Document, pk=pk)
+        doc = get_object_or_404(Document.objects.select_related('uploaded_by'), pk=pk)
         return self.render_to_response({'document': doc})
 
 
@@ -432,7 +557,7 @@ class DocumentDeleteView(LoginRequiredMixin, TemplateView):
 
     def post(self, request, pk, *args, **kwargs):
         doc = get_object_or_404(Document, pk=pk, uploaded_by=request.user)
-        doc.file.delete(save=False)
+        # The file may be shared with other documents; it goes with the last of them.
         doc.delete()
         messages.success(request, 'Document deleted successfully.')
         return redirect('documents_my')
@@ -441,8 +566,100 @@ class DocumentDeleteView(LoginRequiredMixin, TemplateView):
 @login_required
 def document_download(request, pk):
     doc = get_object_or_404(Document, pk=pk)
-    # For dev server, redirect to file URL (served by MEDIA). In production, serve via X-Sendfile or cloud.
-    return redirect(doc.file.url)
+    return downloads.serve(request, doc)
+
+
+def _upload_state(upload):
+    return {
+        'id': str(upload.pk),
+        'offset': upload.received,
+        'size': upload.size,
+        'chunk_size': uploads.CHUNK_SIZE,
+        'url': reverse('document_upload', args=[upload.pk]),
+        'chunk_url': reverse('document_upload_chunk', args=[upload.pk]),
+        'finish_url': reverse('document_upload_finish', args=[upload.pk]),
+    }
+
+
+@login_required
+@require_http_methods(['POST'])
+def document_upload_start(request):
+    """
+    Open a resumable upload (see core.uploads) and return its URLs.
+
+    The JSON body carries ``title``, ``filename``, ``size`` and optionally
+    ``description`` and ``sha256``.
+    """
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'The request body must be JSON.'}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'error': 'The request body must be a JSON object.'}, status=400)
+    try:
+        upload = uploads.start_upload(
+            request.user, payload.get('title'), payload.get('filename'), payload.get('size'),
+            description=payload.get('description', ''), sha256=payload.get('sha256', ''),
+        )
+    except uploads.UploadError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(_upload_state(upload), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'DELETE'])
+def document_upload(request, pk):
+    """How far an upload has got (GET), so a client can resume it, or cancel it (DELETE)."""
+    upload = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    if request.method == 'DELETE':
+        uploads.abort_upload(upload)
+        return HttpResponse(status=204)
+    return JsonResponse(_upload_state(upload))
+
+
+@login_required
+@require_http_methods(['PUT'])
+def document_upload_chunk(request, pk):
+    """
+    Append the request body to an upload at ``?offset=``.
+
+    Answers 409 with the stored offset when the chunk doesn't start there.
+    """
+    upload = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    try:
+        offset = int(request.GET['offset'])
+        length = int(request.headers['Content-Length'])
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'An offset and a Content-Length are required.'}, status=400)
+    if length > uploads.MAX_CHUNK_SIZE:
+        return JsonResponse({'error': f'Chunks may be at most {uploads.MAX_CHUNK_SIZE} bytes.'}, status=413)
+    try:
+        # The body is read from the request stream, never loaded as a whole.
+        uploads.write_chunk(upload, offset, request, length)
+    except uploads.OffsetMismatch as exc:
+        return JsonResponse({'error': str(exc), 'offset': exc.received}, status=409)
+    except uploads.UploadError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    except FileNotFoundError:
+        upload.delete()
+        return JsonResponse({'error': 'This upload has expired.'}, status=404)
+    return JsonResponse(_upload_state(upload))
+
+
+@login_required
+@require_http_methods(['POST'])
+def document_upload_finish(request, pk):
+    """Turn a complete upload into a document."""
+    upload = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    try:
+        doc = uploads.finish_upload(upload)
+    except uploads.UploadError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    except FileNotFoundError:
+        upload.delete()
+        return JsonResponse({'error': 'This upload has expired.'}, status=404)
+    messages.success(request, 'Document uploaded successfully.')
+    return JsonResponse({'id': doc.pk, 'redirect': reverse('documents_list')}, status=201)
 
 
 class SettingsView(LoginRequiredMixin, TemplateView):
@@ -528,13 +745,84 @@ class NotificationsView(LoginRequiredMixin, TemplateView):
     View for user notifications page.
     """
     template_name = 'auth/notifications.html'
+    page_size = 20
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # In a real application, you would fetch notifications from the database
-        # For now, we'll use the template's static data
+        qs = Notification.objects.filter(recipient=self.request.user).only(
+            'kind', 'startup_id', 'message', 'is_read', 'created_at',
+        )
+        show = self.request.GET.get('show', 'all')
+        if show == 'unread':
+            qs = qs.filter(is_read=False)
+        page = paginate_keyset(self.request, qs, ['-created_at'], per_page=self.page_size)
+        context['page'] = page
+        context['notifications'] = page.object_list
+        context['show'] = show
+        context['unread_count'] = notifications.unread_count(self.request.user)
         return context
 
+    def post(self, request, *args, **kwargs):
+        action = request.POST.get('action')
+        if action == 'mark_read':
+            ids = [int(pk) for pk in request.POST.getlist('id') if pk.isdecimal()]
+            notifications.mark_read(request.user, ids)
+        elif action == 'mark_all_read':
+            notifications.mark_read(request.user)
+        elif action == 'clear':
+            notifications.clear(request.user)
+        return redirect(f"{reverse('notifications')}?show={request.GET.get('show', 'all')}")
+
+
+async def event_stream(request):
+    """
+    Server-sent events with the user's new notifications and watchlist changes.
+
+    Only served under ASGI, where each open stream is a coroutine waiting on
+    its hub subscription and holds no thread or database connection (see
+    ``core.asgi``); a WSGI worker answers 204, which tells ``EventSource`` not to reconnect.
+    Notifications missed while disconnected are replayed after
+    ``Last-Event-ID``.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    try:
+        last_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_id = None
+
+    async def stream():
+        subscription = events.get_hub().subscribe(events.user_channel(user.pk))
+        replayed = 0
+        try:
+            yield f"retry: {events.RECONNECT_DELAY}\n\n"
+            if last_id is not None:
+                missed = Notification.objects.filter(recipient_id=user.pk, pk__gt=last_id).order_by('pk')
+                async for notification in missed[:events.REPLAY_LIMIT]:
+                    replayed = notification.pk
+                    yield events.encode(events.notification_event(notification))
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), events.HEARTBEAT_INTERVAL)
+                except TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                # Created while the replay ran: already sent.
+                if message['event'] == 'notification' and message['id'] <= replayed:
+                    continue
+                yield events.encode(message)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 
 class AboutView(TemplateView):
     """
@@ -575,7 +863,8 @@ from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 from .models import Newsletter
-from django.core.mail import send_mail
+from django.db import transaction
+from .outbox import queue_email
 from django.conf import settings
 
 @require_POST
@@ -600,13 +889,13 @@ def newsletter_subscribe(request):
     
     # Create subscription
     try:
-        Newsletter.objects.create(email=email)
-        
-        # Send confirmation email
-        try:
-            send_mail(
+        with transaction.atomic():
+            Newsletter.objects.create(email=email)
+
+            # Confirmation email goes through the outbound queue, not SMTP in the request.
+            queue_email(
                 subject='Welcome to InvestTrack Newsletter!',
-                message=f'''
+                body='''
 Hello!
 
 Thank you for subscribing to the InvestTrack newsletter!
@@ -625,13 +914,8 @@ The InvestTrack Team
 ---
 If you wish to unsubscribe, please contact us at support@investtrack.com
                 ''',
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email],
-                fail_silently=True,
+                to=email,
             )
-        except Exception as e:
-            # Log error but don't fail the subscription
-            print(f"Email sending failed: {e}")
         
         return JsonResponse({
             'success': True, 
@@ -643,3 +927,48 @@ If you wish to unsubscribe, please contact us at support@investtrack.com
             'success': False, 
             'message': 'An error occurred. Please try again later.'
         }, status=500)
+
+
+@staff_member_required
+def query_stats(request):
+    """
+    Slowest views and their worst duplicate query patterns, as recorded by
+    QueryInstrumentationMiddleware in this process.
+    """
+    if request.method == 'POST':
+        registry.reset()
+        messages.success(request, 'Query statistics reset.')
+        return redirect('query_stats')
+    sort = request.GET.get('sort', 'p95_ms')
+    if sort not in ('p95_ms', 'p50_ms', 'max_ms', 'avg_queries', 'avg_sql_ms'):
+        sort = 'p95_ms'
+    views = registry.slowest(limit=50, key=sort)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'views': dict(views)})
+    return render(request, 'ops/query_stats.html', {'views': views, 'sort': sort})
+
+
+@staff_member_required
+@require_POST
+def startups_upsert_api(request):
+    """
+    Bulk insert or update startups from a JSON list of objects with the
+    StartupForm fields, deduplicated on normalized name and website.
+    """
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Request body must be JSON.'}, status=400)
+    if isinstance(payload, dict):
+        payload = payload.get('startups')
+    if not isinstance(payload, list) or not all(isinstance(row, dict) for row in payload):
+        return JsonResponse({'error': 'Expected a list of startup objects.'}, status=400)
+
+    result = upsert_startups((index, row) for index, row in enumerate(payload))
+    return JsonResponse({
+        'rows': result.rows,
+        'created': result.created,
+        'updated': result.updated,
+        'error_count': result.error_count,
+        'errors': [{'index': index, 'message': message} for index, message in result.errors],
+    })
@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'investment_system.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+# Django's handler, except that the event stream holds no thread while open.
+from core.asgi import ASGIHandler  # noqa: E402
+
+application = ASGIHandler()
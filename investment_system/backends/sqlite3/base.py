@@ -0,0 +1,42 @@
+"""
+SQLite backend with the ``init_command`` and ``transaction_mode`` OPTIONS.
+
+Django 5.1 added both options to the built-in backend; this backports them to
+Django 5.0 so the tuned SQLite profile in ``investment_system.database`` can
+set per-connection pragmas and start ``atomic()`` blocks with
+``BEGIN IMMEDIATE``.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'EXCLUSIVE', 'IMMEDIATE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.init_command = kwargs.pop('init_command', '')
+        transaction_mode = kwargs.pop('transaction_mode', None)
+        if transaction_mode is not None and transaction_mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"settings.DATABASES['{self.alias}']['OPTIONS']['transaction_mode'] must be one of "
+                f"{', '.join(TRANSACTION_MODES)}, or None."
+            )
+        self.transaction_mode = transaction_mode.upper() if transaction_mode else None
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for statement in self.init_command.split(';'):
+            if statement.strip():
+                conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # A deferred transaction that reads first and writes later fails at
+        # once with "database is locked" if another connection wrote in the
+        # meantime; busy_timeout only helps transactions that take the write
+        # lock up front.
+        if self.transaction_mode is None:
+            return super()._start_transaction_under_autocommit()
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
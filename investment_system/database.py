@@ -0,0 +1,131 @@
+"""
+``DATABASES`` configuration from environment variables.
+
+``DATABASE_URL``
+    The primary, e.g. ``postgres://user:pass@db:5432/invest?sslmode=require``
+    (default: ``sqlite:///db.sqlite3``). Relative SQLite paths are resolved
+    against the project directory.
+``DATABASE_REPLICA_URLS``
+    Comma-separated read replicas, configured as ``replica1``, ``replica2``...
+    SQLite files work as local stand-ins (see ``manage.py sync_sqlite_replicas``).
+``DB_CONN_MAX_AGE``
+    Seconds a connection is kept open between requests (default: 60 for
+    PostgreSQL, 0 for SQLite).
+``DB_CONN_HEALTH_CHECKS``
+    Check a persistent connection before reusing it (default: ``True``).
+``DB_POOL``
+    Use Django's native connection pool instead of persistent connections;
+    needs Django 5.1+ and psycopg 3.
+``SQLITE_TUNING``
+    Apply ``SQLITE_PRAGMAS`` to every SQLite connection and start ``atomic()``
+    blocks with ``BEGIN IMMEDIATE`` (default: ``False``). Meant for
+    single-node deployments that serve writes from several workers; compare
+    with ``python tools/benchmark_sqlite.py``.
+``SQLITE_BUSY_TIMEOUT``
+    Seconds a tuned SQLite connection waits for the write lock before
+    failing with "database is locked" (default: 20).
+"""
+import os
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+ENGINES = {
+    'postgres': 'django.db.backends.postgresql',
+    'postgresql': 'django.db.backends.postgresql',
+    'pgsql': 'django.db.backends.postgresql',
+    'sqlite': 'django.db.backends.sqlite3',
+}
+DEFAULT_CONN_MAX_AGE = 60
+
+# The built-in backend reads init_command and transaction_mode from 5.1 on.
+SQLITE_TUNED_ENGINE = 'investment_system.backends.sqlite3' if django.VERSION < (5, 1) else ENGINES['sqlite']
+SQLITE_PRAGMAS = {
+    # Readers no longer block the writer, and commits append to the WAL.
+    'journal_mode': 'WAL',
+    # In WAL mode NORMAL can lose the last commits on power loss, never corrupt.
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative sizes are KiB: 64 MiB of page cache per connection.
+    'cache_size': -64 * 1024,
+}
+DEFAULT_SQLITE_BUSY_TIMEOUT = 20
+
+
+def _flag(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+def tune_sqlite(config, busy_timeout=DEFAULT_SQLITE_BUSY_TIMEOUT):
+    """Switch a SQLite ``config`` to the tuned profile, in place."""
+    config['ENGINE'] = SQLITE_TUNED_ENGINE
+    options = config['OPTIONS']
+    options['init_command'] = ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items())
+    options['transaction_mode'] = 'IMMEDIATE'
+    # sqlite3.connect() sets the busy timeout from this.
+    options['timeout'] = busy_timeout
+    return config
+
+
+def parse_database_url(url, base_dir, conn_max_age=None, health_checks=True, pool=False,
+                       sqlite_tuning=False, sqlite_busy_timeout=DEFAULT_SQLITE_BUSY_TIMEOUT):
+    """Django database settings for ``url``."""
+    parts = urlsplit(url)
+    engine = ENGINES.get(parts.scheme)
+    if engine is None:
+        raise ImproperlyConfigured(f"Unsupported database URL scheme '{parts.scheme}'.")
+
+    if engine.endswith('sqlite3'):
+        name = unquote(parts.path[1:]) or ':memory:'
+        if name != ':memory:':
+            name = Path(base_dir) / name
+        config = {'ENGINE': engine, 'NAME': name}
+        default_max_age = 0
+    else:
+        config = {
+            'ENGINE': engine,
+            'NAME': unquote(parts.path[1:]),
+            'USER': unquote(parts.username or ''),
+            'PASSWORD': unquote(parts.password or ''),
+            'HOST': parts.hostname or '',
+            'PORT': str(parts.port or ''),
+        }
+        default_max_age = DEFAULT_CONN_MAX_AGE
+
+    config['OPTIONS'] = dict(parse_qsl(parts.query))
+    config['CONN_MAX_AGE'] = default_max_age if conn_max_age is None else conn_max_age
+    config['CONN_HEALTH_CHECKS'] = health_checks
+    if pool:
+        if django.VERSION < (5, 1) or not engine.endswith('postgresql'):
+            raise ImproperlyConfigured("DB_POOL needs PostgreSQL with Django 5.1+ and psycopg 3.")
+        # Pooled connections are returned to the pool, not kept per thread.
+        config['OPTIONS']['pool'] = True
+        config['CONN_MAX_AGE'] = 0
+    if sqlite_tuning and engine.endswith('sqlite3'):
+        tune_sqlite(config, sqlite_busy_timeout)
+    return config
+
+
+def database_config(base_dir, environ=os.environ):
+    """Return (DATABASES, replica aliases) for ``environ``."""
+    conn_max_age = environ.get('DB_CONN_MAX_AGE')
+    options = {
+        'base_dir': base_dir,
+        'conn_max_age': int(conn_max_age) if conn_max_age not in (None, '') else None,
+        'health_checks': _flag(environ.get('DB_CONN_HEALTH_CHECKS', 'True')),
+        'pool': _flag(environ.get('DB_POOL', 'False')),
+        'sqlite_tuning': _flag(environ.get('SQLITE_TUNING', 'False')),
+        'sqlite_busy_timeout': float(environ.get('SQLITE_BUSY_TIMEOUT', DEFAULT_SQLITE_BUSY_TIMEOUT)),
+    }
+    databases = {'default': parse_database_url(environ.get('DATABASE_URL', 'sqlite:///db.sqlite3'), **options)}
+    replicas = []
+    urls = [url.strip() for url in environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    for number, url in enumerate(urls, start=1):
+        alias = f'replica{number}'
+        databases[alias] = parse_database_url(url, **options)
+        # Tests read and write through the primary instead of creating replica databases.
+        databases[alias]['TEST'] = {'MIRROR': 'default'}
+        replicas.append(alias)
+    return databases, replicas
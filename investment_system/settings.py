@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.QueryInstrumentationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,6 +55,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request query counts, SQL time and Server-Timing headers (see core.middleware).
+QUERY_INSTRUMENTATION = os.environ.get('QUERY_INSTRUMENTATION', 'True') == 'True'
+
 ROOT_URLCONF = 'investment_system.urls'
 
 TEMPLATES = [
@@ -63,6 +70,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.cache_versions',
+                'core.context_processors.unread_notifications',
             ],
         },
     },
@@ -70,16 +79,61 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'investment_system.wsgi.application'
 
+# Serve the read-heavy pages with the async views in core.async_views. Turn on
+# when running investment_system.asgi; under WSGI each async view costs an
+# extra event loop hop.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Primary, read replicas and connection reuse come from DATABASE_URL,
+# DATABASE_REPLICA_URLS, DB_CONN_MAX_AGE, DB_CONN_HEALTH_CHECKS and DB_POOL;
+# SQLITE_TUNING switches SQLite to WAL with IMMEDIATE write transactions. See
+# investment_system/database.py. The default is the local db.sqlite3.
+DATABASES, DATABASE_REPLICAS = database_config(BASE_DIR)
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter'] if DATABASE_REPLICAS else []
+
+# Views whose reads may be served by a replica (core.middleware.ReplicaRoutingMiddleware).
+REPLICA_ROUTES = [
+    'startup_list', 'startup_detail', 'markets', 'documents_list', 'document_detail',
+    'reports_overview', 'investments_report', 'startups_report',
+]
+# After a write, keep the client on the primary for this long so it sees its own change.
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+# Local memory is per process: with several gunicorn workers use the file or
+# redis backend so version bumps from one worker are seen by all of them.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_URL', 'redis://127.0.0.1:6379/1'),
+        }
     }
-}
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'investment-system',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Delivers /events/ stream messages within this process (see core.events).
+EVENT_HUB = os.environ.get('EVENT_HUB', 'core.events.LocalHub')
 
 
 # Password validation
@@ -121,6 +175,30 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Document files are stored once per content under their SHA-256 and shared
+# between documents (see core.storage and core.blobs); everything else uses the default.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'documents': {'BACKEND': 'core.storage.ContentAddressedStorage'},
+}
+
+# When downscaled startup image variants are made (see core.images): 'upload'
+# renders them when the upload commits, 'worker' leaves them to
+# `manage.py process_startup_images --watch`.
+IMAGE_PROCESSING = os.environ.get('IMAGE_PROCESSING', 'upload')
+
+# How document downloads are sent (see core.downloads). The default streams
+# them from Django. Behind nginx use core.downloads.XAccelRedirectBackend and
+# serve DOWNLOAD_ACCEL_PREFIX as an internal location aliased to MEDIA_ROOT;
+# behind Apache or lighttpd use core.downloads.XSendfileBackend.
+DOWNLOAD_BACKEND = os.environ.get('DOWNLOAD_BACKEND', 'core.downloads.FileResponseBackend')
+DOWNLOAD_ACCEL_PREFIX = os.environ.get('DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+
+# Where resumable chunked uploads (core.uploads) are assembled. Keep it on the
+# same filesystem as MEDIA_ROOT so a finished upload is moved, not copied.
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', BASE_DIR / 'uploads_partial')
  
 # Use BigAutoField for primary keys to avoid warnings
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
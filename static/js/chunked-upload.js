@@ -0,0 +1,121 @@
+// Resumable chunked upload for the document upload form.
+//
+// Include with data-start-url set to the document_upload_start endpoint and
+// data-form naming the form's id. The file is sent in slices to the chunk URL
+// the server hands out; a failed slice is retried with backoff, and an upload
+// interrupted by a reload or a lost connection resumes from the server's
+// offset the next time the same file is picked. Without fetch or File.slice
+// the form falls back to its normal multipart POST.
+(function () {
+    const script = document.currentScript;
+    const form = script && document.getElementById(script.dataset.form);
+    if (!form || !window.fetch || !window.Blob || !Blob.prototype.slice) return;
+
+    const fileInput = form.querySelector('input[type=file]');
+    const progress = form.querySelector('[data-upload-progress]');
+    const bar = progress && progress.querySelector('.progress-bar');
+    const status = form.querySelector('[data-upload-status]');
+    const csrfToken = form.querySelector('[name=csrfmiddlewaretoken]').value;
+    const retries = 5;
+
+    function storageKey(file) {
+        return `chunked-upload:${file.name}:${file.size}:${file.lastModified}`;
+    }
+
+    function showProgress(sent, total) {
+        if (!progress) return;
+        const percent = Math.floor((sent / total) * 100);
+        progress.classList.remove('d-none');
+        bar.style.width = `${percent}%`;
+        bar.textContent = `${percent}%`;
+    }
+
+    function showStatus(text) {
+        if (!status) return;
+        status.textContent = text;
+        status.classList.toggle('d-none', !text);
+    }
+
+    async function request(url, options) {
+        const headers = Object.assign({'X-CSRFToken': csrfToken}, options.headers);
+        const response = await fetch(url, Object.assign({}, options, {headers, credentials: 'same-origin'}));
+        const data = response.status === 204 ? {} : await response.json();
+        return {response, data};
+    }
+
+    // Retry network errors and 5xx answers, waiting 1, 2, 4... seconds.
+    async function withRetries(send) {
+        for (let attempt = 0; ; attempt++) {
+            try {
+                const result = await send();
+                if (result.response.status < 500 || attempt >= retries) return result;
+            } catch (err) {
+                if (attempt >= retries) throw err;
+            }
+            showStatus('Connection problem, retrying...');
+            await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** attempt));
+        }
+    }
+
+    async function resumeOrStart(file) {
+        const saved = localStorage.getItem(storageKey(file));
+        if (saved) {
+            const {response, data} = await withRetries(() => request(saved, {method: 'GET'}));
+            if (response.ok) return data;
+            localStorage.removeItem(storageKey(file));
+        }
+        const {response, data} = await withRetries(() => request(script.dataset.startUrl, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                title: form.elements.title.value,
+                description: form.elements.description.value,
+                filename: file.name,
+                size: file.size,
+            }),
+        }));
+        if (!response.ok) throw new Error(data.error || 'The upload could not be started.');
+        localStorage.setItem(storageKey(file), data.url);
+        return data;
+    }
+
+    async function upload(file) {
+        const state = await resumeOrStart(file);
+        let offset = state.offset;
+        while (offset < file.size) {
+            showProgress(offset, file.size);
+            const chunk = file.slice(offset, offset + state.chunk_size);
+            const {response, data} = await withRetries(() => request(`${state.chunk_url}?offset=${offset}`, {
+                method: 'PUT',
+                headers: {'Content-Type': 'application/octet-stream'},
+                body: chunk,
+            }));
+            if (response.status === 409) {
+                // The server holds a different amount than we thought: continue from there.
+                offset = data.offset;
+                continue;
+            }
+            if (!response.ok) throw new Error(data.error || 'A chunk was rejected.');
+            offset = data.offset;
+            showStatus('');
+        }
+        showProgress(file.size, file.size);
+        const {response, data} = await withRetries(() => request(state.finish_url, {method: 'POST'}));
+        localStorage.removeItem(storageKey(file));
+        if (!response.ok) throw new Error(data.error || 'The upload could not be completed.');
+        window.location.href = data.redirect;
+    }
+
+    form.addEventListener('submit', (e) => {
+        const file = fileInput && fileInput.files[0];
+        if (!file) return;
+        e.preventDefault();
+        const button = form.querySelector('[type=submit]');
+        button.disabled = true;
+        showStatus('');
+        upload(file).catch((err) => {
+            showStatus(`${err.message} Submit again to resume.`);
+            button.disabled = false;
+        });
+    });
+})();
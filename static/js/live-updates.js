@@ -0,0 +1,37 @@
+// Live notification and watchlist updates over server-sent events.
+//
+// Include with data-events-url set to the event stream. Unread badges marked
+// with data-unread-badge are incremented as notifications arrive, and the
+// #liveUpdateNotice alert offers a refresh. With data-reload-on-watchlist
+// the page reloads when the watchlist changes in another tab or device.
+(function () {
+    const script = document.currentScript;
+    if (!script || !window.EventSource) return;
+
+    const source = new EventSource(script.dataset.eventsUrl);
+
+    function showNotice(text) {
+        const notice = document.getElementById('liveUpdateNotice');
+        if (!notice) return;
+        notice.querySelector('[data-notice-text]').textContent = text;
+        notice.classList.remove('d-none');
+    }
+
+    source.addEventListener('notification', (e) => {
+        const data = JSON.parse(e.data);
+        document.querySelectorAll('[data-unread-badge]').forEach((badge) => {
+            badge.textContent = (parseInt(badge.textContent, 10) || 0) + 1;
+            badge.classList.remove('d-none');
+        });
+        showNotice(data.message);
+    });
+
+    source.addEventListener('watchlist', (e) => {
+        if (script.dataset.reloadOnWatchlist !== undefined) {
+            window.location.reload();
+            return;
+        }
+        const data = JSON.parse(e.data);
+        showNotice(`${data.name || 'A startup'} was ${data.action} ${data.action === 'added' ? 'to' : 'from'} your watchlist.`);
+    });
+})();
@@ -0,0 +1,229 @@
+"""
+Compare sync WSGI and async ASGI throughput of the read-heavy views.
+
+Seeds a throwaway SQLite database, then serves the same requests twice, each
+mode in its own process with one worker:
+
+* wsgi: ``investment_system.wsgi`` with the sync views, called from a pool of
+  ``--concurrency`` threads (like gunicorn ``--threads``);
+* asgi: ``investment_system.asgi`` with ``ASYNC_VIEWS`` on, called from
+  ``--concurrency`` tasks on one event loop (like a uvicorn worker).
+
+The applications are called in-process, so no server or network is measured.
+Prints requests per second and latency percentiles per route.
+
+Usage:
+    python tools/benchmark_async.py [--investments 50000] [--requests 300] [--concurrency 16] [--cold]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'investment_system.settings')
+
+ROUTES = [
+    'startup_list', 'startup_detail', 'watchlist', 'documents_list',
+    'reports_overview', 'investments_report', 'startups_report',
+]
+
+
+def setup_django(db_path, cold=False):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    if cold:
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    django.setup()
+
+
+def prepare(investments):
+    """Seed the database; returns (session cookie, {route: path})."""
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.urls import reverse
+    from core import benchmark
+    from core.models import Startup
+
+    benchmark.seed(
+        users=max(investments // 200, 10), startups=max(investments // 20, 10), investments=investments,
+        watchlists=max(investments // 10, 10), documents=max(investments // 10, 10), newsletters=0,
+    )
+    user = User.objects.filter(username__startswith=benchmark.BENCHMARK_PREFIX).order_by(
+        '-portfolio_summary__investment_count').first()
+    client = Client()
+    client.force_login(user)
+    paths = {name: reverse(name) for name in ROUTES if name != 'startup_detail'}
+    paths['startup_detail'] = reverse('startup_detail', args=[Startup.objects.order_by('pk').first().pk])
+    paths['investments_report'] += '?stage=seed&order=-amount'
+    paths['startups_report'] += '?q=bench+data'
+    return client.cookies[settings.SESSION_COOKIE_NAME].value, paths
+
+
+def _split(path):
+    path, _, query = path.partition('?')
+    return path, query
+
+
+def run_wsgi(paths, cookie, requests, concurrency):
+    from django.conf import settings
+    from investment_system.wsgi import application
+
+    def request(path):
+        path, query = _split(path)
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost', 'HTTP_COOKIE': f'{settings.SESSION_COOKIE_NAME}={cookie}',
+            'wsgi.input': sys.stdin.buffer, 'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+        status = []
+        started = time.perf_counter()
+        body = application(environ, lambda s, headers, exc_info=None: status.append(s))
+        try:
+            for _chunk in body:
+                pass
+        finally:
+            body.close()
+        return time.perf_counter() - started, status[0]
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for name, path in paths.items():
+            list(pool.map(request, [path] * concurrency))  # warm up
+            started = time.perf_counter()
+            samples = list(pool.map(request, [path] * requests))
+            results[name] = _summarize(samples, time.perf_counter() - started)
+    return results
+
+
+async def run_asgi(paths, cookie, requests, concurrency):
+    from django.conf import settings
+    from investment_system.asgi import application
+
+    async def request(path):
+        path, query = _split(path)
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+            'root_path': '', 'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+            'headers': [(b'host', b'localhost'), (b'cookie', f'{settings.SESSION_COOKIE_NAME}={cookie}'.encode())],
+        }
+        status = []
+        requested = []
+        done = asyncio.Event()
+
+        async def receive():
+            if not requested:
+                requested.append(True)
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif not message.get('more_body'):
+                done.set()
+
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        return time.perf_counter() - started, status[0]
+
+    async def batch(path, count):
+        slots = asyncio.Semaphore(concurrency)
+
+        async def limited():
+            async with slots:
+                return await request(path)
+
+        return await asyncio.gather(*(limited() for _ in range(count)))
+
+    results = {}
+    for name, path in paths.items():
+        await batch(path, concurrency)  # warm up
+        started = time.perf_counter()
+        samples = await batch(path, requests)
+        results[name] = _summarize(samples, time.perf_counter() - started)
+    return results
+
+
+def _summarize(samples, elapsed):
+    timings = sorted(seconds * 1000 for seconds, _ in samples)
+    statuses = sorted({str(status).split()[0] for _, status in samples})
+    return {
+        'rps': len(samples) / elapsed,
+        'p50_ms': statistics.median(timings),
+        'p95_ms': timings[max(0, round(len(timings) * 0.95) - 1)],
+        'status': ','.join(statuses),
+    }
+
+
+def child(args):
+    setup_django(args.db, cold=args.cold)
+    paths = json.loads(args.paths)
+    if args.mode == 'wsgi':
+        results = run_wsgi(paths, args.cookie, args.requests, args.concurrency)
+    else:
+        results = asyncio.run(run_asgi(paths, args.cookie, args.requests, args.concurrency))
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--investments', type=int, default=50_000)
+    parser.add_argument('--requests', type=int, default=300, help="Requests per route.")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--cold', action='store_true', help="Disable the cache so every request hits the database.")
+    parser.add_argument('--mode', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--cookie', help=argparse.SUPPRESS)
+    parser.add_argument('--paths', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        return child(args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'benchmark.sqlite3')
+        setup_django(db)
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        print(f"Seeding {args.investments} investments...")
+        cookie, paths = prepare(args.investments)
+
+        results = {}
+        for mode in ('wsgi', 'asgi'):
+            command = [
+                sys.executable, __file__, '--mode', mode, '--db', db, '--cookie', cookie,
+                '--paths', json.dumps(paths), '--requests', str(args.requests),
+                '--concurrency', str(args.concurrency),
+            ] + (['--cold'] if args.cold else [])
+            env = dict(os.environ, ASYNC_VIEWS=str(mode == 'asgi'))
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+            results[mode] = json.loads(output.splitlines()[-1])
+
+        print(f"\n{args.requests} requests per route, concurrency {args.concurrency}"
+              f"{', cache disabled' if args.cold else ''}")
+        print(f"{'route':20} {'wsgi rps':>9} {'p50':>7} {'p95':>7} | {'asgi rps':>9} {'p50':>7} {'p95':>7} | status")
+        for name in paths:
+            w, a = results['wsgi'][name], results['asgi'][name]
+            print(f"{name:20} {w['rps']:9.1f} {w['p50_ms']:7.1f} {w['p95_ms']:7.1f} | "
+                  f"{a['rps']:9.1f} {a['p50_ms']:7.1f} {a['p95_ms']:7.1f} | {w['status']}/{a['status']}")
+
+
+if __name__ == '__main__':
+    main()
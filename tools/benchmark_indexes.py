@@ -0,0 +1,132 @@
+"""
+Benchmark the query-pattern indexes declared on the core models.
+
+Seeds a throwaway SQLite database, then runs the queries the views actually
+issue twice: once with the Meta indexes dropped and once with them in place.
+For each query it prints the EXPLAIN plan and the median wall time.
+
+Usage:
+    python tools/benchmark_indexes.py [--investments 200000] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'investment_system.settings')
+
+
+def setup_django(db_path):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    django.setup()
+
+
+def seed(investments):
+    from django.contrib.auth.models import User
+    from core import benchmark
+
+    benchmark.seed(
+        users=max(investments // 200, 10), startups=max(investments // 20, 10), investments=investments,
+        watchlists=0, documents=max(investments // 10, 10), newsletters=max(investments // 10, 10),
+    )
+    return User.objects.order_by('-portfolio_summary__investment_count').first()
+
+
+def view_queries(user):
+    """The querysets issued by the views, keyed by a short label."""
+    from django.db.models import Count, Sum
+    from core.models import Document, Investment, Newsletter, Startup
+
+    reports = Investment.objects.select_related('startup', 'investor')
+    return {
+        'dashboard recent investments': Investment.objects.filter(investor=user).order_by('-date')[:5],
+        'investments report page 1': reports.order_by('-date', '-id')[:51],
+        'investments report date range': reports.filter(
+            date__gte='2019-01-01', date__lte='2019-03-31').order_by('-date', '-id')[:51],
+        'investments report stage + dates': reports.filter(
+            stage='Series A', date__gte='2019-01-01', date__lte='2019-12-31').order_by('-date', '-id')[:51],
+        'investments report by amount': reports.order_by('-amount', '-id')[:51],
+        'investments summary by startup': Investment.objects.order_by().values(
+            'startup_id').annotate(total=Sum('amount'), count=Count('id')),
+        'startups report by industry': Startup.objects.filter(industry='AI').order_by('-created_at', '-id')[:51],
+        'startup list page 1': Startup.objects.order_by('-created_at', '-id')[:25],
+        'documents list page 1': Document.objects.order_by('-uploaded_at', '-id')[:31],
+        'my documents': Document.objects.filter(uploaded_by=user).order_by('-uploaded_at'),
+        'active newsletter subscribers': Newsletter.objects.filter(is_active=True).order_by(),
+    }
+
+
+def measure(queries, repeat):
+    results = {}
+    for label, qs in queries.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(qs.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        results[label] = (statistics.median(timings), qs.explain())
+    return results
+
+
+def toggle_indexes(add):
+    from django.db import connection
+    from core.models import Document, Investment, Newsletter, Startup
+
+    indexed = Newsletter._meta.get_field('is_active')
+    plain = indexed.clone()
+    plain.set_attributes_from_name('is_active')
+    plain.model = Newsletter
+    plain.db_index = False
+    with connection.schema_editor() as editor:
+        for model in (Startup, Investment, Document):
+            for index in model._meta.indexes:
+                (editor.add_index if add else editor.remove_index)(model, index)
+        if add:
+            editor.alter_field(Newsletter, plain, indexed)
+        else:
+            editor.alter_field(Newsletter, indexed, plain)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--investments', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, 'benchmark.sqlite3'))
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        print(f"Seeding {args.investments} investments...")
+        user = seed(args.investments)
+        queries = view_queries(user)
+
+        toggle_indexes(add=False)
+        before = measure(queries, args.repeat)
+        toggle_indexes(add=True)
+        after = measure(queries, args.repeat)
+
+        for label in queries:
+            print(f"\n== {label}")
+            print(f"   without indexes: {before[label][0]:8.2f} ms | {before[label][1]}")
+            print(f"   with indexes:    {after[label][0]:8.2f} ms | {after[label][1]}")
+
+        print(f"\n{'query':40} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for label in queries:
+            b, a = before[label][0], after[label][0]
+            print(f"{label:40} {b:10.2f} {a:10.2f} {b / a if a else 0:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
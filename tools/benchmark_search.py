@@ -0,0 +1,133 @@
+"""
+Measure document content search on a large corpus.
+
+Seeds a throwaway SQLite database with ``--documents`` documents, each with
+``--words`` words of extracted text drawn from a Zipf-distributed vocabulary
+(a few words occur in nearly every document, most in a handful), indexes
+them, then requests the documents list with a range of queries, from a word
+in almost every document to one in a few. Prints the median and 95th
+percentile time of the whole request (search, ranking, keyset page, count
+and snippets) and of the snippet query alone.
+
+Usage:
+    python tools/benchmark_search.py [--documents 100000] [--words 300] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'investment_system.settings')
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def setup_django(db_path):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    django.setup()
+    from django.test.utils import setup_test_environment
+
+    # Lets the test client expose the page's documents.
+    setup_test_environment()
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(LETTERS, k=rng.randint(3, 9))))
+    return sorted(words)
+
+
+def seed(documents, words, rng):
+    """Documents with extracted text; returns the vocabulary, most frequent word first."""
+    from django.db import connection, transaction
+    from core import benchmark
+    from core.models import Document, DocumentText
+    from core.search import create_search_tables
+
+    benchmark.seed(users=20, startups=1, investments=0, watchlists=0, documents=documents, newsletters=0)
+    vocab = vocabulary(20000, rng)
+    weights = [1 / rank for rank in range(1, len(vocab) + 1)]
+    pks = list(Document.objects.order_by('pk').values_list('pk', 'file'))
+    with transaction.atomic():
+        for start in range(0, len(pks), 5000):
+            DocumentText.objects.bulk_create([
+                DocumentText(document_id=pk, status=DocumentText.STATUS_DONE, source=name,
+                             content=' '.join(rng.choices(vocab, weights, k=words)))
+                for pk, name in pks[start:start + 5000]
+            ])
+    create_search_tables(connection, rebuild=True)
+    return vocab
+
+
+def queries(vocab):
+    return {
+        'most frequent word': vocab[0],
+        '10th word': vocab[9],
+        '100th word': vocab[99],
+        '5000th word (rare)': vocab[4999],
+        'two frequent words': f'{vocab[1]} {vocab[2]}',
+        'prefix of 3 letters': vocab[3][:3],
+        'no match': 'zzzzzz',
+    }
+
+
+def percentile(timings, share):
+    ordered = sorted(timings)
+    return ordered[max(0, round(len(ordered) * share) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--documents', type=int, default=100000)
+    parser.add_argument('--words', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, 'search.sqlite3'))
+        from django.core.management import call_command
+        from django.test import Client
+        from django.urls import reverse
+        from core.models import Document
+        from core.search import search, snippets
+
+        call_command('migrate', verbosity=0)
+        print(f"Seeding {args.documents} documents of {args.words} words...")
+        started = time.perf_counter()
+        vocab = seed(args.documents, args.words, random.Random(42))
+        print(f"Seeded and indexed in {time.perf_counter() - started:.0f} s\n")
+
+        client = Client()
+        url = reverse('documents_list')
+        print(f"{'query':22} {'matches':>8} {'p50 ms':>7} {'p95 ms':>7} {'snippets ms':>12}")
+        for label, text in queries(vocab).items():
+            client.get(url, {'q': text})
+            request_timings, snippet_timings = [], []
+            for _ in range(args.repeat):
+                began = time.perf_counter()
+                response = client.get(url, {'q': text})
+                request_timings.append((time.perf_counter() - began) * 1000)
+                if response.status_code != 200:
+                    raise SystemExit(f"{label}: HTTP {response.status_code}")
+                pks = [doc.pk for doc in response.context['documents']]
+                began = time.perf_counter()
+                snippets(Document, pks, text, 'text__content')
+                snippet_timings.append((time.perf_counter() - began) * 1000)
+            matches = search(Document.objects.all(), text).count()
+            print(f"{label:22} {matches:8} {statistics.median(request_timings):7.1f} "
+                  f"{percentile(request_timings, 0.95):7.1f} {statistics.median(snippet_timings):12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Measure concurrent write throughput on SQLite with and without SQLITE_TUNING.
+
+Seeds a throwaway SQLite database, then runs the same load once per profile
+against a fresh copy of it: ``--workers`` processes (gunicorn workers), each
+with ``--threads`` threads (gunicorn ``--threads``), call the WSGI
+application for ``--seconds``. Every request is one of the project's write
+paths, toggle_watchlist or add_investment (which also updates the portfolio
+tables), or a startup detail read, picked at random with the same seed in
+both runs. Prints writes per second, write latency and the share of requests
+that failed with "database is locked".
+
+Usage:
+    python tools/benchmark_sqlite.py [--workers 4] [--threads 2] [--seconds 10]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'investment_system.settings')
+
+PROFILES = {'default': 'False', 'tuned': 'True'}
+
+
+def setup_django(db_path):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    django.setup()
+
+
+def seed(clients):
+    from core import benchmark
+
+    benchmark.seed(users=clients, startups=200, investments=clients * 20, watchlists=clients * 5,
+                   documents=0, newsletters=0)
+
+
+def run_client(number, window, results):
+    """One worker thread: a logged-in client looping over the write paths until the window closes."""
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, connection
+    from django.test import Client
+    from django.urls import reverse
+    from core import benchmark
+    from core.models import Startup
+
+    rng = random.Random(number)
+    client = Client()
+    client.force_login(User.objects.get(username=f'{benchmark.BENCHMARK_PREFIX}{number}'))
+    startup_ids = list(Startup.objects.values_list('pk', flat=True))
+    samples = results[number] = []
+    start_at, end_at = window
+    time.sleep(max(0, start_at - time.time()))
+
+    while time.time() < end_at:
+        pk = rng.choice(startup_ids)
+        roll = rng.random()
+        if roll < 0.4:
+            kind, request = 'write', lambda: client.post(reverse('toggle_watchlist', args=[pk]))
+        elif roll < 0.7:
+            kind, request = 'write', lambda: client.post(reverse('add_investment'), {
+                'startup': pk, 'amount': rng.randint(1, 500) * 1000, 'date': '2024-06-01',
+                'stage': 'Seed', 'equity_percentage': '1.50',
+            })
+        else:
+            kind, request = 'read', lambda: client.get(reverse('startup_detail', args=[pk]))
+        started = time.perf_counter()
+        try:
+            status = request().status_code
+            outcome = 'ok' if status < 400 else f'http {status}'
+        except OperationalError as exc:
+            outcome = 'locked' if 'locked' in str(exc) else 'error'
+        samples.append((kind, outcome, time.perf_counter() - started))
+        # Flash messages would otherwise pile up in the cookie and spill into the session.
+        client.cookies.pop('messages', None)
+    connection.close()
+
+
+def worker(args):
+    setup_django(args.db)
+    results = {}
+    window = (args.start_at, args.start_at + args.seconds)
+    threads = [
+        threading.Thread(target=run_client, args=(args.first_client + i, window, results))
+        for i in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(json.dumps([sample for samples in results.values() for sample in samples]))
+
+
+def summarize(samples, seconds):
+    writes = [(outcome, elapsed) for kind, outcome, elapsed in samples if kind == 'write']
+    ok = sorted(elapsed * 1000 for outcome, elapsed in writes if outcome == 'ok')
+    count = lambda outcome: sum(1 for o, _ in writes if o == outcome)
+    return {
+        'requests': len(samples),
+        'writes_per_second': len(ok) / seconds,
+        'p50_ms': statistics.median(ok) if ok else 0,
+        'p95_ms': ok[max(0, round(len(ok) * 0.95) - 1)] if ok else 0,
+        'locked': count('locked') / len(writes) if writes else 0,
+        'other_errors': (len(writes) - len(ok) - count('locked')) / len(writes) if writes else 0,
+        'read_errors': sum(1 for kind, outcome, _ in samples if kind == 'read' and outcome != 'ok'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--start-at', type=float, help=argparse.SUPPRESS)
+    parser.add_argument('--first-client', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.db:
+        return worker(args)
+
+    clients = args.workers * args.threads
+    with tempfile.TemporaryDirectory() as tmp:
+        seeded = os.path.join(tmp, 'seeded.sqlite3')
+        setup_django(seeded)
+        from django.core.management import call_command
+        from django.db import connection
+
+        call_command('migrate', verbosity=0)
+        print(f"Seeding {clients} users...")
+        seed(clients)
+        connection.close()
+
+        results = {}
+        for profile, tuning in PROFILES.items():
+            db = os.path.join(tmp, f'{profile}.sqlite3')
+            shutil.copyfile(seeded, db)
+            start_at = time.time() + 3 + args.workers * 0.5
+            env = dict(os.environ, SQLITE_TUNING=tuning)
+            processes = [
+                subprocess.Popen([
+                    sys.executable, __file__, '--db', db, '--start-at', str(start_at),
+                    '--seconds', str(args.seconds), '--threads', str(args.threads),
+                    '--first-client', str(number * args.threads),
+                ], env=env, stdout=subprocess.PIPE, text=True)
+                for number in range(args.workers)
+            ]
+            samples = []
+            for process in processes:
+                output, _ = process.communicate()
+                if process.returncode:
+                    raise SystemExit(f"{profile} worker failed")
+                samples.extend(json.loads(output.splitlines()[-1]))
+            results[profile] = summarize(samples, args.seconds)
+
+        print(f"\n{args.workers} workers x {args.threads} threads, {args.seconds:g} s per profile")
+        print(f"{'profile':8} {'requests':>8} {'writes/s':>9} {'p50 ms':>7} {'p95 ms':>7} "
+              f"{'locked':>7} {'other':>6} {'read errors':>11}")
+        for profile, r in results.items():
+            print(f"{profile:8} {r['requests']:8} {r['writes_per_second']:9.1f} {r['p50_ms']:7.1f} "
+                  f"{r['p95_ms']:7.1f} {r['locked']:7.1%} {r['other_errors']:6.1%} {r['read_errors']:11}")
+
+
+if __name__ == '__main__':
+    main()
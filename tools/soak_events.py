@@ -0,0 +1,189 @@
+"""
+Soak test for the server-sent events stream under one ASGI worker.
+
+Opens ``--connections`` concurrent authenticated ``/events/`` streams against
+the project's ASGI application in a single process and event loop, the way
+one uvicorn/daphne worker would serve them, then publishes one event to every
+user from a worker thread and waits until each stream has delivered it. The
+application is called directly with ASGI messages, so no server or network
+stack is measured. Prints connect time, fan-out latency, memory and thread
+count per stream, and exits with status 1 if the open streams held threads
+(see ``core.asgi``).
+
+Usage:
+    python tools/soak_events.py [--connections 2000] [--rounds 3]
+"""
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+# Threads allowed while the streams are open, however many there are:
+# asgiref's shared thread and the event loop's default executor.
+THREAD_ALLOWANCE = 8
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'investment_system.settings')
+
+
+def setup_django(db_path):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    django.setup()
+
+
+def create_sessions(count):
+    """Users with a logged-in session each; returns [(user id, cookie header)]."""
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    from django.contrib.auth.models import User
+    from django.contrib.sessions.backends.db import SessionStore
+
+    User.objects.bulk_create([User(username=f'soak{i}', password='!') for i in range(count)], batch_size=1000)
+    sessions = []
+    for user in User.objects.filter(username__startswith='soak').order_by('pk'):
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        sessions.append((user.pk, f'{settings.SESSION_COOKIE_NAME}={session.session_key}'.encode()))
+    return sessions
+
+
+def rss_kib():
+    """Current resident set size (peak size where /proc is not available)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Stream:
+    """One client connection, fed to the ASGI app as scope/receive/send."""
+
+    def __init__(self, cookie):
+        self.cookie = cookie
+        self.status = None
+        self.opened = asyncio.Event()
+        self.disconnected = asyncio.Event()
+        self.requested = False
+        self.events = 0
+        self.last_event_at = None
+        self.arrived = asyncio.Event()
+
+    def scope(self):
+        return {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': '/events/', 'raw_path': b'/events/', 'query_string': b'',
+            'root_path': '', 'headers': [(b'host', b'localhost'), (b'cookie', self.cookie)],
+            'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+        }
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+            self.opened.set()
+        elif message['type'] == 'http.response.body' and b'event: ' in message.get('body', b''):
+            self.events += 1
+            self.last_event_at = time.perf_counter()
+            self.arrived.set()
+
+
+async def soak(app, sessions, rounds):
+    from core import events
+
+    hub = events.get_hub()
+    streams = [Stream(cookie) for _, cookie in sessions]
+    threads_before = threading.active_count()
+    memory_before = rss_kib()
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(app(stream.scope(), stream.receive, stream.send)) for stream in streams]
+    await asyncio.gather(*(stream.opened.wait() for stream in streams))
+    # Wait until every stream has subscribed, not just sent its headers.
+    while hub.subscriber_count() < len(streams):
+        await asyncio.sleep(0.01)
+    connect_seconds = time.perf_counter() - started
+    memory_open = rss_kib()
+    threads_open = threading.active_count()
+    bad = sum(stream.status != 200 for stream in streams)
+
+    latencies = []
+    for number in range(rounds):
+        for stream in streams:
+            stream.arrived.clear()
+        message = events.event('notification', {'id': number + 1, 'message': 'soak'}, event_id=number + 1)
+        sent_at = time.perf_counter()
+        thread = threading.Thread(target=lambda: [
+            hub.publish(events.user_channel(user_id), message) for user_id, _ in sessions
+        ])
+        thread.start()
+        await asyncio.gather(*(stream.arrived.wait() for stream in streams))
+        thread.join()
+        latencies.append(max(stream.last_event_at for stream in streams) - sent_at)
+
+    for stream in streams:
+        stream.disconnected.set()
+    await asyncio.wait(tasks, timeout=30)
+    return {
+        'connections': len(streams),
+        'failed': bad,
+        'connect_seconds': connect_seconds,
+        'fanout_ms': [latency * 1000 for latency in latencies],
+        'memory_per_connection': (memory_open - memory_before) / len(streams),
+        'threads': threads_open - threads_before,
+        'delivered': sum(stream.events for stream in streams),
+        'subscribers_left': hub.subscriber_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--connections', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, 'soak.sqlite3'))
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        print(f"Creating {args.connections} sessions...")
+        sessions = create_sessions(args.connections)
+
+        from investment_system.asgi import application
+
+        result = asyncio.run(soak(application, sessions, args.rounds))
+        print(f"open streams:         {result['connections']} ({result['failed']} failed)")
+        print(f"connect all:          {result['connect_seconds']:.2f} s")
+        print(f"fan-out to all (ms):  median {statistics.median(result['fanout_ms']):.1f}, "
+              f"max {max(result['fanout_ms']):.1f}")
+        print(f"delivered events:     {result['delivered']} / {result['connections'] * args.rounds}")
+        print(f"memory per stream:    {result['memory_per_connection']:.1f} KiB RSS")
+        print(f"threads while open:   {result['threads']}")
+        print(f"left subscribed:      {result['subscribers_left']}")
+
+    if result['threads'] > THREAD_ALLOWANCE:
+        sys.exit(f"{result['threads']} threads held by {result['connections']} open streams.")
+
+
+if __name__ == '__main__':
+    main()